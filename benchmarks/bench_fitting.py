@@ -0,0 +1,55 @@
+#
+# Compare fitting R0 and CFR of two strains to daily deaths with the exact
+# gradient from forward sensitivities, against black-box optimisation of
+# Solver.solve with finite difference gradients and with Nelder-Mead.
+#
+# Run with ``python benchmarks/bench_fitting.py``.
+#
+import time
+import numpy as np
+import scipy.optimize
+import scipy.special
+import epistrains as es
+
+POP = es.Population(0.0001, 100000, es.make_br(0.1, 0.00001))
+STRAINS = [es.Strain(0.01, 7, 2.0, 50), es.Strain(0.02, 5, 1.5, 30, delay=10)]
+X0 = [1.8, 1.7, 0.015, 0.015]
+
+
+def observed():
+    s = es.Solver(POP, STRAINS, time=40, rtol=1e-8, atol=1e-8)
+    s.solve()
+    return s.daily_deaths_by_strain
+
+
+def black_box(data, method):
+    """Fit by solving the model for every likelihood evaluation"""
+    fit = es.DeathsFit(POP, STRAINS, data)
+    solves = [0]
+
+    def negative(x):
+        solves[0] += 1
+        s = es.Solver(POP, fit.make_strains(x), time=40, rtol=1e-6, atol=1e-6)
+        s.solve()
+        expected = np.maximum(s.daily_deaths_by_strain, 1e-10)
+        return -(data*np.log(expected) - expected - scipy.special.gammaln(data + 1)).sum()
+
+    result = scipy.optimize.minimize(negative, X0, method=method, bounds=[(1e-8, None)]*4)
+    return result.x, solves[0]
+
+
+def sensitivities(data):
+    fit = es.DeathsFit(POP, STRAINS, data)
+    result = fit.fit_parameters(x0=X0)
+    return result.x, fit.nfev
+
+
+if __name__ == '__main__':
+    data = observed()
+    print(f"{'method':>22} {'solves':>7} {'time (s)':>9}  fitted [R0_1, R0_2, CFR_1, CFR_2]")
+    for name, run in (('sensitivities', lambda: sensitivities(data)),
+                      ('finite differences', lambda: black_box(data, 'L-BFGS-B')),
+                      ('Nelder-Mead', lambda: black_box(data, 'Nelder-Mead'))):
+        start = time.perf_counter()
+        x, solves = run()
+        print(f"{name:>22} {solves:>7} {time.perf_counter() - start:>9.2f}  {np.round(x, 4)}")
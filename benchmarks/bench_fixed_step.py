@@ -0,0 +1,32 @@
+#
+# Compare adaptive and fixed step integration of large ensembles.
+#
+# Run with ``python benchmarks/bench_fixed_step.py``.
+#
+import time
+import numpy as np
+import epistrains as es
+
+
+def make_ensemble(members):
+    """Ensemble of two strain models with R0 of the first strain varied"""
+    rng = np.random.default_rng(1)
+    R0 = np.column_stack((rng.uniform(1.2, 4.0, members), np.full(members, 2.0)))
+    return es.EnsembleSolver(R0=R0, CFR=0.001, recovery_time=[7, 8], infected=[150, 10], delay=[0, 2],
+                             death=0.0001, size=150000, birth_function=es.make_br(10.0, 0.001), time=70)
+
+
+def bench(members, fixed):
+    e = make_ensemble(members)
+    start = time.perf_counter()
+    if fixed:
+        e.solve_fixed(dt=0.1)
+    else:
+        e.solve()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'members':>8} {'adaptive (s)':>13} {'rk4 (s)':>10}")
+    for members in (10, 100, 1000, 10000):
+        print(f"{members:>8} {bench(members, False):>13.3f} {bench(members, True):>10.3f}")
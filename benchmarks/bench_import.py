@@ -0,0 +1,41 @@
+#
+# Import time of epistrains in a fresh interpreter.
+#
+# Run with ``python benchmarks/bench_import.py``. Compares importing
+# epistrains and solving a model, which must not load matplotlib, with
+# importing the plotting module.
+#
+import subprocess
+import sys
+
+SOLVE = ("import epistrains as es\n"
+         "p = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))\n"
+         "es.Solver(p, [es.Strain(0.001, 7, 3.0, 150)], time=70).solve()\n")
+
+CASES = {
+    'import epistrains': "import epistrains\n",
+    'import + solve': SOLVE,
+    'import plotting': "import epistrains.plotting\n",
+}
+
+
+def bench(code, repeat=5):
+    """Best wall time of running code in a new interpreter, and whether
+    matplotlib was imported"""
+    script = ("import time, sys\n"
+              "start = time.perf_counter()\n"
+              + code +
+              "print(time.perf_counter() - start, 'matplotlib' in sys.modules)\n")
+    best, loaded = float('inf'), None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        elapsed, loaded = out.stdout.split()
+        best = min(best, float(elapsed))
+    return best, loaded == 'True'
+
+
+if __name__ == '__main__':
+    print(f"{'case':>20} {'time (ms)':>10} {'matplotlib':>11}")
+    for name, code in CASES.items():
+        elapsed, loaded = bench(code)
+        print(f"{name:>20} {1e3*elapsed:>10.1f} {str(loaded):>11}")
@@ -0,0 +1,41 @@
+#
+# Benchmark for the right hand side of the Solver ODE system.
+#
+# Run with ``python benchmarks/bench_rhs.py``. The cost of a single RHS
+# evaluation should stay roughly flat as the number of strains grows. With
+# cross-immunity, a sparse matrix with a few interactions per strain should
+# stay far cheaper than the dense matrix as the number of strains grows.
+#
+import timeit
+import scipy.sparse
+import epistrains as es
+
+
+def make_solver(n_strains, cross_immunity=None):
+    """Build a solver with ``n_strains`` identical strains"""
+    pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))
+    strains = [es.Strain(0.001, 7, 3.0, 10) for _ in range(n_strains)]
+    return es.Solver(pop, strains, time=70, cross_immunity=cross_immunity)
+
+
+def banded_cross_immunity(n_strains, sparse):
+    """Full protection against the same strain and partial protection
+    against its two neighbours"""
+    sigma = scipy.sparse.diags([0.5, 1.0, 0.5], [-1, 0, 1], shape=(n_strains, n_strains))
+    return sigma.tocsr() if sparse else sigma.toarray()
+
+
+def bench_rhs(n_strains, cross_immunity=None, number=2000):
+    """Mean time in microseconds of one RHS evaluation"""
+    s = make_solver(n_strains, cross_immunity)
+    y = s._initial_state()
+    y[1:n_strains+1] = 10.0
+    total = min(timeit.repeat(lambda: s._rhs(y), number=number, repeat=5))
+    return 1e6*total/number
+
+
+if __name__ == '__main__':
+    print(f"{'strains':>8} {'rhs (us)':>10} {'sparse cross (us)':>18} {'dense cross (us)':>17}")
+    for n in (1, 10, 50, 100, 500, 1000):
+        print(f"{n:>8} {bench_rhs(n):>10.2f} {bench_rhs(n, banded_cross_immunity(n, True)):>18.2f} "
+              f"{bench_rhs(n, banded_cross_immunity(n, False), number=200):>17.2f}")
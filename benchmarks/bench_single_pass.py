@@ -0,0 +1,40 @@
+#
+# Compare choosing a new starting step after every strain delay with the
+# single pass mode of Solver, which reuses the last step size reached.
+#
+# Run with ``python benchmarks/bench_single_pass.py``.
+#
+import time
+import epistrains as es
+
+
+def make_solver(n_delays, single_pass):
+    """Model with one strain seeded on each of n_delays days"""
+    pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001), waning=0.01)
+    strains = [es.Strain(0.001, 7, 1.5 + 0.01*i, 10, delay=2*i) for i in range(n_delays)]
+    return es.Solver(pop, strains, time=2*n_delays + 30, single_pass=single_pass)
+
+
+def bench(n_delays, single_pass):
+    """Number of RHS evaluations and wall time of one solve"""
+    s = make_solver(n_delays, single_pass)
+    count = [0]
+    rhs = s._rhs
+
+    def counted_rhs(y):
+        count[0] += 1
+        return rhs(y)
+
+    s._rhs = counted_rhs
+    start = time.perf_counter()
+    s.solve()
+    return count[0], time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'delays':>7} {'mode':>12} {'rhs evals':>10} {'time (s)':>10}")
+    for n_delays in (1, 10, 50):
+        for single_pass in (False, True):
+            n_rhs, elapsed = bench(n_delays, single_pass)
+            mode = 'single pass' if single_pass else 'new step'
+            print(f"{n_delays:>7} {mode:>12} {n_rhs:>10} {elapsed:>10.3f}")
@@ -0,0 +1,44 @@
+#
+# Compare explicit and implicit integration of a stiff system.
+#
+# Run with ``python benchmarks/bench_stiff.py``. A strain that recovers in
+# minutes alongside a slow strain and waning immunity makes the system stiff,
+# so RK45 needs many more RHS evaluations than the implicit methods, which
+# use the analytic Jacobian of the Solver.
+#
+import time
+import epistrains as es
+
+
+def make_solver(method):
+    """Build a stiff two strain problem for the given method"""
+    pop = es.Population(0.0001, 150000, lambda N: 0.0001*N, waning=0.01)
+    strains = [es.Strain(0.001, 0.01, 1.5, 100), es.Strain(0.01, 10, 2.5, 10, delay=5)]
+    return es.Solver(pop, strains, time=200, method=method, rtol=1e-6, atol=1e-6)
+
+
+def bench(method):
+    """Return the number of RHS and Jacobian evaluations and the wall time"""
+    s = make_solver(method)
+    counts = {'rhs': 0, 'jac': 0}
+    rhs, jac = s._rhs, s._jac
+
+    def counted_rhs(y):
+        counts['rhs'] += 1
+        return rhs(y)
+
+    def counted_jac(y):
+        counts['jac'] += 1
+        return jac(y)
+
+    s._rhs, s._jac = counted_rhs, counted_jac
+    start = time.perf_counter()
+    s.solve()
+    return counts['rhs'], counts['jac'], time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'method':>8} {'rhs evals':>10} {'jac evals':>10} {'time (s)':>10}")
+    for method in ('RK45', 'BDF', 'Radau', 'LSODA'):
+        n_rhs, n_jac, elapsed = bench(method)
+        print(f"{method:>8} {n_rhs:>10} {n_jac:>10} {elapsed:>10.3f}")
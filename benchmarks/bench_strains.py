@@ -0,0 +1,52 @@
+#
+# Benchmark for making many strains and the Solver taking them.
+#
+# Run with ``python benchmarks/bench_strains.py``. A StrainTable should be
+# made and taken by Solver far faster than the same number of Strain
+# objects, and the Strain objects should use less memory than before they
+# had __slots__.
+#
+import sys
+import time
+import tracemalloc
+import numpy as np
+import epistrains as es
+
+
+def bench_list(n_strains):
+    """Seconds to make n_strains Strain objects and a Solver of them, and
+    peak memory in MiB"""
+    rng = np.random.default_rng(0)
+    CFR, R0 = rng.uniform(0, 0.01, n_strains).tolist(), rng.uniform(1, 3, n_strains).tolist()
+    tracemalloc.start()
+    began = time.perf_counter()
+    strains = [es.Strain(c, 7, r, 10) for c, r in zip(CFR, R0)]
+    es.Solver(es.Population(0.0001, 10**9, es.make_br(10.0, 0.001)), strains)
+    elapsed = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak/2**20
+
+
+def bench_table(n_strains):
+    """Seconds to make a StrainTable of n_strains and a Solver of it, and
+    peak memory in MiB"""
+    rng = np.random.default_rng(0)
+    CFR, R0 = rng.uniform(0, 0.01, n_strains), rng.uniform(1, 3, n_strains)
+    tracemalloc.start()
+    began = time.perf_counter()
+    table = es.StrainTable(CFR, 7, R0, 10)
+    es.Solver(es.Population(0.0001, 10**9, es.make_br(10.0, 0.001)), table)
+    elapsed = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak/2**20
+
+
+if __name__ == '__main__':
+    print(f"{'strains':>9} {'list (s)':>10} {'list (MiB)':>11} {'table (s)':>10} {'table (MiB)':>12}")
+    for n in (10**3, 10**4, 10**5, 10**6):
+        t_list, m_list = bench_list(n)
+        t_table, m_table = bench_table(n)
+        print(f"{n:>9} {t_list:>10.4f} {m_list:>11.1f} {t_table:>10.4f} {m_table:>12.1f}")
+    print(f"Strain object size: {sys.getsizeof(es.Strain(0.1, 7, 2.0, 10))} bytes")
@@ -0,0 +1,39 @@
+#
+# Scaling of the process pool parameter sweep.
+#
+# Run with ``python benchmarks/bench_sweep.py``. Prints the wall time and
+# speed-up over a single worker for increasing numbers of workers, up to
+# the number of CPUs on the machine.
+#
+import os
+import time
+import epistrains as es
+
+
+def make_grid(n_points):
+    """Grid of single population runs with varying R0 of the second strain"""
+    pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))
+    strains = [[es.Strain(0.001, 7, 3.0, 150), es.Strain(0.001, 8, 1.0 + 0.01*i, 10, delay=2)]
+               for i in range(n_points)]
+    return es.grid_product(pop=[pop], strains=strains, time=[70])
+
+
+def bench(grid, workers):
+    """Wall time to sweep the grid"""
+    start = time.perf_counter()
+    for _ in es.sweep(grid, workers=workers):
+        pass
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    grid = make_grid(256)
+    cpus = os.cpu_count() or 1
+    serial = bench(grid, 1)
+    print(f"{'workers':>8} {'time (s)':>10} {'speed-up':>10}")
+    print(f"{1:>8} {serial:>10.2f} {1.0:>10.2f}")
+    workers = 2
+    while workers <= cpus:
+        elapsed = bench(grid, workers)
+        print(f"{workers:>8} {elapsed:>10.2f} {serial/elapsed:>10.2f}")
+        workers *= 2
@@ -0,0 +1,138 @@
+#
+# Benchmark suite for Solver.solve and EnsembleSolver.solve, measuring the
+# solve time, number of RHS evaluations and peak memory as functions of the
+# number of strains, the time horizon, the number of delays and the
+# ensemble size.
+#
+# Run with ``python benchmarks/suite.py`` to compare against the stored
+# baseline in benchmarks/baseline.json, which exits with status 1 when any
+# measure is worse than the baseline by more than the threshold (set with
+# ``--threshold`` for the solve time). Use ``--save`` to store the current
+# results as the new baseline, and ``--filter`` to only run the cases whose
+# name contains a string.
+#
+# Solve times depend on the machine, so the baseline should be saved on
+# the machine the comparisons are made on before making a change. RHS
+# evaluations and memory are comparable across machines.
+#
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import epistrains as es
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# ratio to the baseline above which RHS evaluations and memory are
+# regressions; they are deterministic, unlike the solve time
+COUNT_THRESHOLD = 1.1
+
+# smallest change of each measure counted as a regression, so that timer
+# noise on the fastest cases is ignored
+MIN_CHANGE = {'time': 1e-3, 'rhs_evals': 0, 'peak_memory': 2**16}
+
+
+def make_solver(strains=2, time=70, delays=0):
+    """Model with the given number of strains, with the first delays of
+    them seeded on consecutive days"""
+    pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))
+    return es.Solver(pop, [es.Strain(0.001, 7, 1.5 + 0.01*(j % 100), 10, delay=j if j < delays else 0.0)
+                           for j in range(strains)], time=time)
+
+
+def make_ensemble(members):
+    """Ensemble of two strain models with the R0 of the first strain varied"""
+    R0 = [[1.5 + 2.0*k/members, 2.0] for k in range(members)]
+    return es.EnsembleSolver(R0=R0, CFR=0.001, recovery_time=[7, 8], infected=[150, 10], delay=[0, 2],
+                             death=0.0001, size=150000, birth_function=es.make_br(10.0, 0.001), time=70)
+
+
+# benchmark name and function making the model to solve
+CASES = (
+    [(f'strains_{n}', lambda n=n: make_solver(strains=n)) for n in (1, 10, 100, 1000)] +
+    [(f'horizon_{t}', lambda t=t: make_solver(time=t)) for t in (10, 70, 365, 1000)] +
+    [(f'delays_{d}', lambda d=d: make_solver(strains=d, time=d + 30, delays=d)) for d in (1, 10, 50)] +
+    [(f'ensemble_{m}', lambda m=m: make_ensemble(m)) for m in (1, 10, 100, 1000)]
+)
+
+
+def measure(make, repeat=5):
+    """Best mean solve time in seconds over repeat rounds of at least 0.2
+    seconds each, number of RHS evaluations and peak memory in bytes
+    allocated during one solve"""
+    timer = timeit.Timer(make().solve)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat, number))/number
+
+    model = make()
+    count = [0]
+    rhs = model._rhs
+
+    def counted_rhs(y):
+        count[0] += 1
+        return rhs(y)
+
+    model._rhs = counted_rhs
+    tracemalloc.start()
+    model.solve()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': best, 'rhs_evals': count[0], 'peak_memory': peak}
+
+
+def compare(results, baseline, threshold):
+    """Names and measures of the results worse than the baseline by more
+    than the threshold ratio for the time, or COUNT_THRESHOLD for the other
+    measures, and by more than MIN_CHANGE"""
+    regressions = []
+    for name, result in results.items():
+        for measure_name, value in result.items():
+            reference = baseline.get(name, {}).get(measure_name)
+            ratio = threshold if measure_name == 'time' else COUNT_THRESHOLD
+            if reference and value > ratio*reference and value - reference > MIN_CHANGE[measure_name]:
+                regressions.append((name, measure_name, reference, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the epistrains benchmark suite')
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--baseline', default=BASELINE, help='path of the baseline file')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='ratio to the baseline above which the solve time is a regression')
+    parser.add_argument('--filter', default='', help='only run the cases whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timing rounds per case')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'case':>16} {'time (s)':>10} {'baseline':>10} {'rhs evals':>10} {'peak (MiB)':>11}")
+    for name, make in CASES:
+        if args.filter not in name:
+            continue
+        results[name] = measure(make, args.repeat)
+        reference = baseline.get(name, {}).get('time', float('nan'))
+        print(f"{name:>16} {results[name]['time']:>10.4f} {reference:>10.4f} {results[name]['rhs_evals']:>10} "
+              f"{results[name]['peak_memory']/2**20:>11.2f}")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, measure_name, reference, value in regressions:
+        print(f"Regression in {name} {measure_name}: {reference:.6g} -> {value:.6g}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,16 @@
 from .version_info import VERSION_INT, VERSION  # noqa
 
 # Import main classes
-from .population import Population, make_br  # noqa
-from .strain import Strain          # noqa
+from .population import Population, make_br, ConstantBirth, ExponentialBirth, LogisticBirth  # noqa
+from .strain import Strain, StrainTable  # noqa
 from .solver import Solver          # noqa
+from .ensemble import EnsembleSolver  # noqa
+from .parallel import sweep, grid_product  # noqa
+from .summary import Summary        # noqa
+from .cache import SolutionCache    # noqa
+from .stochastic import StochasticSolver  # noqa
+from .fitting import DeathsFit      # noqa
+from .metapopulation import MetapopulationSolver  # noqa
+from .asynchronous import AsyncRunner, solve_async  # noqa
+from .equilibrium import Equilibrium, equilibria, final_size  # noqa
+from .checkpoint import Checkpoint  # noqa
@@ -0,0 +1,220 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class _Cancelled(Exception):
+    """Raised inside a run to stop it once its request is cancelled"""
+
+
+class _Canceller:
+    """Step hook stopping a run when its request is cancelled or its time
+    runs out
+
+    :param event: event set when the request is cancelled
+    :type event: threading.Event or a multiprocessing.Manager Event
+    :param timeout: seconds the run may take from its start, or None
+    :type timeout: float
+    :param interval: smallest number of seconds between two checks of the
+        event, which costs a round trip to the manager for processes
+    :type interval: float
+    """
+
+    def __init__(self, event, timeout, interval):
+        self.event = event
+        self.timeout = timeout
+        self.interval = interval
+        self.deadline = None
+        self._next_check = 0.0
+
+    def start(self):
+        """Start the clock of the timeout, in the worker running the model"""
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def __call__(self, t):
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            raise TimeoutError(f"Solve timed out after {self.timeout:.3g} s, at t={t:.3g}")
+        if now >= self._next_check:
+            self._next_check = now + self.interval
+            if self.event.is_set():
+                raise _Cancelled(f"Solve cancelled at t={t:.3g}")
+
+
+def _solve(solver, canceller):
+    """Solve a model in a worker, checking for cancellation after each step
+    of the integrator alongside any step hook of the model
+
+    :returns: the solved model
+    :rtype: Solver
+    """
+    step_hook = solver.step_hook
+
+    def checked(t):
+        canceller(t)
+        if step_hook is not None:
+            step_hook(t)
+
+    canceller.start()
+    solver.step_hook = checked
+    try:
+        solver.solve()
+    finally:
+        # the model is sent back from worker processes, which needs the
+        # hook to be picklable again
+        solver.step_hook = step_hook
+    return solver
+
+
+class AsyncRunner:
+    """Solve models from asyncio code without blocking the event loop
+
+    Each run is integrated in a thread or process executor, while the
+    coroutine awaiting it stays responsive. At most max_concurrency runs
+    are in flight at once, and further requests wait their turn in order.
+    Cancelling the awaiting task, or exceeding its timeout, stops the run
+    after the current step of the integrator rather than at its end, so
+    the worker is freed for the next request.
+
+    Threads share the models with the caller, but only run in parallel
+    while numpy and scipy release the GIL. Processes run fully in parallel,
+    but the models are pickled to and from the workers, so, as for sweep,
+    their birth functions must be picklable, and the solved model returned
+    is a copy.
+
+    :param executor: 'thread' or 'process' to create a pool of that kind,
+        or an existing concurrent.futures executor, which is not shut down
+        with the runner, defaults to 'thread'
+    :type executor: string or concurrent.futures.Executor, optional
+    :param workers: number of workers of a created pool, defaults to the
+        number of CPUs
+    :type workers: int, optional
+    :param max_concurrency: largest number of runs in flight at once,
+        defaults to the number of workers
+    :type max_concurrency: int, optional
+    :param check_interval: smallest number of seconds between two checks
+        for cancellation within a run, defaults to 0.05
+    :type check_interval: float, optional
+    """
+
+    def __init__(self, executor='thread', workers=None, max_concurrency=None, check_interval=0.05):
+        """Initialize the class and create the executor"""
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("Number of workers must be positive")
+        if executor == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        elif executor == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        elif isinstance(executor, str):
+            raise ValueError("Executor must be 'thread', 'process' or an executor")
+        else:
+            self.executor = executor
+            workers = getattr(executor, '_max_workers', workers)
+        self._owns_executor = isinstance(executor, str)
+        if max_concurrency is None:
+            max_concurrency = workers
+        if max_concurrency < 1:
+            raise ValueError("Maximum concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.check_interval = check_interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # cancellation events of runs in other processes go through a
+        # manager, which is only started when first needed
+        self._processes = isinstance(self.executor, ProcessPoolExecutor)
+        self._manager = None
+
+    def _event(self):
+        """Cancellation event shared with the worker running a model"""
+        if not self._processes:
+            return threading.Event()
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager.Event()
+
+    async def solve(self, solver, timeout=None):
+        """Solve a model in the executor
+
+        :param solver: model to be solved
+        :type solver: Solver
+        :param timeout: seconds allowed for the request, including the time
+            waiting for a free slot, defaults to no limit
+        :type timeout: float, optional
+        :returns: the solved model
+        :rtype: Solver
+        :raises TimeoutError: when the run takes longer than the timeout
+        """
+        began = time.monotonic()
+        async with self._semaphore:
+            remaining = None
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - began)
+                if remaining <= 0:
+                    raise TimeoutError(f"Solve timed out after {timeout:.3g} s waiting for a free slot")
+            canceller = _Canceller(self._event(), remaining, self.check_interval)
+            future = asyncio.wrap_future(self.executor.submit(_solve, solver, canceller))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                canceller.event.set()
+                # keep the slot until the run has stopped, so that the
+                # concurrency bound holds
+                await asyncio.wait([future])
+                raise
+
+    async def solve_all(self, solvers, timeout=None):
+        """Solve several models concurrently, within the concurrency bound
+
+        :param solvers: models to be solved
+        :type solvers: iterable of Solver
+        :param timeout: seconds allowed for each model, defaults to no limit
+        :type timeout: float, optional
+        :returns: the solved models, in the given order
+        :rtype: list
+        """
+        return list(await asyncio.gather(*(self.solve(solver, timeout) for solver in solvers)))
+
+    def shutdown(self, wait=True):
+        """Shut down the executor if it was created by the runner, and the
+        manager of the cancellation events
+
+        :param wait: wait for the running models to finish, defaults to True
+        :type wait: bool, optional
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+async def solve_async(solver, timeout=None):
+    """Solve a model in the default executor of the running event loop,
+    stopping the run when the awaiting task is cancelled or the timeout
+    is exceeded, see AsyncRunner for bounding the concurrency
+
+    :param solver: model to be solved
+    :type solver: Solver
+    :param timeout: seconds allowed for the run, defaults to no limit
+    :type timeout: float, optional
+    :returns: the solved model
+    :rtype: Solver
+    """
+    canceller = _Canceller(threading.Event(), timeout, 0.0)
+    future = asyncio.get_running_loop().run_in_executor(None, _solve, solver, canceller)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        canceller.event.set()
+        raise
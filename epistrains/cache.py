@@ -0,0 +1,301 @@
+import collections
+import functools
+import hashlib
+import os
+import time
+import types
+import numpy as np
+import scipy.sparse
+from epistrains.solver import Solution
+from epistrains.stats import SolverStats
+
+
+class _Unkeyable(Exception):
+    """Raised when part of a model cannot be described by its contents"""
+
+
+def _value_fingerprint(value, seen):
+    """Stable description of a value held by a birth function, such as a
+    global it reads, a closure cell, a bound argument or the state of the
+    object it is a method of. Arrays are described by their bytes, since
+    their repr leaves out the middle of large arrays
+
+    :param value: the value
+    :param seen: ids of the values already being described, so that
+        cycles end
+    :type seen: set
+    :raises _Unkeyable: for values only described by their identity
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, np.generic)):
+        return (type(value).__name__, repr(value))
+    if isinstance(value, np.ndarray):
+        return ('array', value.dtype.str, value.shape, np.ascontiguousarray(value).tobytes())
+    if isinstance(value, types.ModuleType):
+        return ('module', value.__name__)
+    if isinstance(value, type):
+        return ('type', value.__module__, value.__qualname__)
+    if id(value) in seen:
+        return ('cycle', type(value).__qualname__)
+    seen.add(id(value))
+    if isinstance(value, (tuple, list, set, frozenset)):
+        items = [_value_fingerprint(item, seen) for item in value]
+        return (type(value).__name__, tuple(sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items))
+    if isinstance(value, dict):
+        return _mapping_fingerprint(value, seen)
+    if callable(value):
+        return _function_fingerprint(value, seen)
+    return _object_fingerprint(value, seen)
+
+
+def _object_fingerprint(obj, seen):
+    """Stable description of an object from its type and attributes
+
+    :raises _Unkeyable: for objects without attributes to describe them
+    """
+    if hasattr(obj, '__dict__'):
+        state = vars(obj)
+    else:
+        names = [name for cls in type(obj).__mro__ for name in getattr(cls, '__slots__', ())]
+        if not names:
+            raise _Unkeyable(f"Cannot describe {type(obj).__qualname__} objects by their contents")
+        state = {name: getattr(obj, name) for name in names if hasattr(obj, name)}
+    return ('object', type(obj).__module__, type(obj).__qualname__, _mapping_fingerprint(state, seen))
+
+
+def _mapping_fingerprint(mapping, seen):
+    """Stable description of a dict, whatever the order of its items"""
+    return ('dict', tuple(sorted((repr(key), _value_fingerprint(value, seen)) for key, value in mapping.items())))
+
+
+def _code_fingerprint(code):
+    """Stable description of a code object, including those of the
+    functions defined within it"""
+    consts = tuple(_code_fingerprint(const) if isinstance(const, types.CodeType) else repr(const)
+                   for const in code.co_consts)
+    return (code.co_code, consts, code.co_names)
+
+
+def _function_fingerprint(func, seen=None):
+    """Stable description of a birth function, built from its code and
+    parameters rather than its identity. For plain functions this includes
+    the values of the globals they read, and for bound methods the state of
+    their object, so functions with the same code reading different values
+    get different keys
+
+    :param func: birth function
+    :type func: function
+    :param seen: ids of the values already being described, defaults to None
+    :type seen: set, optional
+    :raises _Unkeyable: when the state of the function cannot be described
+    """
+    if func is None:
+        return None
+    seen = set() if seen is None else seen
+    seen.add(id(func))
+    if isinstance(func, types.MethodType):
+        return ('method', _value_fingerprint(func.__func__, seen), _value_fingerprint(func.__self__, seen))
+    if isinstance(func, functools.partial):
+        return ('partial', _value_fingerprint(func.func, seen), _value_fingerprint(func.args, seen),
+                _value_fingerprint(func.keywords, seen))
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        try:
+            closure = tuple(_value_fingerprint(cell.cell_contents, seen) for cell in func.__closure__ or ())
+        except ValueError:
+            raise _Unkeyable("Cannot describe functions with empty closure cells") from None
+        namespace = getattr(func, '__globals__', {})
+        global_values = tuple((name, _value_fingerprint(namespace[name], seen))
+                              for name in code.co_names if name in namespace)
+        return ('function', func.__module__, func.__qualname__, _code_fingerprint(code), global_values,
+                closure, _value_fingerprint(func.__defaults__, seen))
+    if isinstance(func, (types.BuiltinFunctionType, np.ufunc)):
+        return ('builtin', getattr(func, '__module__', None), getattr(func, '__qualname__', func.__name__))
+    # callable objects are described by their type and attributes
+    return _object_fingerprint(func, seen)
+
+
+def solver_key(solver):
+    """Stable hash of everything that determines the result of solving
+
+    :param solver: model to be solved
+    :type solver: Solver
+    :returns: hexadecimal SHA-256 digest, or None when the birth function
+        holds state which cannot be described by its contents, so the model
+        must not be cached
+    :rtype: string
+    """
+    pop = solver.pop
+    try:
+        birth = _function_fingerprint(pop.birth_rate)
+    except _Unkeyable:
+        return None
+    t_eval = None if solver.t_eval is None else solver.t_eval.tobytes()
+    cross_immunity = solver.cross_immunity
+    if cross_immunity is not None:
+        # dense and sparse forms of the same matrix share a key
+        cross_immunity = scipy.sparse.csr_matrix(cross_immunity, copy=True)
+        cross_immunity.eliminate_zeros()
+        cross_immunity.sort_indices()
+        cross_immunity = (cross_immunity.data.tobytes(), cross_immunity.indices.tobytes(),
+                          cross_immunity.indptr.tobytes())
+    description = (
+        (pop.death_rate, pop.init_size, pop.waning_rate, pop.current_immune, birth),
+        # the strain columns, the same for a list of strains or a StrainTable
+        tuple(column.tobytes() for column in (solver._table.nu, solver._table.alpha, solver._table.beta_unscaled,
+                                              solver._table.infected, solver._table.delay)),
+        (solver.time, solver.method, solver.rtol, solver.atol, np.dtype(solver.dtype).str, solver.single_pass,
+         solver.resolution, t_eval, solver.dense_output),
+        cross_immunity,
+    )
+    return hashlib.sha256(repr(description).encode()).hexdigest()
+
+
+def _entry_nbytes(entry):
+    """Size of the arrays of a cache entry, including those held by the
+    interpolants of its continuous solution"""
+    size = sum(entry[name].nbytes for name in SolutionCache.ARRAYS)
+    for dense in entry['dense'][1]:
+        size += dense.ts.nbytes
+        for interpolant in dense.interpolants:
+            size += sum(value.nbytes for value in vars(interpolant).values() if isinstance(value, np.ndarray))
+    return size
+
+
+class SolutionCache:
+    """Cache of solved models keyed by a hash of their parameters, with an
+    in-memory tier evicting the least recently used entries beyond a byte
+    budget, and an optional on-disk tier of .npz files
+
+    Continuous solutions (dense output) are only kept in memory, so a
+    solver with dense_output=True cannot be served from disk. Models whose
+    birth function holds state that cannot be described by its contents,
+    see solver_key, are solved without being cached. Solvers served from
+    the cache can make checkpoints as if they had been solved, and their
+    stats record no integration.
+
+    :param max_bytes: maximum size of the arrays held in memory, including
+        those of the continuous solutions, defaults to 256 MiB
+    :type max_bytes: int, optional
+    :param directory: directory of the on-disk tier, created if needed,
+        defaults to None for no disk tier
+    :type directory: string, optional
+    """
+
+    # arrays of a solved model stored in each entry
+    ARRAYS = ('t', 'state', 'deaths', 'daily_cumulative_deaths', 'daily_deaths', 'daily_deaths_by_strain',
+              'final_state', 'seeded', 'day_edges', 'deaths_at_edges')
+
+    def __init__(self, max_bytes=2**28, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit and miss counts and memory use of the cache
+
+        :rtype: dict
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self._entries), 'bytes': self.bytes}
+
+    def clear(self):
+        """Empty the in-memory tier, keeping the files on disk"""
+        self._entries.clear()
+        self.bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _store(self, key, entry):
+        """Add an entry to the in-memory tier and evict the least recently
+        used entries beyond the byte budget"""
+        size = _entry_nbytes(entry)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= _entry_nbytes(old)
+            self.evictions += 1
+
+    def _lookup(self, key, dense):
+        """Find an entry in memory, then on disk"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.directory is not None and not dense and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                # files written by older versions are solved again
+                if not set(self.ARRAYS) <= set(data.files):
+                    return None
+                entry = {name: data[name] for name in self.ARRAYS}
+            entry['dense'] = ([], [])
+            self._store(key, entry)
+            self.disk_hits += 1
+            return entry
+        return None
+
+    def solve(self, solver):
+        """Solve the model, or fill in its results from the cache without
+        integrating
+
+        :param solver: model to be solved
+        :type solver: Solver
+        :returns: whether the result came from the cache
+        :rtype: bool
+        """
+        began = time.perf_counter()
+        key = solver_key(solver)
+        if key is None:
+            # models which cannot be told apart by their contents are
+            # always solved
+            self.misses += 1
+            solver.solve()
+            return False
+        entry = self._lookup(key, solver.dense_output)
+        if entry is None:
+            self.misses += 1
+            solver.solve()
+            sol = solver.solution
+            entry = {'t': sol.t.copy(), 'state': sol.state.copy(), 'deaths': solver.deaths.copy(),
+                     'daily_cumulative_deaths': solver.daily_cumulative_deaths.copy(),
+                     'daily_deaths': solver.daily_deaths.copy(),
+                     'daily_deaths_by_strain': solver.daily_deaths_by_strain.copy(),
+                     'final_state': solver._final_state.copy(), 'seeded': solver._seeded.copy(),
+                     'day_edges': solver._deaths_at_edges[0].copy(),
+                     'deaths_at_edges': solver._deaths_at_edges[1].copy(),
+                     'dense': (list(sol._dense_starts), list(sol._dense))}
+            self._store(key, entry)
+            if self.directory is not None:
+                np.savez(self._path(key), **{name: entry[name] for name in self.ARRAYS})
+            return False
+
+        sol = Solution(solver.n + 2, len(entry['t']), solver.dtype, n_strains=solver.n,
+                       n_recovered=solver._n_recovered)
+        sol.append(entry['t'], entry['state'])
+        for start, dense in zip(*entry['dense']):
+            sol.add_dense(start, dense)
+        solver.solution = sol
+        for name in ('deaths', 'daily_cumulative_deaths', 'daily_deaths', 'daily_deaths_by_strain'):
+            setattr(solver, name, entry[name].copy())
+        # what is needed to continue the run, see Solver.checkpoint
+        solver._final_state = entry['final_state'].copy()
+        solver._seeded = entry['seeded'].copy()
+        solver._deaths_at_edges = (entry['day_edges'].copy(), entry['deaths_at_edges'].copy())
+        # no segment was integrated
+        solver.stats = SolverStats()
+        solver.stats.total_time = time.perf_counter() - began
+        return True
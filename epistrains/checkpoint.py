@@ -0,0 +1,119 @@
+import json
+import numpy as np
+
+
+class Checkpoint:
+    """State of a solved run at its end, from which later runs continue
+    with Solver.solve(resume=checkpoint) rather than starting again from
+    time 0, as made by Solver.checkpoint
+
+    A checkpoint made in memory also keeps the population, strains and
+    solution of its run, so the resumed runs default to them and their
+    solutions start with the history before the checkpoint. Checkpoints
+    written with save hold only arrays, so the population and strains must
+    be given again when resuming one read with load.
+
+    :param time: time of the checkpoint, the end of its run
+    :type time: float
+    :param state: full state of the model at that time
+    :type state: numpy.ndarray
+    :param seeded: whether each strain has been seeded by that time
+    :type seeded: numpy.ndarray
+    :param day_edges: day edges of the run up to the checkpoint
+    :type day_edges: numpy.ndarray
+    :param deaths_at_edges: cumulative deaths of each strain at those edges
+    :type deaths_at_edges: numpy.ndarray
+    :param settings: Solver settings of the run, used by default when
+        branching
+    :type settings: dict
+    :param solution: solution of the run, defaults to None
+    :type solution: Solution, optional
+    :param pop: population of the run, defaults to None
+    :type pop: Population, optional
+    :param strains: strains of the run, defaults to None
+    :type strains: List or StrainTable, optional
+    :param cross_immunity: cross-immunity matrix of the run, defaults to None
+    :type cross_immunity: array_like or scipy.sparse matrix, optional
+    """
+
+    # Solver settings recorded in a checkpoint
+    SETTINGS = ('method', 'rtol', 'atol', 'resolution', 'single_pass')
+
+    def __init__(self, time, state, seeded, day_edges, deaths_at_edges, settings, solution=None, pop=None,
+                 strains=None, cross_immunity=None):
+        self.time = time
+        self.state = state
+        self.seeded = seeded
+        self.day_edges = day_edges
+        self.deaths_at_edges = deaths_at_edges
+        self.settings = settings
+        self.solution = solution
+        self.pop = pop
+        self.strains = strains
+        self.cross_immunity = cross_immunity
+
+    def branch(self, variants, **common):
+        """Continue the run in several what-if futures, integrating the
+        shared history before the checkpoint only once
+
+        :param variants: Solver keyword arguments of each future, such as
+            new strains or a later time; the others are taken from common,
+            then from the run of the checkpoint
+        :type variants: list of dict
+        :param common: Solver keyword arguments shared by every future
+        :returns: the solved model of each future
+        :rtype: List
+        """
+        from epistrains.solver import Solver
+        solvers = []
+        for variant in variants:
+            kwargs = dict(self.settings, pop=self.pop, strains=self.strains, cross_immunity=self.cross_immunity)
+            kwargs.update(common)
+            kwargs.update(variant)
+            if kwargs['pop'] is None or kwargs['strains'] is None:
+                raise ValueError("Population and strains must be given to branch from a loaded checkpoint")
+            if 'time' not in kwargs:
+                raise ValueError("Each branch must give the time of its end")
+            solver = Solver(**kwargs)
+            solver.solve(resume=self)
+            solvers.append(solver)
+        return solvers
+
+    def save(self, path):
+        """Write the checkpoint to a .npz file of plain arrays, without the
+        population and strains, which are not stored
+
+        :param path: path of the file
+        :type path: string
+        """
+        arrays = {'time': np.array(self.time), 'state': self.state, 'seeded': self.seeded,
+                  'day_edges': self.day_edges, 'deaths_at_edges': self.deaths_at_edges,
+                  'settings': np.array(json.dumps(self.settings))}
+        if self.solution is not None:
+            arrays['solution_t'] = self.solution.t
+            arrays['solution_state'] = self.solution.state
+            arrays['solution_layout'] = np.array([self.solution.y.shape[0], self.solution.cumulative_deaths.shape[0],
+                                                  self.solution.recovered_by_strain.shape[0]])
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a checkpoint written by save
+
+        :param path: path of the file
+        :type path: string
+        :rtype: Checkpoint
+        """
+        from epistrains.solver import Solution
+        with np.load(path, allow_pickle=False) as data:
+            solution = None
+            if 'solution_t' in data.files:
+                n_comps, n_strains, n_recovered = data['solution_layout'].tolist()
+                solution = Solution(n_comps, len(data['solution_t']), data['solution_state'].dtype,
+                                    n_strains=n_strains, n_recovered=n_recovered)
+                solution.append(data['solution_t'], data['solution_state'])
+            return cls(data['time'].item(), data['state'], data['seeded'], data['day_edges'],
+                       data['deaths_at_edges'], json.loads(data['settings'].item()), solution)
+
+    def __repr__(self):
+        return f"Checkpoint(time={self.time!r}, seeded={int(self.seeded.sum())}/{len(self.seeded)})"
@@ -0,0 +1,44 @@
+import argparse
+import sys
+import time
+from epistrains.scenarios import load_scenario_file, expand_runs, run_scenarios, write_columns
+
+
+def main(argv=None):
+    """Entry point of the epistrains command, which solves every run of a
+    scenario file in parallel and writes the results to a .npz file, see
+    scenarios.run_scenarios for its columns
+
+    :param argv: command line arguments, defaults to sys.argv[1:]
+    :type argv: list, optional
+    :returns: exit status
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(prog='epistrains',
+                                     description='Solve the scenarios of a JSON or TOML scenario file')
+    parser.add_argument('scenarios', help='path of the scenario file, .json or .toml')
+    parser.add_argument('-o', '--output', default='epistrains_results.npz', help='path of the .npz results file')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('--dry-run', action='store_true', help='list the runs without solving them')
+    args = parser.parse_args(argv)
+
+    try:
+        description = load_scenario_file(args.scenarios)
+        if args.dry_run:
+            for index, (name, values, _, _) in enumerate(expand_runs(description)):
+                print(index, name, ' '.join(f'{path}={value}' for path, value in values.items()))
+            return 0
+        began = time.perf_counter()
+        columns = run_scenarios(description, workers=args.workers)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"epistrains: error: {e}", file=sys.stderr)
+        return 1
+    write_columns(args.output, columns)
+    print(f"Solved {len(columns['runs.scenario'])} runs in {time.perf_counter() - began:.2f} s, "
+          f"wrote {len(columns['t'])} rows to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
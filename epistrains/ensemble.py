@@ -0,0 +1,406 @@
+import warnings
+import numpy as np
+import scipy.integrate
+import scipy.sparse
+from epistrains.fixed_step import integrate_fixed, step_grid
+from epistrains.population import birth_rates
+from epistrains.solver import Solution, count_virus_deaths, day_edges, integrate_stepped, pause_times, segment_grids
+from epistrains.summary import Summary
+
+
+def _as_numeric_array(value, name, ndim):
+    """Convert a parameter to a float array with at least ndim dimensions
+
+    :param value: scalar or array of parameter values
+    :type value: float, int or array_like
+    :param name: name of the parameter used in error messages
+    :type name: string
+    :param ndim: minimum number of dimensions of the returned array
+    :type ndim: int
+    """
+    array = np.asarray(value)
+    if not (np.issubdtype(array.dtype, np.integer) or np.issubdtype(array.dtype, np.floating)):
+        raise TypeError(f"{name} should be numeric")
+    array = array.astype(float)
+    while array.ndim < ndim:
+        array = array[np.newaxis]
+    return array
+
+
+class EnsembleSolver:
+    """Solve many parameter sets of the multi-strain model at once by
+    stacking all members into a single ODE system
+
+    Strain parameters are broadcast to shape (members, strains), so a 1-D
+    array gives every member the same value for each strain. Population
+    parameters are broadcast to shape (members,).
+
+    :param R0: R0 value of each strain
+    :type R0: array_like
+    :param CFR: case fatality rate of each strain
+    :type CFR: array_like
+    :param recovery_time: average number of days to recover from each strain
+    :type recovery_time: array_like
+    :param infected: initial number of people infected with each strain
+    :type infected: array_like
+    :param death: constant death rate of each member
+    :type death: float or array_like
+    :param size: initial population size of each member
+    :type size: int or array_like
+    :param birth_function: function to govern birth rate, shared by all members
+    :type birth_function: function
+    :param delay: day at which each strain is introduced, defaults to 0
+    :type delay: array_like, optional
+    :param waning: constant waning immunity rate of each member, defaults to 0
+    :type waning: float or array_like, optional
+    :param immunity: percentage of population currently immune, defaults to 0
+    :type immunity: float or array_like, optional
+    :param time: days over which the system should be solved for,
+        defaults to 1
+    :type time: float or integer, optional
+    :param method: integration method passed to scipy.integrate.solve_ivp,
+        defaults to 'RK45'
+    :type method: string, optional
+    :param rtol: relative tolerance of the integrator, defaults to 1e-3
+    :type rtol: float, optional
+    :param atol: absolute tolerance of the integrator, defaults to 1e-6
+    :type atol: float, optional
+    :param dtype: data type used to store the solution, defaults to
+        numpy.float64
+    :type dtype: numpy.dtype, optional
+    """
+
+    # methods which make use of the Jacobian sparsity pattern
+    IMPLICIT_METHODS = ('BDF', 'Radau')
+
+    def __init__(self, R0, CFR, recovery_time, infected, death, size, birth_function, delay=0.0,
+                 waning=0.0, immunity=0.0, time=1, method='RK45', rtol=1e-3, atol=1e-6,
+                 dtype=np.float64):
+        """Initialize the class and broadcast the member parameters"""
+        strain_params = [_as_numeric_array(R0, "R0", 2),
+                         _as_numeric_array(CFR, "Case fatality rate", 2),
+                         _as_numeric_array(recovery_time, "Recovery time", 2),
+                         _as_numeric_array(infected, "Number of infected", 2),
+                         _as_numeric_array(delay, "Delay", 2)]
+        pop_params = [_as_numeric_array(death, "Death rate", 1),
+                      _as_numeric_array(size, "Population size", 1),
+                      _as_numeric_array(waning, "Waning immunity rate", 1),
+                      _as_numeric_array(immunity, "Immunity levels", 1)]
+        if any(p.ndim > 2 for p in strain_params) or any(p.ndim > 1 for p in pop_params):
+            raise ValueError("Strain parameters must be at most 2-D and population parameters at most 1-D")
+        try:
+            shape = np.broadcast_shapes(*(p.shape for p in strain_params),
+                                        *((len(p), 1) for p in pop_params))
+        except ValueError:
+            raise ValueError("Parameter shapes cannot be broadcast to (members, strains)")
+
+        # number of members and strains
+        self.m, self.n = shape
+        if self.n == 0:
+            raise ValueError('Number of strains must be positive')
+        R0, CFR, recovery_time, self.infected, self.delay = (np.broadcast_to(p, shape) for p in strain_params)
+        death, size, waning, immunity = (np.broadcast_to(p, (self.m,)) for p in pop_params)
+
+        self.time = round(time, 2)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.dtype = dtype
+        self.solution = None
+        self.deaths = None
+        self.daily_cumulative_deaths = None
+        self.daily_deaths = None
+        self.daily_deaths_by_strain = None
+        self.summary = None
+
+        # strain rates, as calculated by Strain
+        self.nu = 1/recovery_time
+        self.alpha = CFR*self.nu
+        beta_unscaled = R0*(self.alpha + self.nu)
+        # population parameters, as calculated by Population and Solver
+        self.b = death
+        self.w = waning
+        self.recovered = (immunity/100)*size
+        self.n_sus = size - self.infected.sum(axis=1) - self.recovered
+        self.beta_scaled = beta_unscaled/self.n_sus[:, np.newaxis]
+        self.func_birth = birth_function
+        # total rate at which individuals leave each infected compartment
+        self._removal = self.b[:, np.newaxis] + self.nu + self.alpha
+
+    @classmethod
+    def from_solvers(cls, solvers, **kwargs):
+        """Batch the configurations of several Solvers with the same number
+        of strains, time horizon and birth function into one ensemble
+
+        :param solvers: models to batch, one member each
+        :type solvers: list
+        :param kwargs: other EnsembleSolver arguments, such as method
+        :returns: the ensemble
+        :rtype: EnsembleSolver
+        """
+        first = solvers[0]
+        for solver in solvers[1:]:
+            if solver.n != first.n or solver.time != first.time:
+                raise ValueError("Solvers must have the same number of strains and time horizon")
+            if solver.func_birth is not first.func_birth and repr(solver.func_birth) != repr(first.func_birth):
+                raise ValueError("Solvers must share the same birth function")
+        nu = np.array([[strain.nu for strain in s.strains] for s in solvers])
+        alpha = np.array([[strain.alpha for strain in s.strains] for s in solvers])
+        beta = np.array([[strain.beta_unscaled for strain in s.strains] for s in solvers])
+        return cls(R0=beta/(alpha + nu), CFR=alpha/nu, recovery_time=1/nu,
+                   infected=[[strain.infected for strain in s.strains] for s in solvers],
+                   delay=[[strain.delay for strain in s.strains] for s in solvers],
+                   death=[s.pop.death_rate for s in solvers], size=[s.pop.init_size for s in solvers],
+                   birth_function=first.func_birth, waning=[s.pop.waning_rate for s in solvers],
+                   immunity=[100*s.pop.current_immune/s.pop.init_size for s in solvers], time=first.time, **kwargs)
+
+    def _birth(self, N):
+        """Birth rate of every member
+
+        :param N: current population size of each member
+        :type N: numpy.ndarray
+        """
+        return birth_rates(self.func_birth, N)
+
+    def _infectious(self, infected):
+        """Number infected with each strain whom the susceptibles of each
+        member are in contact with, which for independent members is
+        their own number infected
+
+        :param infected: (members, strains) array of the number infected
+        :type infected: numpy.ndarray
+        """
+        return infected
+
+    def _rhs(self, y):
+        """Right hand equations of all members, stacked in one vector
+
+        :param y: flattened (members, state) array, where the state of each
+            member holds S, each I_j, R, then the cumulative deaths and
+            infections of each strain as in Solver
+        :type y: numpy.ndarray
+        """
+        n = self.n
+        Y = y.reshape(self.m, 3*n + 2)
+        S = Y[:, 0]
+        infected = Y[:, 1:n+1]
+        R = Y[:, n+1]
+        # new infections caused by each strain
+        infections = self.beta_scaled*self._infectious(infected)*S[:, np.newaxis]
+        dY = np.empty_like(Y)
+        dY[:, 0] = self._birth(Y[:, :n+2].sum(axis=1)) - infections.sum(axis=1) - self.b*S + self.w*R
+        dY[:, 1:n+1] = infections - self._removal*infected
+        dY[:, n+1] = (self.nu*infected).sum(axis=1) - (self.b + self.w)*R
+        dY[:, n+2:2*n+2] = self.alpha*infected
+        dY[:, 2*n+2:] = infections
+        return dY.ravel()
+
+    def jac_sparsity(self):
+        """Sparsity pattern of the Jacobian, which is block diagonal
+        with one block per member
+
+        :returns: matrix with ones where the Jacobian may be non-zero
+        :rtype: scipy.sparse.csr_matrix
+        """
+        n = self.n
+        block = np.zeros((3*n + 2, 3*n + 2), dtype=int)
+        block[:n+2, :n+2] = np.eye(n + 2, dtype=int)
+        block[0, :n+2] = 1
+        block[:n+2, 0] = 1
+        block[n+1, 1:n+2] = 1
+        # cumulative deaths and infections of each strain
+        block[n+2:2*n+2, 1:n+1] = np.eye(n, dtype=int)
+        block[2*n+2:, 1:n+1] = np.eye(n, dtype=int)
+        block[2*n+2:, 0] = 1
+        return scipy.sparse.block_diag([block]*self.m, format='csr')
+
+    def _solver_options(self):
+        """Keyword arguments passed to scipy.integrate.solve_ivp"""
+        options = {'method': self.method, 'rtol': self.rtol, 'atol': self.atol}
+        if self.method in self.IMPLICIT_METHODS:
+            options['jac_sparsity'] = self.jac_sparsity()
+        return options
+
+    def _pause_times(self):
+        """Start, end and strain delay times of all members at which the
+        integration pauses"""
+        return pause_times(self.delay, self.time)
+
+    def _initial_state(self):
+        """State of every member at time 0 before any strain is seeded"""
+        Y0 = np.zeros((self.m, 3*self.n + 2))
+        Y0[:, 0] = self.n_sus
+        Y0[:, self.n + 1] = self.recovered
+        return Y0
+
+    def _seed(self, Y0, start):
+        """Add the people infected with each strain to the state of the
+        members whose strain is introduced at the start of a segment, in place
+
+        :param Y0: (members, state) array at the start of the segment
+        :type Y0: numpy.ndarray
+        :param start: start time of the segment
+        :type start: float
+        """
+        n = self.n
+        seeded = self.delay == start
+        Y0[:, 1:n+1][seeded] = self.infected[seeded]
+        Y0[:, 2*n+2:][seeded] += self.infected[seeded]
+
+    def _day_edges(self):
+        """Start and end of every day of the run, at which deaths are binned"""
+        return day_edges(self.time)
+
+    def solve(self):
+        """Solve the differential equations of every member
+        """
+        self.solution, deaths_at_edges = self._integrate_adaptive()
+        self.daily_deaths_by_strain = np.diff(deaths_at_edges, axis=2)
+        self.daily_deaths = self.daily_deaths_by_strain.sum(axis=1)
+
+        # determine number of deaths
+        self._count_virus_death()
+
+    def _integrate_adaptive(self, t_eval=None):
+        """Integrate every member with solve_ivp, pausing at each delay
+
+        :param t_eval: output times, defaults to ten points per day
+        :type t_eval: numpy.ndarray, optional
+        :returns: the solution and the cumulative deaths of each member and
+            strain at the day edges
+        :rtype: tuple
+        """
+        # the integrator also stops at the end of every day to bin deaths
+        day_edges = self._day_edges()
+        grids = segment_grids(self._pause_times(), t_eval=t_eval, extra=day_edges)
+        n = self.n
+        Y0 = self._initial_state()
+        solution = Solution((self.m, n + 2), sum(stored.sum() for _, stored in grids), self.dtype, n_strains=n)
+        deaths_at_edges = np.zeros((self.m, n, len(day_edges)))
+        # To add the people infected with each strain at a specified time,
+        # we pause the model at each delay, seeding only the members whose
+        # strain is introduced at that time
+        for t_eval, stored in grids:
+            start = t_eval[0]
+            self._seed(Y0, start)
+            sol = scipy.integrate.solve_ivp(
+                fun=lambda t, y: self._rhs(y),
+                t_span=[t_eval[0], t_eval[-1]],
+                y0=Y0.ravel(),
+                t_eval=t_eval,
+                **self._solver_options(),
+            )
+            if sol.status < 0:
+                raise RuntimeError(sol.message)
+            y = sol.y.reshape(self.m, 3*n + 2, -1)
+            solution.append(sol.t[stored], y[..., stored])
+            edges = (day_edges > start) & (day_edges <= t_eval[-1])
+            deaths_at_edges[..., edges] = y[:, n+2:2*n+2, np.searchsorted(t_eval, day_edges[edges])]
+            Y0 = y[..., -1].copy()
+        return solution, deaths_at_edges
+
+    def solve_fixed(self, dt=0.1, method='rk4', check_error=False, tolerance=1e-2):
+        """Solve every member in lockstep with a fixed step method, which is
+        much cheaper per run than adaptive integration for large ensembles.
+        Strains are seeded at the step nearest to their delay
+
+        :param dt: step size in days, defaults to 0.1
+        :type dt: float, optional
+        :param method: 'rk4' or 'euler', defaults to 'rk4'
+        :type method: string, optional
+        :param check_error: also integrate with the adaptive method at the
+            same time points and compare, defaults to False
+        :type check_error: bool, optional
+        :param tolerance: largest accepted error relative to the initial
+            population size before a warning is given, defaults to 1e-2
+        :type tolerance: float, optional
+        :returns: if check_error, the largest difference from the adaptive
+            solution of each member relative to its initial population size
+        :rtype: numpy.ndarray or None
+        """
+        n = self.n
+        t = step_grid(self.time, dt)
+        # step at which each strain of each member is seeded, or -1 if never
+        seed_step = np.where(self.delay < self.time, np.minimum(np.rint(self.delay/dt), len(t) - 1), -1)
+
+        def seed(k, y):
+            seeded = seed_step == k
+            if seeded.any():
+                Y = y.reshape(self.m, 3*n + 2)
+                Y[:, 1:n+1][seeded] = self.infected[seeded]
+                Y[:, 2*n+2:][seeded] += self.infected[seeded]
+
+        y = integrate_fixed(lambda t, y: self._rhs(y), t, self._initial_state().ravel(), method, seed)
+        y = y.reshape(self.m, 3*n + 2, -1)
+        solution = Solution((self.m, n + 2), len(t), self.dtype, n_strains=n)
+        solution.append(t, y)
+        self.solution = solution
+        # cumulative deaths at the day edges, interpolated between steps
+        day_edges = self._day_edges()
+        idx = np.clip(np.searchsorted(t, day_edges), 1, len(t) - 1)
+        weight = (day_edges - t[idx - 1])/(t[idx] - t[idx - 1])
+        deaths = y[:, n+2:2*n+2]
+        deaths_at_edges = deaths[..., idx - 1]*(1 - weight) + deaths[..., idx]*weight
+        self.daily_deaths_by_strain = np.diff(deaths_at_edges, axis=2)
+        self.daily_deaths = self.daily_deaths_by_strain.sum(axis=1)
+        self._count_virus_death()
+
+        if not check_error:
+            return None
+        adaptive, _ = self._integrate_adaptive(t_eval=t)
+        size = self.n_sus + self.infected.sum(axis=1) + self.recovered
+        error = np.abs(solution.y - adaptive.y).max(axis=(1, 2))/size
+        if np.any(error > tolerance):
+            warnings.warn(f"Fixed step error up to {error.max():.3g} of the population size, "
+                          f"above the tolerance {tolerance}; reduce the step size", RuntimeWarning)
+        return error
+
+    def summarize(self, extinction_threshold=1.0):
+        """Solve the differential equations of every member keeping only
+        the per strain metrics of Solver.summarize, as (members, strains)
+        arrays updated while stepping
+
+        :param extinction_threshold: number of infected individuals below
+            which a strain is considered extinct, defaults to 1
+        :type extinction_threshold: float, optional
+        :returns: the metrics of each member and strain
+        :rtype: Summary
+        """
+        n = self.n
+        summary = Summary((self.m, n), self.n_sus + self.infected.sum(axis=1) + self.recovered,
+                          extinction_threshold)
+
+        def reduce(t, y):
+            Y = y.reshape(self.m, 3*n + 2, -1)
+            summary.update(t, Y[:, 1:n+1], Y[:, n+2:2*n+2], Y[:, 2*n+2:])
+
+        Y0 = self._initial_state()
+        for t_eval, _ in segment_grids(self._pause_times()):
+            self._seed(Y0, t_eval[0])
+            # each segment chooses its first step, as in solve
+            y, _, _ = integrate_stepped(lambda t, y: self._rhs(y), t_eval, Y0.ravel(), self._solver_options(),
+                                        reduce=reduce)
+            Y0 = y[:, -1].reshape(self.m, 3*n + 2).copy()
+        self.summary = summary
+        return summary
+
+    def _count_virus_death(self):
+        """Counting the number of deaths caused by the viruses in
+        every member, see solver.count_virus_deaths
+        """
+        if self.solution is None:
+            raise ValueError("Must run s.solve() before calculation deaths")
+        self.daily_cumulative_deaths, self.deaths = count_virus_deaths(self.solution)
+
+    def save_fan_chart(self, save_path='epistrains_fan_output.png', quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Function to save the quantile bands of every compartment over
+        the members, see plotting.make_figure
+
+        :param save_path: gives path to which figure should be saved
+        :type save_path: string
+        :param quantiles: quantiles of the members to draw, defaults to
+            (0.05, 0.25, 0.5, 0.75, 0.95)
+        :type quantiles: tuple, optional
+        """
+        from epistrains import plotting
+        plotting.save_figure(self, save_path, kind='fan', quantiles=quantiles)
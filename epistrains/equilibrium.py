@@ -0,0 +1,247 @@
+import numpy as np
+import scipy.optimize
+import scipy.special
+from epistrains.solver import Solver
+
+
+class Equilibrium:
+    """A steady state of the model, with the stability given by the
+    eigenvalues of the Jacobian of the compartments there
+
+    :param S: number susceptible
+    :type S: float
+    :param infected: number infected with each strain
+    :type infected: numpy.ndarray
+    :param R: number recovered
+    :type R: float
+    :param eigenvalues: eigenvalues of the Jacobian of the compartments
+    :type eigenvalues: numpy.ndarray
+    :param recovered_by_strain: number recovered from each strain, for
+        models with cross-immunity, defaults to None
+    :type recovered_by_strain: numpy.ndarray, optional
+    """
+
+    def __init__(self, S, infected, R, eigenvalues, recovered_by_strain=None):
+        self.S = S
+        self.infected = infected
+        self.R = R
+        self.eigenvalues = eigenvalues
+        self.recovered_by_strain = recovered_by_strain
+
+    @property
+    def N(self):
+        """Total population size"""
+        return self.S + self.infected.sum() + self.R
+
+    @property
+    def strains(self):
+        """Indices of the strains still present"""
+        return np.flatnonzero(self.infected > 0)
+
+    @property
+    def stability(self):
+        """'stable' when every eigenvalue has a negative real part,
+        'unstable' when one is positive, and 'marginal' otherwise"""
+        # relative to the fastest rate, so rounding errors are not counted
+        scale = 1e-9*max(1.0, np.abs(self.eigenvalues).max())
+        if np.all(self.eigenvalues.real < -scale):
+            return 'stable'
+        if np.any(self.eigenvalues.real > scale):
+            return 'unstable'
+        return 'marginal'
+
+    def __repr__(self):
+        return (f"Equilibrium(S={self.S:.6g}, infected={np.array2string(self.infected, precision=6)}, "
+                f"R={self.R:.6g}, stability={self.stability!r})")
+
+
+def _compartments(solver):
+    """Indices of the compartments in the state of a Solver, leaving out
+    the cumulative deaths and infections, which never settle"""
+    n = solver.n
+    return np.concatenate((np.arange(n + 2), np.arange(3*n + 2, solver._n_states)))
+
+
+def _guesses(solver):
+    """Starting points for the root finding: the population without
+    disease, and each strain alone at the level where it replaces itself"""
+    n = solver.n
+    N0 = solver.pop.init_size
+    guesses = [np.concatenate(([float(N0)], np.zeros(solver._n_states - 1)))]
+    births = float(solver.func_birth(float(N0))) if solver.func_birth is not None else 0.0
+    for j in range(n):
+        if solver.beta_scaled[j] <= 0:
+            continue
+        S = solver._removal[j]/solver.beta_scaled[j]
+        # infections balancing births, deaths and waning at the initial
+        # population size
+        recovered_share = solver.w*solver.nu[j]/(solver.b + solver.w) if solver.b + solver.w > 0 else 0.0
+        infected = (births - solver.b*S)/(solver._removal[j] - recovered_share)
+        if not infected > 0:
+            continue
+        y = np.zeros(solver._n_states)
+        y[0] = S
+        y[j + 1] = infected
+        y[n + 1] = solver.nu[j]*infected/(solver.b + solver.w) if solver.b + solver.w > 0 else 0.0
+        if solver._n_recovered:
+            y[3*n + 2 + j] = y[n + 1]
+        guesses.append(y)
+    return guesses
+
+
+def _coexistence_guess(solver, guesses, tol):
+    """Starting point for a state where every strain able to persist alone
+    is present, from the mean of their endemic states, with the infected
+    given by their logarithm, or None with fewer than two such strains"""
+    n = solver.n
+    if len(guesses) < 3:
+        return None
+    v = np.mean(guesses[1:], axis=0)[_compartments(solver)]
+    v[1:n+1] = np.log(np.maximum(v[1:n+1], tol))
+    return v
+
+
+def _coexistence_root(fun, guess, n, tol):
+    """Root where the strains coexist, solving for the infected through
+    their logarithm with their equations divided by their number, which
+    leaves out the roots where a strain has died out
+
+    :param fun: right hand side of the compartments
+    :type fun: function
+    :param guess: starting point, see _coexistence_guess
+    :type guess: numpy.ndarray
+    :param n: number of strains
+    :type n: int
+    :param tol: tolerance of the root finding
+    :type tol: float
+    :returns: the result of the root finding, with the infected in x
+    :rtype: scipy.optimize.OptimizeResult
+    """
+    def coexisting(v):
+        x = v.copy()
+        x[1:n+1] = np.exp(v[1:n+1])
+        dx = fun(x)
+        dx[1:n+1] /= x[1:n+1]
+        return dx
+
+    # without coexistence the search drifts off to extinction
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        result = scipy.optimize.root(coexisting, guess, method='hybr', options={'xtol': tol})
+        result.x[1:n+1] = np.exp(result.x[1:n+1])
+    return result
+
+
+def _add_root(found, result, n, tol):
+    """Add a root to those found, unless the search failed, it has negative
+    compartments or no population, or it was found before
+
+    :param found: the roots found so far, added to in place
+    :type found: list
+    :param result: result of the root finding
+    :type result: scipy.optimize.OptimizeResult
+    :param n: number of strains
+    :type n: int
+    :param tol: tolerance of the root finding, relative to the population size
+    :type tol: float
+    """
+    x = result.x
+    scale = max(1.0, np.abs(x).max())
+    if not result.success or np.any(x < -tol*scale) or x[:n+2].sum() <= tol*scale:
+        return
+    x = np.where(np.abs(x) < tol*scale, 0.0, x)
+    if not any(np.allclose(x, other, rtol=1e-6, atol=tol*scale) for other in found):
+        found.append(x)
+
+
+def equilibria(pop, strains, cross_immunity=None, tol=1e-8):
+    """Steady states of the model, found by root finding on the right hand
+    side of Solver and its Jacobian rather than by integrating in time
+
+    Roots are sought from the population without disease, from each
+    strain alone and from all strains together. Without cross-immunity
+    these give the disease free equilibrium and the endemic equilibrium of
+    each strain able to persist, of which, by competitive exclusion, only
+    that of the strain with the largest R0 is stable. Partial
+    cross-immunity can also let strains coexist. The delays of the strains
+    are ignored, as are states with no population when births keep the
+    population alive.
+
+    :param pop: population information relating to birth rate
+        and death rate
+    :type pop: Population
+    :param strains: the strains
+    :type strains: List or StrainTable
+    :param cross_immunity: cross-immunity matrix, see Solver, defaults to None
+    :type cross_immunity: array_like or scipy.sparse matrix, optional
+    :param tol: tolerance of the root finding, relative to the population
+        size, defaults to 1e-8
+    :type tol: float, optional
+    :returns: the equilibria found, the disease free one first
+    :rtype: List
+    """
+    solver = Solver(pop, strains, cross_immunity=cross_immunity)
+    n = solver.n
+    comps = _compartments(solver)
+
+    def full_state(x):
+        y = np.zeros(solver._n_states)
+        y[comps] = x
+        return y
+
+    def fun(x):
+        return solver._rhs(full_state(x))[comps]
+
+    def jac(x):
+        return solver._jac(full_state(x))[np.ix_(comps, comps)]
+
+    guesses = _guesses(solver)
+    found = []
+    for guess in guesses:
+        result = scipy.optimize.root(fun, guess[comps], jac=jac, method='hybr', options={'xtol': tol})
+        _add_root(found, result, n, tol)
+    guess = _coexistence_guess(solver, guesses, tol)
+    if guess is not None:
+        _add_root(found, _coexistence_root(fun, guess, n, tol), n, tol)
+
+    equilibria = []
+    for x in found:
+        eigenvalues = np.linalg.eigvals(jac(x))
+        equilibria.append(Equilibrium(x[0], x[1:n+1], x[n+1], eigenvalues,
+                                      x[n+2:] if solver._n_recovered else None))
+    return equilibria
+
+
+def final_size(pop, strains):
+    """Number infected over a single epidemic of each strain, were it to
+    spread alone through the population, from the final size relation
+
+    Over an epidemic births, natural deaths and waning immunity are
+    neglected, so the susceptibles left at the end solve
+    S = S0*exp(-beta*(S0 + I0 - S)/(nu + alpha)), solved with the Lambert
+    W function for every strain at once. S0 is the initial number
+    susceptible as in Solver, and I0 the initial number infected with the
+    strain.
+
+    :param pop: population information relating to birth rate
+        and death rate
+    :type pop: Population
+    :param strains: the strains
+    :type strains: List or StrainTable
+    :returns: the number of new infections, deaths and recoveries caused
+        by each strain over its epidemic, and the susceptibles left at the
+        end, each an array with one entry per strain
+    :rtype: dict
+    """
+    solver = Solver(pop, strains)
+    S0 = solver.n_sus
+    I0 = solver._table.infected.astype(float)
+    gamma = solver.nu + solver.alpha
+    a = solver.beta_scaled/gamma
+    # -a*S_end*exp(-a*S_end) = -a*S0*exp(-a*(S0 + I0)), whose principal
+    # branch gives the end state below the epidemic threshold a*S < 1
+    S_end = -scipy.special.lambertw(-a*S0*np.exp(-a*(S0 + I0))).real/a
+    infections = S0 - S_end
+    # everyone infected during the epidemic recovers or dies from it
+    removed = infections + I0
+    return {'infections': infections, 'deaths': solver.alpha/gamma*removed,
+            'recoveries': solver.nu/gamma*removed, 'susceptible': S_end}
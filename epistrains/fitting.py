@@ -0,0 +1,294 @@
+import numpy as np
+import scipy.integrate
+import scipy.optimize
+import scipy.special
+from epistrains.solver import Solver, segment_grids
+from epistrains.strain import Strain
+
+
+def parameter_derivative(solver, y, directions=None):
+    """Partial derivatives of the right hand equations of a Solver with
+    respect to the rates beta_j (scaled), nu_j and alpha_j of each strain,
+    or to combinations of them
+
+    :param solver: model whose right hand equations are differentiated
+    :type solver: Solver
+    :param y: state, laid out as in Solver
+    :type y: numpy.ndarray
+    :param directions: matrix of shape (3n, q) whose columns are
+        combinations of the rates, ordered as every beta, then every nu,
+        then every alpha, defaults to the identity
+    :type directions: numpy.ndarray, optional
+    :returns: matrix of shape (3n + 2, q)
+    :rtype: numpy.ndarray
+    """
+    n = solver.n
+    if directions is None:
+        directions = np.eye(3*n)
+    infected = y[1:n+1, np.newaxis]
+    # new infections beta_j*I_j*S leave S and enter I_j and C_j,
+    # recoveries nu_j*I_j move from I_j to R, and virus deaths
+    # alpha_j*I_j move from I_j to D_j
+    d_infections = infected*y[0]*directions[:n]
+    d_recoveries = infected*directions[n:2*n]
+    d_deaths = infected*directions[2*n:]
+    dfdp = np.empty((len(y), directions.shape[1]))
+    dfdp[0] = -d_infections.sum(axis=0)
+    dfdp[1:n+1] = d_infections - d_recoveries - d_deaths
+    dfdp[n+1] = d_recoveries.sum(axis=0)
+    dfdp[solver._deaths] = d_deaths
+    dfdp[solver._infections] = d_infections
+    return dfdp
+
+
+def jacobian_product(solver, y, W):
+    """Product J @ W of the Jacobian of the right hand equations of a
+    Solver with a matrix, using the structure of the Jacobian rather than
+    building it, see Solver._jac
+
+    :param solver: model whose Jacobian is used
+    :type solver: Solver
+    :param y: state, laid out as in Solver
+    :type y: numpy.ndarray
+    :param W: matrix with one row per state variable
+    :type W: numpy.ndarray
+    :rtype: numpy.ndarray
+    """
+    n = solver.n
+    S = y[0]
+    infected = y[1:n+1]
+    W_S = W[0]
+    W_I = W[1:n+1]
+    W_R = W[n+1]
+    beta = solver.beta_scaled[:, np.newaxis]
+    # changes in new infections of each strain
+    d_infections = beta*(infected[:, np.newaxis]*W_S + S*W_I)
+    JW = np.empty_like(W)
+    JW[0] = (solver._birth_derivative(y[:n+2].sum())*W[:n+2].sum(axis=0) - d_infections.sum(axis=0)
+             - solver.b*W_S + solver.w*W_R)
+    JW[1:n+1] = d_infections - solver._removal[:, np.newaxis]*W_I
+    JW[n+1] = solver.nu @ W_I - (solver.b + solver.w)*W_R
+    JW[solver._deaths] = solver.alpha[:, np.newaxis]*W_I
+    JW[solver._infections] = d_infections
+    return JW
+
+
+def solve_sensitivities(solver, directions=None):
+    """Integrate a Solver together with the forward sensitivities of its
+    state to the rates beta_j (scaled), nu_j and alpha_j of each strain,
+    dZ/dt = J Z + df/dp, keeping only the values at the end of every day
+
+    The initial state and the seedings do not depend on the rates, so the
+    sensitivities start at zero and are continuous across the delays.
+    When only the sensitivities to a few combinations of the rates are
+    needed, such as the parameters being fitted, integrating Z @ directions
+    instead keeps the augmented system small.
+
+    :param solver: model to be solved, whose method and tolerances are used
+    :type solver: Solver
+    :param directions: matrix of shape (3n, q) whose columns are the
+        combinations of the rates, defaults to the identity
+    :type directions: numpy.ndarray, optional
+    :returns: the cumulative deaths of each strain at each day edge, of
+        shape (n, days + 1), and their sensitivities, of shape
+        (n, days + 1, q)
+    :rtype: tuple
+    """
+    if solver.cross_immunity is not None:
+        raise ValueError("Sensitivities are not available for models with cross-immunity")
+    n = solver.n
+    k = 3*n + 2
+    if directions is None:
+        directions = np.eye(3*n)
+    p = directions.shape[1]
+
+    def rhs(t, z):
+        y = z[:k]
+        sens = z[k:].reshape(k, p)
+        return np.concatenate((solver._rhs(y), (jacobian_product(solver, y, sens) +
+                                                parameter_derivative(solver, y, directions)).ravel()))
+
+    day_edges = np.union1d(np.arange(np.ceil(solver.time)), [solver.time])
+    deaths = np.zeros((n, len(day_edges)))
+    sensitivity = np.zeros((n, len(day_edges), p))
+    z0 = np.zeros(k*(p + 1))
+    z0[:k] = solver._initial_state()
+    for t_eval, _ in segment_grids(solver._pause_times(), None, extra=day_edges):
+        start = t_eval[0]
+        solver._seed(z0, start)
+        sol = scipy.integrate.solve_ivp(rhs, [start, t_eval[-1]], z0, t_eval=t_eval, method=solver.method,
+                                        rtol=solver.rtol, atol=solver.atol)
+        if sol.status < 0:
+            raise RuntimeError(sol.message)
+        edges = (day_edges > start) & (day_edges <= t_eval[-1])
+        at = np.searchsorted(t_eval, day_edges[edges])
+        deaths[:, edges] = sol.y[solver._deaths, at]
+        sens = sol.y[k:].reshape(k, p, len(t_eval))
+        sensitivity[:, edges] = sens[solver._deaths][:, :, at].transpose(0, 2, 1)
+        z0 = sol.y[:, -1].copy()
+    return deaths, sensitivity
+
+
+class DeathsFit:
+    """Fit the R0, case fatality rate and recovery time of each strain to
+    an observed series of daily deaths by maximising a Poisson likelihood
+
+    The gradient of the likelihood is exact, from the forward sensitivities
+    of the cumulative deaths integrated alongside the model, so each
+    evaluation of the likelihood and its gradient takes a single solve.
+
+    The fitted parameters are given as one vector, holding the values of
+    every strain for each name in fit in turn, e.g. [R0_1, R0_2, CFR_1,
+    CFR_2] for fit=('R0', 'CFR'). The other parameters are taken from the
+    strains.
+
+    :param pop: population information relating to birth rate
+        and death rate
+    :type pop: Population
+    :param strains: the strains, giving the initial values of the fitted
+        parameters, the number infected and the delays
+    :type strains: List
+    :param observed: daily deaths of all strains, of shape (days,), or of
+        each strain, of shape (strains, days)
+    :type observed: array_like
+    :param fit: names of the fitted parameters, from 'R0', 'CFR' and
+        'recovery_time', defaults to ('R0', 'CFR')
+    :type fit: tuple, optional
+    :param method: integration method passed to scipy.integrate.solve_ivp,
+        defaults to 'RK45'
+    :type method: string, optional
+    :param rtol: relative tolerance of the integrator, defaults to 1e-6
+    :type rtol: float, optional
+    :param atol: absolute tolerance of the integrator, defaults to 1e-6
+    :type atol: float, optional
+    """
+
+    PARAMETERS = ('R0', 'CFR', 'recovery_time')
+
+    def __init__(self, pop, strains, observed, fit=('R0', 'CFR'), method='RK45', rtol=1e-6, atol=1e-6):
+        """Initialize the class and take the observations"""
+        self.observed = np.asarray(observed, dtype=float)
+        if self.observed.ndim not in (1, 2) or (self.observed.ndim == 2 and len(self.observed) != len(strains)):
+            raise ValueError("Observed deaths must have shape (days,) or (strains, days)")
+        if any(name not in self.PARAMETERS for name in fit):
+            raise ValueError(f"Fitted parameters must be from {self.PARAMETERS}")
+        self.pop = pop
+        self.strains = strains
+        self.fit = tuple(fit)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.n = len(strains)
+        self.time = self.observed.shape[-1]
+        # number of solves, to compare with black-box optimisation
+        self.nfev = 0
+        self._log_factorial = scipy.special.gammaln(self.observed + 1).sum()
+
+    def _strain_values(self):
+        """R0, CFR and recovery time of each strain"""
+        return {'R0': np.array([s.beta_unscaled/(s.alpha + s.nu) for s in self.strains]),
+                'CFR': np.array([s.alpha/s.nu for s in self.strains]),
+                'recovery_time': np.array([1/s.nu for s in self.strains])}
+
+    def initial_values(self):
+        """The fitted parameters of the strains, as one vector"""
+        values = self._strain_values()
+        return np.concatenate([values[name] for name in self.fit])
+
+    def _values(self, x):
+        """R0, CFR and recovery time of each strain for the parameter vector x"""
+        values = self._strain_values()
+        for i, name in enumerate(self.fit):
+            values[name] = np.asarray(x[i*self.n:(i+1)*self.n], dtype=float)
+        return values
+
+    def make_strains(self, x):
+        """Strains with the fitted parameters x
+
+        :param x: fitted parameters
+        :type x: array_like
+        :rtype: List
+        """
+        values = self._values(x)
+        return [Strain(float(values['CFR'][j]), float(values['recovery_time'][j]), float(values['R0'][j]),
+                       s.infected, s.delay) for j, s in enumerate(self.strains)]
+
+    def _chain(self, x, n_sus):
+        """Derivatives of the rates beta_j (scaled), nu_j and alpha_j with
+        respect to the fitted parameters
+
+        :returns: matrix of shape (3n, len(x))
+        :rtype: numpy.ndarray
+        """
+        n = self.n
+        v = self._values(x)
+        R0, CFR, rt = v['R0'], v['CFR'], v['recovery_time']
+        nu = 1/rt
+        idx = np.arange(n)
+        chain = np.zeros((3*n, len(x)))
+        for i, name in enumerate(self.fit):
+            cols = idx + i*n
+            if name == 'R0':
+                chain[idx, cols] = (1 + CFR)*nu/n_sus
+            elif name == 'CFR':
+                chain[idx, cols] = R0*nu/n_sus
+                chain[idx + 2*n, cols] = nu
+            else:
+                dnu = -nu**2
+                chain[idx, cols] = R0*(1 + CFR)*dnu/n_sus
+                chain[idx + n, cols] = dnu
+                chain[idx + 2*n, cols] = CFR*dnu
+        return chain
+
+    def log_likelihood(self, x):
+        """Poisson log-likelihood of the observed deaths and its gradient
+
+        :param x: fitted parameters
+        :type x: array_like
+        :returns: the log-likelihood and its gradient with respect to x
+        :rtype: tuple
+        """
+        x = np.asarray(x, dtype=float)
+        solver = Solver(self.pop, self.make_strains(x), time=self.time, method=self.method,
+                        rtol=self.rtol, atol=self.atol)
+        deaths, sensitivity = solve_sensitivities(solver, self._chain(x, solver.n_sus))
+        self.nfev += 1
+        expected = np.diff(deaths, axis=1)
+        d_expected = np.diff(sensitivity, axis=1)
+        if self.observed.ndim == 1:
+            expected = expected.sum(axis=0)
+            d_expected = d_expected.sum(axis=0)
+        # expected deaths are floored, where the likelihood is flat
+        floor = 1e-10
+        positive = expected > floor
+        expected = np.maximum(expected, floor)
+        loglik = (self.observed*np.log(expected) - expected).sum() - self._log_factorial
+        weight = np.where(positive, self.observed/expected - 1, 0.0)
+        gradient = (weight[..., np.newaxis]*d_expected).reshape(-1, len(x)).sum(axis=0)
+        return loglik, gradient
+
+    def fit_parameters(self, x0=None, **options):
+        """Maximise the likelihood with scipy.optimize.minimize, using the
+        exact gradient. The optimiser works on the logarithm of the
+        parameters, which keeps them positive and puts R0 and CFR on
+        similar scales
+
+        :param x0: starting parameters, defaults to the values of the strains
+        :type x0: array_like, optional
+        :param options: other arguments of scipy.optimize.minimize, which
+            uses the L-BFGS-B method unless another is given
+        :returns: the optimisation result, with the fitted parameters in x
+        :rtype: scipy.optimize.OptimizeResult
+        """
+        if x0 is None:
+            x0 = self.initial_values()
+        options.setdefault('method', 'L-BFGS-B')
+
+        def negative(u):
+            x = np.exp(u)
+            loglik, gradient = self.log_likelihood(x)
+            return -loglik, -gradient*x
+
+        result = scipy.optimize.minimize(negative, np.log(x0), jac=True, **options)
+        result.x = np.exp(result.x)
+        return result
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+def euler_step(fun, t, y, dt):
+    """Advance the state by one forward Euler step
+
+    :param fun: right hand side, called as fun(t, y)
+    :type fun: function
+    :param t: current time
+    :type t: float
+    :param y: current state
+    :type y: numpy.ndarray
+    :param dt: step size
+    :type dt: float
+    """
+    return y + dt*fun(t, y)
+
+
+def rk4_step(fun, t, y, dt):
+    """Advance the state by one classical fourth order Runge-Kutta step
+
+    :param fun: right hand side, called as fun(t, y)
+    :type fun: function
+    :param t: current time
+    :type t: float
+    :param y: current state
+    :type y: numpy.ndarray
+    :param dt: step size
+    :type dt: float
+    """
+    k1 = fun(t, y)
+    k2 = fun(t + dt/2, y + dt/2*k1)
+    k3 = fun(t + dt/2, y + dt/2*k2)
+    k4 = fun(t + dt, y + dt*k3)
+    return y + dt/6*(k1 + 2*k2 + 2*k3 + k4)
+
+
+# fixed step methods by name
+STEPPERS = {'euler': euler_step, 'rk4': rk4_step}
+
+
+def step_grid(time, dt):
+    """Equally spaced time points from 0 to time. The last step is
+    shortened when time is not a multiple of dt
+
+    :param time: end time
+    :type time: float
+    :param dt: step size
+    :type dt: float
+    """
+    if dt <= 0:
+        raise ValueError("Step size must be positive")
+    n_steps = int(np.floor(time/dt + 1e-9))
+    t = dt*np.arange(n_steps + 1)
+    if time - t[-1] > 1e-9*max(1.0, time):
+        t = np.append(t, time)
+    return t
+
+
+def integrate_fixed(fun, t, y0, method='rk4', seed=None):
+    """Integrate with a fixed step method over the time points t, keeping
+    the state at every point
+
+    :param fun: right hand side, called as fun(t, y)
+    :type fun: function
+    :param t: time points, the first being the initial time
+    :type t: numpy.ndarray
+    :param y0: initial state
+    :type y0: numpy.ndarray
+    :param method: 'rk4' or 'euler', defaults to 'rk4'
+    :type method: string, optional
+    :param seed: function called as seed(k, y) before stepping from t[k],
+        which may change the state y in place, defaults to None
+    :type seed: function, optional
+    :returns: the state at each time point, after any seeding
+    :rtype: numpy.ndarray
+    """
+    if method not in STEPPERS:
+        raise ValueError(f"Fixed step method must be one of {sorted(STEPPERS)}")
+    stepper = STEPPERS[method]
+    y = np.empty((len(y0), len(t)))
+    state = np.array(y0, dtype=float)
+    for k in range(len(t)):
+        if seed is not None:
+            seed(k, state)
+        y[:, k] = state
+        if k < len(t) - 1:
+            state = stepper(fun, t[k], state, t[k+1] - t[k])
+    return y
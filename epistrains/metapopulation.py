@@ -0,0 +1,165 @@
+from typing import List
+import numpy as np
+import scipy.sparse
+from epistrains.ensemble import EnsembleSolver
+from epistrains.population import Population, ConstantBirth, ExponentialBirth, LogisticBirth, birth_rates
+from epistrains.strain import Strain
+
+# parameters of the built-in birth functions, which also accept one value
+# per region as arrays
+BIRTH_PARAMETERS = {ConstantBirth: ('c',), ExponentialBirth: ('a', 'k'), LogisticBirth: ('a', 'k')}
+
+
+def _birth_groups(funcs):
+    """Group the regions whose birth rates can be evaluated in one call:
+    those with a built-in birth function of the same form, with their
+    parameters gathered into arrays, and those sharing any other function
+
+    :param funcs: birth function of each region
+    :type funcs: list
+    :returns: (birth function, regions) pairs
+    :rtype: list
+    """
+    groups = {}
+    for k, func in enumerate(funcs):
+        key = type(func) if type(func) in BIRTH_PARAMETERS else id(func)
+        groups.setdefault(key, (func, []))[1].append(k)
+    birth_groups = []
+    for key, (func, regions) in groups.items():
+        if key in BIRTH_PARAMETERS:
+            func = key(*(np.array([getattr(funcs[k], name) for k in regions], dtype=float)
+                         for name in BIRTH_PARAMETERS[key]))
+        birth_groups.append((func, np.array(regions)))
+    return birth_groups
+
+
+class MetapopulationSolver(EnsembleSolver):
+    """Solve the multi-strain model in many regions at once, each with its
+    own population parameters and the same strains, coupled through a
+    mobility matrix
+
+    Entry [a, b] of the mobility matrix is the weight of contacts of the
+    residents of region a with the infected residents of region b, so the
+    susceptibles of region a are infected with strain j at rate
+    beta_j*S_a*sum_b(mobility[a, b]*I_bj), with beta_j scaled by the
+    susceptibles of region a as in Solver. The identity matrix gives
+    independent regions. With a scipy.sparse matrix, the cost of the
+    coupling grows with its number of non-zero entries.
+
+    The state of every region is stacked into one vector, so all regions
+    are integrated together, and the solution has shape
+    (regions, compartments, time points) as for EnsembleSolver.
+
+    :param pops: population of each region
+    :type pops: List
+    :param strains: strains present in every region
+    :type strains: List
+    :param mobility: (regions, regions) mobility matrix
+    :type mobility: array_like or scipy.sparse matrix
+    :param infected: number initially infected with each strain in each
+        region, of shape (regions, strains), defaults to the number infected
+        of each strain in every region
+    :type infected: array_like, optional
+    :param time: days over which the system should be solved for,
+        defaults to 1
+    :type time: float or integer, optional
+    :param method: integration method passed to scipy.integrate.solve_ivp,
+        defaults to 'RK45'
+    :type method: string, optional
+    :param rtol: relative tolerance of the integrator, defaults to 1e-3
+    :type rtol: float, optional
+    :param atol: absolute tolerance of the integrator, defaults to 1e-6
+    :type atol: float, optional
+    :param dtype: data type used to store the solution, defaults to
+        numpy.float64
+    :type dtype: numpy.dtype, optional
+    """
+
+    def __init__(self, pops: List[Population], strains: List[Strain], mobility, infected=None, time=1,
+                 method='RK45', rtol=1e-3, atol=1e-6, dtype=np.float64):
+        """Initialize the class and check the mobility matrix"""
+        if len(pops) == 0:
+            raise ValueError('Number of regions must be positive')
+        if len(strains) == 0:
+            raise ValueError('Number of strains must be positive')
+        if infected is None:
+            infected = [[strain.infected for strain in strains]]*len(pops)
+        nu = np.array([strain.nu for strain in strains])
+        alpha = np.array([strain.alpha for strain in strains])
+        beta = np.array([strain.beta_unscaled for strain in strains])
+        super().__init__(R0=beta/(alpha + nu), CFR=alpha/nu, recovery_time=1/nu, infected=infected,
+                         delay=[strain.delay for strain in strains], death=[pop.death_rate for pop in pops],
+                         size=[pop.init_size for pop in pops], birth_function=pops[0].birth_rate,
+                         waning=[pop.waning_rate for pop in pops],
+                         immunity=[100*pop.current_immune/pop.init_size for pop in pops], time=time,
+                         method=method, rtol=rtol, atol=atol, dtype=dtype)
+        if self.m != len(pops):
+            raise ValueError("Initial infected must have shape (regions, strains)")
+        self.pops = pops
+        self.strains = strains
+        self._birth_groups = _birth_groups([pop.birth_rate for pop in pops])
+
+        if scipy.sparse.issparse(mobility):
+            self.mobility = scipy.sparse.csr_matrix(mobility, dtype=float)
+            values = self.mobility.data
+        else:
+            self.mobility = np.asarray(mobility, dtype=float)
+            values = self.mobility
+        if self.mobility.shape != (self.m, self.m):
+            raise ValueError("Mobility matrix must have shape (regions, regions)")
+        if np.any(values < 0):
+            raise ValueError("Mobility must not be negative")
+
+    @classmethod
+    def from_solvers(cls, solvers, mobility, **kwargs):
+        """Couple the regions modelled by several Solvers sharing the same
+        strains and time horizon
+
+        :param solvers: model of each region
+        :type solvers: list
+        :param mobility: (regions, regions) mobility matrix
+        :type mobility: array_like or scipy.sparse matrix
+        :param kwargs: other MetapopulationSolver arguments, such as method
+        :returns: the coupled model
+        :rtype: MetapopulationSolver
+        """
+        first = solvers[0]
+        if any(solver.strains is not first.strains or solver.time != first.time for solver in solvers[1:]):
+            raise ValueError("Solvers must share the same strains and time horizon")
+        return cls([solver.pop for solver in solvers], first.strains, mobility, time=first.time, **kwargs)
+
+    def _birth(self, N):
+        """Birth rate of every region, from its own birth function
+
+        :param N: current population size of each region
+        :type N: numpy.ndarray
+        """
+        births = np.empty(len(N))
+        for func, regions in self._birth_groups:
+            births[regions] = birth_rates(func, N[regions])
+        return births
+
+    def _infectious(self, infected):
+        """Number infected with each strain whom the susceptibles of each
+        region are in contact with, through the mobility matrix
+
+        :param infected: (regions, strains) array of the number infected
+        :type infected: numpy.ndarray
+        """
+        return self.mobility @ infected
+
+    def jac_sparsity(self):
+        """Sparsity pattern of the Jacobian: the blocks of each region, and
+        the S, I_j and cumulative infections of strain j in region a
+        depending on I_j in every region b with mobility[a, b] non-zero
+
+        :returns: matrix with ones where the Jacobian may be non-zero
+        :rtype: scipy.sparse.csr_matrix
+        """
+        n = self.n
+        coupling = np.zeros((3*n + 2, 3*n + 2), dtype=int)
+        for j in range(1, n + 1):
+            coupling[[0, j, j + 2*n + 1], j] = 1
+        regions = scipy.sparse.csr_matrix(self.mobility != 0, dtype=int)
+        pattern = super().jac_sparsity() + scipy.sparse.kron(regions, coupling, format='csr')
+        return (pattern > 0).astype(int)
@@ -0,0 +1,81 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from epistrains.solver import Solver
+
+
+def grid_product(**options):
+    """Build a sweep grid from every combination of Solver arguments
+
+    For example ``grid_product(pop=[p1, p2], strains=[[s1], [s1, s2]], time=[70])``
+    gives four grid points.
+
+    :param options: lists of values for each keyword argument of Solver
+    :type options: list
+    :returns: one dictionary of Solver keyword arguments per grid point
+    :rtype: list
+    """
+    names = list(options)
+    return [dict(zip(names, values)) for values in itertools.product(*options.values())]
+
+
+def _solve_chunk(start, chunk):
+    """Solve a consecutive chunk of grid points in a worker process
+
+    :param start: grid index of the first point in the chunk
+    :type start: int
+    :param chunk: Solver keyword arguments for each grid point
+    :type chunk: list
+    """
+    results = []
+    for i, kwargs in enumerate(chunk):
+        solver = Solver(**kwargs)
+        solver.solve()
+        results.append((start + i, solver))
+    return results
+
+
+def sweep(grid, workers=None, chunksize=None, ordered=False):
+    """Solve a grid of Solver settings over a pool of processes
+
+    Grid points are sent to the workers in chunks, so Population, Strain
+    and birth function objects shared by the points of a chunk are only
+    pickled once. Birth functions must therefore be picklable, as made
+    by make_br or defined at module level, rather than lambdas.
+
+    :param grid: Solver keyword arguments for each grid point, see grid_product
+    :type grid: iterable of dict
+    :param workers: number of worker processes, defaults to the number of
+        CPUs. With one worker the grid is solved in the calling process
+    :type workers: int, optional
+    :param chunksize: number of grid points per task, defaults to spreading
+        the grid over four tasks per worker
+    :type chunksize: int, optional
+    :param ordered: yield results in grid order rather than as they
+        complete, defaults to False
+    :type ordered: bool, optional
+    :returns: generator of (grid index, solved Solver) pairs
+    """
+    grid = list(grid)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Number of workers must be positive")
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(grid)/(4*workers)))
+    chunks = [(start, grid[start:start+chunksize]) for start in range(0, len(grid), chunksize)]
+
+    if workers == 1:
+        for start, chunk in chunks:
+            yield from _solve_chunk(start, chunk)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_solve_chunk, start, chunk) for start, chunk in chunks]
+        for future in (futures if ordered else as_completed(futures)):
+            yield from future.result()
+    finally:
+        # do not start the remaining chunks if the caller stops early
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,305 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib.pylab as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# colours of the S, R and D compartments
+COLOURS_SRD = ["red", "blue", "brown"]
+
+
+def _draw_compartments(fig, solver):
+    """Draws the number of individuals in each compartment over time
+
+    :param fig: figure to draw on
+    :type fig: matplotlib.figure.Figure
+    :param solver: solved model
+    :type solver: Solver
+    """
+    if solver.solution is None:
+        raise ValueError("Must run s.solve() before plotting solutions")
+
+    ax = fig.add_subplot()
+    output_solver = solver.solution
+
+    # Initialise colours and number of strains
+    # number of strains equals #rows - S - R compartments
+    number_strains = output_solver.y.shape[0] - 2
+    colours_I = plt.cm.Greens(np.linspace(0.5, 1, number_strains))
+
+    # Plot the S compartment
+    ax.plot(output_solver.t, output_solver.y[0, :],
+            label="S", color=COLOURS_SRD[0])
+
+    # Plot the I compartments
+    for i in range(1, number_strains+1):
+        ax.plot(output_solver.t, output_solver.y[i, :],
+                label=f"I{i}", color=colours_I[i-1])
+
+    # Plot the R compartment
+    ax.plot(output_solver.t, output_solver.y[-1, :],
+            label="R", color=COLOURS_SRD[1])
+
+    # Plot number of deaths due to virus(es)
+    ax.plot(output_solver.t, solver.deaths, label="D", color=COLOURS_SRD[2])
+
+    ax.legend()
+    ax.set_ylabel("Number of individuals")
+    ax.set_xlabel("Time (days)")
+    fig.tight_layout()
+
+
+def _draw_deaths(fig, solver):
+    """Draws the number of deaths per day and cumulative deaths over time
+
+    :param fig: figure to draw on
+    :type fig: matplotlib.figure.Figure
+    :param solver: solved model
+    :type solver: Solver
+    """
+    if solver.solution is None:
+        raise ValueError("Must run s.solve() before plotting deaths")
+
+    # get output solver and set colour parameter
+    output_solver = solver.solution
+    colours_deaths = ["midnightblue", "brown"]
+
+    ax = fig.add_subplot()
+    # plot daily deaths
+    ax.plot(output_solver.t, solver.deaths, label="Daily", color=colours_deaths[1])
+    ax.set_ylabel("Average number of deaths per day")
+    ax.set_xlabel("Time (days)")
+    # plot cumulative deaths
+    ax2 = ax.twinx()
+    ax2.plot(output_solver.t, solver.daily_cumulative_deaths, label="Cumulative", color=colours_deaths[0])
+    ax2.set_ylabel("Cumulative deaths", color=colours_deaths[0], fontsize=14)
+
+    fig.legend(bbox_to_anchor=(0.8, 0.5))
+    fig.tight_layout()
+
+
+def _draw_fan_chart(fig, solver, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """Draws quantile bands over the members of an ensemble of the number
+    of individuals in each compartment over time
+
+    Each pair of quantiles, taken from the outside in, is drawn as one
+    filled band per compartment, and the median as a line when 0.5 is
+    among the quantiles, so the cost does not grow with the number of
+    members drawn.
+
+    :param fig: figure to draw on
+    :type fig: matplotlib.figure.Figure
+    :param solver: solved ensemble, such as EnsembleSolver or
+        StochasticSolver, whose solution has shape (members, compartments,
+        time points)
+    :param quantiles: quantiles of the members to draw, defaults to
+        (0.05, 0.25, 0.5, 0.75, 0.95)
+    :type quantiles: tuple, optional
+    """
+    if solver.solution is None:
+        raise ValueError("Must run s.solve() before plotting solutions")
+    quantiles = np.sort(np.asarray(quantiles, dtype=float))
+    if len(quantiles) == 0 or quantiles[0] < 0 or quantiles[-1] > 1:
+        raise ValueError("Quantiles must lie between 0 and 1")
+
+    ax = fig.add_subplot()
+    output_solver = solver.solution
+    t = output_solver.t
+    number_strains = output_solver.y.shape[1] - 2
+    labels = ["S"] + [f"I{i}" for i in range(1, number_strains+1)] + ["R", "D"]
+    colours = ([COLOURS_SRD[0]] + list(plt.cm.Greens(np.linspace(0.5, 1, number_strains))) +
+               COLOURS_SRD[1:])
+    # quantiles of every compartment at once, of shape
+    # (quantiles, compartments, time points)
+    values = np.quantile(np.concatenate((output_solver.y, solver.deaths[:, np.newaxis]), axis=1),
+                         quantiles, axis=0)
+
+    bands = len(quantiles)//2
+    for c, (label, colour) in enumerate(zip(labels, colours)):
+        for i in range(bands):
+            # inner bands are drawn darker, over the outer ones
+            ax.fill_between(t, values[i, c], values[-1-i, c], color=colour, linewidth=0,
+                            alpha=0.15 + 0.35*i/bands, label=label if i == bands - 1 else None)
+        if len(quantiles) % 2:
+            ax.plot(t, values[bands, c], color=colour, label=None if bands else label)
+
+    ax.legend()
+    ax.set_ylabel("Number of individuals")
+    ax.set_xlabel("Time (days)")
+    fig.tight_layout()
+
+
+# functions drawing each kind of figure
+KINDS = {'compartments': _draw_compartments, 'deaths': _draw_deaths, 'fan': _draw_fan_chart}
+
+
+def make_plot(solver):
+    """Creates the plot of the number of individuals
+    in each compartment over time
+
+    :param solver: solved model
+    :type solver: Solver
+    """
+    if solver.solution is None:
+        raise ValueError("Must run s.solve() before plotting solutions")
+
+    fig = plt.figure()
+    _draw_compartments(fig, solver)
+    return fig
+
+
+def plot_compartments(solver):
+    """Function to show the compartments plot created by make_plot
+
+    :param solver: solved model
+    :type solver: Solver
+    """
+    make_plot(solver)
+    plt.show()
+
+
+def save_compartments(solver, save_path='epistrains_output.png'):
+    """Function to save the compartments plot created by make_plot,
+    closing the figure afterwards
+
+    :param solver: solved model
+    :type solver: Solver
+    :param save_path: gives path to which figure should be saved
+    :type save_path: string
+    """
+    fig = make_plot(solver)
+    plt.savefig(save_path, dpi=300)
+    plt.close(fig)
+
+
+def make_death_plot(solver):
+    """Creates the plot of the number of deaths per day
+    and cumulative deaths over time
+
+    :param solver: solved model
+    :type solver: Solver
+    """
+    if solver.solution is None:
+        raise ValueError("Must run s.solve() before plotting deaths")
+
+    fig = plt.figure()
+    _draw_deaths(fig, solver)
+    return fig
+
+
+def plot_death(solver):
+    """Function to show the deaths plot created by make_death_plot
+
+    :param solver: solved model
+    :type solver: Solver
+    """
+    make_death_plot(solver)
+    plt.show()
+
+
+def save_death(solver, save_path='epistrains_deaths_output.png'):
+    """Function to save the deaths plot created by make_death_plot,
+    closing the figure afterwards
+
+    :param solver: solved model
+    :type solver: Solver
+    :param save_path: gives path to which figure should be saved
+    :type save_path: string
+    """
+    fig = make_death_plot(solver)
+    plt.savefig(save_path, dpi=300)
+    plt.close(fig)
+
+
+def make_figure(solver, kind='compartments', **options):
+    """Creates a figure outside of pyplot, rendered with the Agg backend,
+    which needs no display and is freed as soon as it is no longer
+    referenced, unlike the figures of make_plot
+
+    :param solver: solved model
+    :type solver: Solver, EnsembleSolver or StochasticSolver
+    :param kind: 'compartments' or 'deaths' for a single run, or 'fan' for
+        the quantile bands of an ensemble, defaults to 'compartments'
+    :type kind: string, optional
+    :param options: other arguments of the drawing, such as the quantiles
+        of a fan chart
+    :rtype: matplotlib.figure.Figure
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Kind of figure must be one of {tuple(KINDS)}")
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    KINDS[kind](fig, solver, **options)
+    return fig
+
+
+def save_figure(solver, save_path, kind='compartments', dpi=300, **options):
+    """Saves a figure made by make_figure, without going through pyplot
+
+    :param solver: solved model
+    :type solver: Solver, EnsembleSolver or StochasticSolver
+    :param save_path: gives path to which figure should be saved
+    :type save_path: string
+    :param kind: kind of figure, see make_figure, defaults to 'compartments'
+    :type kind: string, optional
+    :param dpi: resolution in dots per inch, defaults to 300
+    :type dpi: int, optional
+    """
+    fig = make_figure(solver, kind, **options)
+    fig.savefig(save_path, dpi=dpi)
+    fig.clear()
+
+
+def _save_chunk(chunk, kind, dpi, options):
+    """Save a chunk of figures in a worker process
+
+    :param chunk: (solver, save path) pairs
+    :type chunk: list
+    """
+    for solver, save_path in chunk:
+        save_figure(solver, save_path, kind, dpi, **options)
+
+
+def save_figures(solvers, save_paths, kind='compartments', dpi=300, workers=None, **options):
+    """Saves one figure per solved model over a pool of processes, as
+    made by make_figure
+
+    The solved models are pickled to the workers, so, as for sweep, their
+    birth functions must be picklable.
+
+    :param solvers: solved models
+    :type solvers: list
+    :param save_paths: path of the figure of each model
+    :type save_paths: list
+    :param kind: kind of figure, see make_figure, defaults to 'compartments'
+    :type kind: string, optional
+    :param dpi: resolution in dots per inch, defaults to 300
+    :type dpi: int, optional
+    :param workers: number of worker processes, defaults to the number of
+        CPUs. With one worker the figures are saved in the calling process
+    :type workers: int, optional
+    :param options: other arguments of the drawing, see make_figure
+    """
+    solvers = list(solvers)
+    save_paths = list(save_paths)
+    if len(solvers) != len(save_paths):
+        raise ValueError("Must give one save path per model")
+    if kind not in KINDS:
+        raise ValueError(f"Kind of figure must be one of {tuple(KINDS)}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Number of workers must be positive")
+
+    pairs = list(zip(solvers, save_paths))
+    if workers == 1:
+        _save_chunk(pairs, kind, dpi, options)
+        return
+    chunksize = max(1, math.ceil(len(pairs)/(4*workers)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_save_chunk, pairs[start:start+chunksize], kind, dpi, options)
+                   for start in range(0, len(pairs), chunksize)]
+        for future in futures:
+            future.result()
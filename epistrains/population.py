@@ -1,4 +1,4 @@
-import math
+import numpy as np
 
 
 class Population:
@@ -11,9 +11,11 @@ class Population:
     :param size: initial population size
     :type size: int
     :param birth_function: function to govern birth rate
-        exponential birth rate function created with make_br() can be used
-        alternatively provide another function  in terms of N
-        for a constant birth rate use: lambda N: constant
+        exponential birth rate function created with make_br() can be used,
+        or the built-in ConstantBirth and LogisticBirth,
+        alternatively provide another function  in terms of N, which should
+        accept a float N and ideally an array of N.
+        For a constant birth rate use: ConstantBirth(constant)
     :type birth_function: function
     :param waning: constant waning immunity rate
     :type waning: float
@@ -21,6 +23,9 @@ class Population:
     :type immunity: float
     """
 
+    # fixed attributes rather than a __dict__, as many populations may be made
+    __slots__ = ('death_rate', 'init_size', 'birth_rate', 'waning_rate', 'current_immune')
+
     def __init__(self, death: float, size: int, birth_function=None, waning=0.0, immunity=0.0):
         """Initialize the class and take general population parameters relating to birth and death rates"""
         if not (isinstance(immunity, float) or isinstance(immunity, int)):
@@ -40,6 +45,122 @@ class Population:
             raise TypeError("Waning immunity rate must be of type float")
 
 
+def _as_population_size(N):
+    """Convert a population size, or an array of them, to floats
+
+    :param N: current population size
+    :type N: int, float or numpy.ndarray
+    """
+    N = np.asarray(N)
+    if not (np.issubdtype(N.dtype, np.integer) or np.issubdtype(N.dtype, np.floating)):
+        raise TypeError("Population size must be numeric")
+    return N.astype(float)
+
+
+class ConstantBirth:
+    """Constant birth rate c, independent of the population size
+
+    Like the other built-in birth functions it accepts a float or an array
+    of population sizes and gives one birth rate per size, and provides its
+    derivative dB/dN for the Jacobian.
+
+    :param c: number of births per day
+    :type c: float
+    """
+
+    def __init__(self, c: float):
+        self.c = c
+
+    def __call__(self, N):
+        """Birth rate for population size N
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        return np.full_like(_as_population_size(N), self.c)[()]
+
+    def derivative(self, N):
+        """Derivative of the birth rate dB/dN
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        return np.zeros_like(_as_population_size(N))[()]
+
+    def __repr__(self):
+        return f"ConstantBirth(c={self.c!r})"
+
+
+class ExponentialBirth:
+    """Exponential birth rate N*a*exp(-k*N), as made by make_br
+
+    :param a: birth rate constant
+    :type a: float
+    :param k: birth rate exponent constant
+    :type k: float
+    """
+
+    def __init__(self, a: float, k: float):
+        self.a = a
+        self.k = k
+
+    def __call__(self, N):
+        """Birth rate for population size N
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        N = _as_population_size(N)
+        return (N * self.a * np.exp(-self.k * N))[()]
+
+    def derivative(self, N):
+        """Derivative of the birth rate dB/dN
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        N = _as_population_size(N)
+        return (self.a * np.exp(-self.k * N) * (1 - self.k * N))[()]
+
+    def __repr__(self):
+        return f"ExponentialBirth(a={self.a!r}, k={self.k!r})"
+
+
+class LogisticBirth:
+    """Logistic birth rate a*N*(1 - N/k) with carrying capacity k
+
+    :param a: birth rate constant
+    :type a: float
+    :param k: carrying capacity
+    :type k: float
+    """
+
+    def __init__(self, a: float, k: float):
+        self.a = a
+        self.k = k
+
+    def __call__(self, N):
+        """Birth rate for population size N
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        N = _as_population_size(N)
+        return (self.a * N * (1 - N / self.k))[()]
+
+    def derivative(self, N):
+        """Derivative of the birth rate dB/dN
+
+        :param N: current population size
+        :type N: float or numpy.ndarray
+        """
+        N = _as_population_size(N)
+        return (self.a * (1 - 2 * N / self.k))[()]
+
+    def __repr__(self):
+        return f"LogisticBirth(a={self.a!r}, k={self.k!r})"
+
+
 def make_br(a: float, k: float):
     """Define exponential birth rate function
     Parameters
@@ -54,15 +175,41 @@ def make_br(a: float, k: float):
     if not isinstance(k, float):
         raise TypeError("Constant k must be of type float")
 
-    def br(N: int):
-        """Generate exponential birth rate function
-        Parameters
+    return ExponentialBirth(a, k)
+
+
+def birth_rates(birth_function, N):
+    """Evaluate a birth function for an array of population sizes, calling
+    it once on the whole array when it supports arrays, and once per size
+    otherwise
+
+    :param birth_function: function to govern birth rate
+    :type birth_function: function
+    :param N: population sizes
+    :type N: numpy.ndarray
+    :returns: birth rate for each population size
+    :rtype: numpy.ndarray
+    """
+    try:
+        births = np.asarray(birth_function(N), dtype=float)
+    except (TypeError, ValueError):
+        births = None
+    if births is None or births.shape not in (N.shape, ()):
+        births = np.array([birth_function(size) for size in N.ravel()], dtype=float).reshape(N.shape)
+    return np.broadcast_to(births, N.shape)
 
-        :param N: current population size
-        :type N: int
-        """
-        if not isinstance(N, int):
-            raise TypeError("Population size must be of type int")
 
-        return N * a * math.exp(-k * N)
-    return br
+def birth_derivative(birth_function, N):
+    """Derivative dB/dN of a birth function, from its derivative method
+    when it has one, or a central difference otherwise
+
+    :param birth_function: function to govern birth rate
+    :type birth_function: function
+    :param N: current population size
+    :type N: float
+    """
+    derivative = getattr(birth_function, 'derivative', None)
+    if derivative is not None:
+        return derivative(N)
+    h = 1e-6 * max(1.0, abs(N))
+    return (birth_function(N + h) - birth_function(N - h)) / (2 * h)
@@ -0,0 +1,241 @@
+import copy
+import itertools
+import json
+import os
+import numpy as np
+from epistrains.parallel import sweep
+from epistrains.population import Population, ConstantBirth, ExponentialBirth, LogisticBirth
+from epistrains.strain import Strain
+
+# built-in birth functions by the name of their form in scenario files
+BIRTH_FORMS = {'constant': ConstantBirth, 'exponential': ExponentialBirth, 'logistic': LogisticBirth}
+
+# Solver arguments which may be given by a scenario
+SOLVER_OPTIONS = ('time', 'method', 'rtol', 'atol', 'resolution', 't_eval', 'single_pass', 'cross_immunity')
+
+
+def load_scenario_file(path):
+    """Read a scenario file, in JSON or, with a .toml extension, TOML
+
+    A scenario file has a table of named populations, a table of named
+    strains, and a list of scenarios, each picking one population and some
+    of the strains, with Solver options such as the time horizon and
+    ranges of parameters to sweep, for example in TOML::
+
+        [defaults]
+        time = 70
+
+        [populations.city]
+        death = 0.000006
+        size = 150000
+        birth = {form = "exponential", a = 10.0, k = 0.001}
+
+        [strains.I1]
+        CFR = 0.00007
+        recovery_time = 7
+        R0 = 3.14
+        infected = 150
+
+        [[scenarios]]
+        name = "baseline"
+        population = "city"
+        strains = ["I1"]
+        ranges = {"I1.R0" = [2.0, 3.0], "population.death" = {start = 1e-6, stop = 1e-5, num = 4}}
+
+    Populations take death, size, waning, immunity and birth, whose form is
+    constant (with c), exponential (with a and k) or logistic (with a and
+    k). Strains take CFR, recovery_time, R0, infected and delay. Ranges map
+    a parameter, written as population.<name>, population.birth.<name>,
+    <strain>.<name> or a Solver option, to a list of values or to start,
+    stop and num for evenly spaced values, and every combination of the
+    ranges of a scenario is run. Defaults are Solver options shared by all
+    scenarios.
+
+    :param path: path of the scenario file
+    :type path: string
+    :returns: the scenario description
+    :rtype: dict
+    """
+    if os.path.splitext(path)[1].lower() == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _require(spec, fields, what):
+    """Check a description in a scenario file has the required fields
+
+    :param spec: the description
+    :type spec: dict
+    :param fields: names of the required fields
+    :type fields: tuple
+    :param what: what is described, for the error message
+    :type what: string
+    """
+    missing = [field for field in fields if field not in spec]
+    if missing:
+        raise ValueError(f"{what} is missing {', '.join(missing)}")
+
+
+def _make_population(spec, scenario):
+    """Population from its description in a scenario file, for the
+    scenario of that name"""
+    _require(spec, ('death', 'size'), f"Population of scenario {scenario!r}")
+    birth = spec.get('birth')
+    if birth is not None:
+        birth = dict(birth)
+        form = birth.pop('form', 'exponential')
+        if form not in BIRTH_FORMS:
+            raise ValueError(f"Birth form must be one of {tuple(BIRTH_FORMS)}")
+        birth = BIRTH_FORMS[form](**{name: float(value) for name, value in birth.items()})
+    return Population(float(spec['death']), int(spec['size']), birth, waning=float(spec.get('waning', 0.0)),
+                      immunity=float(spec.get('immunity', 0.0)))
+
+
+def _make_strain(spec, scenario, strain):
+    """Strain from its description in a scenario file, for the scenario
+    and strain of those names"""
+    _require(spec, ('CFR', 'recovery_time', 'R0', 'infected'), f"Strain {strain!r} of scenario {scenario!r}")
+    return Strain(float(spec['CFR']), float(spec['recovery_time']), float(spec['R0']), int(spec['infected']),
+                  float(spec.get('delay', 0.0)))
+
+
+def _range_values(values):
+    """Values of a range, given as a list or as start, stop and num"""
+    if isinstance(values, dict):
+        return np.linspace(values['start'], values['stop'], int(values['num'])).tolist()
+    if not isinstance(values, list) or len(values) == 0:
+        raise ValueError("Ranges must be non-empty lists or have start, stop and num")
+    return values
+
+
+def _set_parameter(run, path, value):
+    """Set a parameter of the description of a run, given by its path"""
+    head, _, rest = path.partition('.')
+    if not rest:
+        if head not in SOLVER_OPTIONS:
+            raise ValueError(f"Unknown parameter {path!r}")
+        run['options'][head] = value
+        return
+    if head == 'population':
+        target = run['population']
+    elif head in run['strains']:
+        target = run['strains'][head]
+    else:
+        raise ValueError(f"Unknown parameter {path!r}")
+    *parents, name = rest.split('.')
+    for parent in parents:
+        target = target.setdefault(parent, {})
+    target[name] = value
+
+
+def expand_runs(description):
+    """Every run of the scenarios of a scenario file, one per combination
+    of the ranges of each scenario
+
+    :param description: scenario description, see load_scenario_file
+    :type description: dict
+    :returns: the scenario name, swept parameter values and Solver keyword
+        arguments of each run
+    :rtype: list
+    """
+    populations = description.get('populations', {})
+    strains = description.get('strains', {})
+    defaults = description.get('defaults', {})
+    scenarios = description.get('scenarios', [])
+    if len(scenarios) == 0:
+        raise ValueError("Scenario file must have at least one scenario")
+
+    runs = []
+    for k, scenario in enumerate(scenarios):
+        name = scenario.get('name', f'scenario_{k}')
+        try:
+            base = {'population': copy.deepcopy(populations[scenario['population']]),
+                    'strains': {s: copy.deepcopy(strains[s]) for s in scenario['strains']},
+                    'options': {**defaults, **{o: scenario[o] for o in SOLVER_OPTIONS if o in scenario}}}
+        except KeyError as e:
+            raise ValueError(f"Scenario {name!r} refers to unknown or missing {e}") from None
+        unknown = set(base['options']) - set(SOLVER_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown Solver options {sorted(unknown)}")
+        ranges = scenario.get('ranges', {})
+        paths = list(ranges)
+        for values in itertools.product(*(_range_values(ranges[path]) for path in paths)):
+            run = copy.deepcopy(base)
+            for path, value in zip(paths, values):
+                _set_parameter(run, path, value)
+            kwargs = dict(run['options'], pop=_make_population(run['population'], name),
+                          strains=[_make_strain(spec, name, strain) for strain, spec in run['strains'].items()])
+            runs.append((name, dict(zip(paths, values)), list(run['strains']), kwargs))
+    return runs
+
+
+def run_scenarios(description, workers=None):
+    """Solve every run of the scenarios of a scenario file in parallel, see
+    sweep, and gather the results as columns with one row per run and
+    stored time point
+
+    The columns are run (the index of the run), t, S, R, and for each strain
+    named in the file I_<strain>, deaths_<strain> and infections_<strain>,
+    the last two being cumulative, which are NaN for runs without that
+    strain. Columns starting with runs. have one row per run instead:
+    runs.scenario, the name of its scenario, and runs.<parameter>, the
+    value of each swept parameter, NaN (or an empty string for parameters
+    which are not numbers) when not swept in that run.
+
+    :param description: scenario description, see load_scenario_file
+    :type description: dict
+    :param workers: number of worker processes, defaults to the number of CPUs
+    :type workers: int, optional
+    :returns: one numpy array per column
+    :rtype: dict
+    """
+    runs = expand_runs(description)
+    solvers = [None]*len(runs)
+    for index, solver in sweep([kwargs for _, _, _, kwargs in runs], workers=workers):
+        solvers[index] = solver
+
+    strain_names = list(dict.fromkeys(s for _, _, names, _ in runs for s in names))
+    lengths = [len(solver.solution.t) for solver in solvers]
+    columns = {'run': np.repeat(np.arange(len(runs), dtype=np.int64), lengths),
+               't': np.concatenate([solver.solution.t for solver in solvers]),
+               'S': np.concatenate([solver.solution.y[0] for solver in solvers]),
+               'R': np.concatenate([solver.solution.y[solver.n + 1] for solver in solvers])}
+    for strain in strain_names:
+        for prefix in ('I', 'deaths', 'infections'):
+            columns[f'{prefix}_{strain}'] = np.full(sum(lengths), np.nan)
+    start = 0
+    for (_, _, names, _), solver, length in zip(runs, solvers, lengths):
+        rows = slice(start, start + length)
+        for j, strain in enumerate(names):
+            columns[f'I_{strain}'][rows] = solver.solution.y[j + 1]
+            columns[f'deaths_{strain}'][rows] = solver.solution.cumulative_deaths[j]
+            columns[f'infections_{strain}'][rows] = solver.solution.cumulative_infections[j]
+        start += length
+
+    columns['runs.scenario'] = np.array([name for name, _, _, _ in runs])
+    for path in dict.fromkeys(path for _, values, _, _ in runs for path in values):
+        swept = [values.get(path) for _, values, _, _ in runs]
+        if all(value is None or isinstance(value, (int, float)) for value in swept):
+            columns[f'runs.{path}'] = np.array([np.nan if value is None else value for value in swept], dtype=float)
+        else:
+            # other values, such as methods, are kept as strings
+            columns[f'runs.{path}'] = np.array(['' if value is None else str(value) for value in swept])
+    return columns
+
+
+def write_columns(path, columns):
+    """Write columns to a compressed .npz file, holding plain arrays which
+    np.load reads without pickle
+
+    :param path: path of the file
+    :type path: string
+    :param columns: one numpy array per column
+    :type columns: dict
+    """
+    np.savez_compressed(path, **columns)
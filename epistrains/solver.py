@@ -1,15 +1,401 @@
+import time
 from typing import List
 import numpy as np
 import scipy.integrate
-from epistrains.population import Population
-from epistrains.strain import Strain
-import matplotlib.pylab as plt
+import scipy.sparse
+from epistrains.checkpoint import Checkpoint
+from epistrains.population import Population, birth_derivative
+from epistrains.stats import SegmentStats, SolverStats
+from epistrains.strain import Strain, StrainTable
+from epistrains.summary import Summary
 
 
 class Solution:
-    def __init__(self, n_comps):
-        self.t = np.array([])
-        self.y = np.array([[] for _ in range(n_comps)])
+    """Time points and compartment values of a model run, stored in
+    arrays allocated up front and filled in place segment by segment
+
+    The compartments S, I_j and R are in y. When the run also integrates
+    the cumulative deaths and infections of each strain, these follow the
+    compartments in the state and are available as cumulative_deaths and
+    cumulative_infections. Runs with cross-immunity between strains also
+    store the number recovered from each strain, in recovered_by_strain.
+
+    :param n_comps: number of compartments, or the shape of the
+        compartments for batched runs
+    :type n_comps: int or tuple
+    :param n_times: number of time points, defaults to 0
+    :type n_times: int, optional
+    :param dtype: data type used to store the compartment values,
+        e.g. numpy.float32 to halve memory, defaults to numpy.float64
+    :type dtype: numpy.dtype, optional
+    :param n_strains: number of strains whose cumulative deaths and
+        infections are stored, defaults to 0
+    :type n_strains: int, optional
+    :param n_recovered: number of strains whose recovered individuals are
+        stored separately, defaults to 0
+    :type n_recovered: int, optional
+    """
+    def __init__(self, n_comps, n_times=0, dtype=np.float64, n_strains=0, n_recovered=0):
+        shape = tuple(np.atleast_1d(n_comps))
+        n_comps = shape[-1]
+        self.t = np.empty(n_times)
+        self.state = np.empty(shape[:-1] + (n_comps + 2*n_strains + n_recovered, n_times), dtype=dtype)
+        self.y = self.state[..., :n_comps, :]
+        self.cumulative_deaths = self.state[..., n_comps:n_comps + n_strains, :]
+        self.cumulative_infections = self.state[..., n_comps + n_strains:n_comps + 2*n_strains, :]
+        self.recovered_by_strain = self.state[..., n_comps + 2*n_strains:, :]
+        self._filled = 0
+        # start times and continuous solutions of each integration segment
+        self._dense_starts = []
+        self._dense = []
+
+    def append(self, t, y):
+        """Copy the next block of time points into the preallocated arrays
+
+        :param t: time points of the block
+        :type t: numpy.ndarray
+        :param y: state at each time point, with time along the last axis
+        :type y: numpy.ndarray
+        """
+        end = self._filled + len(t)
+        if end > len(self.t):
+            raise ValueError("Solution is already full")
+        self.t[self._filled:end] = t
+        self.state[..., self._filled:end] = y
+        self._filled = end
+
+    def add_dense(self, start, dense):
+        """Add the continuous solution of the next integration segment
+
+        :param start: start time of the segment
+        :type start: float
+        :param dense: interpolant of the segment, as returned by solve_ivp
+            with dense_output=True
+        :type dense: scipy.integrate.OdeSolution
+        """
+        self._dense_starts.append(start)
+        self._dense.append(dense)
+
+    @property
+    def has_dense(self):
+        """Whether the solution can be interpolated with __call__"""
+        return len(self._dense) > 0
+
+    def __call__(self, t):
+        """Interpolate the compartments at any time within the run without
+        solving again. At a delay the state after the strain is seeded is given
+
+        :param t: time points to evaluate
+        :type t: float or array_like
+        :returns: compartment values with time along the last axis
+        :rtype: numpy.ndarray
+        """
+        if not self.has_dense:
+            raise ValueError("Solver must be run with dense_output=True to interpolate the solution")
+        t = np.asarray(t, dtype=float)
+        end = self._dense[-1].t_max
+        if np.any(t < self._dense_starts[0]) or np.any(t > end):
+            raise ValueError("Times must lie within the solved time span")
+        segment = np.searchsorted(self._dense_starts, t.ravel(), side='right') - 1
+        y = np.empty((self.y.shape[0], t.size))
+        for k in np.unique(segment):
+            mask = segment == k
+            y[:, mask] = self._dense[k](t.ravel()[mask])[:self.y.shape[0]]
+        return y.reshape(y.shape[:1] + t.shape)
+
+
+def segment_grids(time_pts, resolution=10, t_eval=None, extra=None):
+    """Time points passed to the integrator for each segment between
+    consecutive pause times, and which of them are stored in the solution.
+    Each segment starts and ends at its pause times; a point shared by two
+    segments is stored once, with the state after seeding
+
+    :param time_pts: sorted times at which the integration is paused
+    :type time_pts: list
+    :param resolution: number of output points per day, or None to store
+        no points, defaults to 10
+    :type resolution: float, optional
+    :param t_eval: explicit output times, which take precedence over the
+        resolution, defaults to None
+    :type t_eval: array_like, optional
+    :param extra: times at which the integrator must also evaluate the
+        state, without storing it in the solution, defaults to None
+    :type extra: array_like, optional
+    :returns: a (time points, boolean mask of stored points) pair per segment
+    :rtype: list
+    """
+    grids = []
+    last = len(time_pts) - 2
+    for i, (start, end) in enumerate(zip(time_pts[:-1], time_pts[1:])):
+        if t_eval is not None:
+            t_eval = np.asarray(t_eval, dtype=float)
+            inside = t_eval[(t_eval >= start) & ((t_eval < end) | ((t_eval == end) & (i == last)))]
+            points = np.unique(np.concatenate(([start], inside, [end])))
+            stored = np.isin(points, inside)
+        elif resolution is None:
+            points = np.array([start, end])
+            stored = np.zeros(2, dtype=bool)
+        else:
+            points = np.linspace(start, end, max(int((end-start)*resolution), 2))
+            stored = np.ones(len(points), dtype=bool)
+            stored[-1] = i == last
+        if extra is not None:
+            outputs = points[stored]
+            points = np.union1d(points, extra[(extra >= start) & (extra <= end)])
+            stored = np.isin(points, outputs)
+        grids.append((points, stored))
+    return grids
+
+
+def set_rates(model, pop, strains):
+    """Set the strain parameters, rates and state layout shared by Solver
+    and StochasticSolver on a model, in place
+
+    :param model: the model
+    :type model: Solver or StochasticSolver
+    :param pop: population information relating to birth rate
+        and death rate
+    :type pop: Population
+    :param strains: a list of strains to be infected, or a StrainTable
+    :type strains: List or StrainTable
+    """
+    # number of strains, which should be at least one
+    model.n = n = len(strains)
+    if n == 0:
+        raise ValueError('Number of strains must be positive')
+    # the strain parameters as columns, as given or made from the list
+    model._table = StrainTable.from_strains(strains)
+    model.n_sus = pop.init_size - int(model._table.infected.sum()) - pop.current_immune
+    # store arrays of death rate(alpha), transmission rate(beta),
+    # and recover rate(nu), one entry per strain
+    model.alpha = model._table.alpha
+    model.beta_scaled = model._table.beta_unscaled/model.n_sus
+    model.nu = model._table.nu
+    # store population related parameters
+    model.b = pop.death_rate
+    model.w = pop.waning_rate
+    model.recovered = pop.current_immune
+    model.func_birth = pop.birth_rate
+    # the state holds S, each I_j, R, then the cumulative virus deaths
+    # and cumulative infections of each strain
+    model._deaths = slice(n + 2, 2*n + 2)
+    model._infections = slice(2*n + 2, 3*n + 2)
+
+
+def pause_times(delays, time, start=0):
+    """Start, end and strain delay times at which a run pauses to seed
+    strains, leaving out strains introduced after its end, which are never
+    seeded
+
+    :param delays: delay of each strain, of any shape
+    :type delays: numpy.ndarray
+    :param time: end time of the run
+    :type time: float
+    :param start: start time of the run, defaults to 0
+    :type start: float, optional
+    :returns: the sorted pause times
+    :rtype: list
+    """
+    times = set(delays[delays < time].ravel().tolist())
+    times.add(start)
+    times.add(time)
+    return sorted(t for t in times if t >= start)
+
+
+def day_edges(time):
+    """Start and end of every day of a run, at which deaths are binned
+
+    :param time: end time of the run
+    :type time: float
+    :rtype: numpy.ndarray
+    """
+    return np.union1d(np.arange(np.ceil(time)), [time])
+
+
+def count_virus_deaths(solution):
+    """Number of deaths caused by the viruses, from the cumulative deaths
+    of each strain stored in a solution, with any leading axes of batched
+    runs kept
+
+    :param solution: solution of a run
+    :type solution: Solution
+    :returns: the cumulative deaths at each time point, and the average
+        deaths per day since the previous time point, so virus death is
+        shown on the next timestamp
+    :rtype: tuple
+    """
+    cumulative = solution.cumulative_deaths.sum(axis=-2).astype(float)
+    deaths = np.zeros(cumulative.shape)
+    deaths[..., 1:] = np.diff(cumulative, axis=-1)/np.diff(solution.t)
+    return cumulative, deaths
+
+
+def integrate_stepped(fun, t_eval, y0, options, first_step=None, dense_output=False, reduce=None, stats=None,
+                      step_hook=None):
+    """Integrate from the first to the last output time point by stepping
+    the scipy.integrate solver class directly, sampling the output time
+    points from the dense output of each step
+
+    :param fun: right hand side, called as fun(t, y)
+    :type fun: function
+    :param t_eval: output time points, from the start to the end of the segment
+    :type t_eval: numpy.ndarray
+    :param y0: state at the first time point
+    :type y0: numpy.ndarray
+    :param options: integrator options as passed to solve_ivp, including the method
+    :type options: dict
+    :param first_step: initial step size, defaults to None which lets the
+        solver choose
+    :type first_step: float, optional
+    :param dense_output: also return the continuous solution, defaults to False
+    :type dense_output: bool, optional
+    :param reduce: function called as reduce(t, y) with the output time points
+        reached by each step and their states, in which case the states are not
+        stored, defaults to None
+    :type reduce: function, optional
+    :param stats: statistics of the segment, filled in when given,
+        defaults to None
+    :type stats: SegmentStats, optional
+    :param step_hook: function called as step_hook(t) after each step,
+        which can stop the integration by raising, defaults to None
+    :type step_hook: function, optional
+    :returns: the state at each output time point (only the final state when
+        reduce is given), the continuous solution or None, and the last step
+        size not shortened to stop at the end
+    :rtype: tuple
+    """
+    options = dict(options)
+    method = getattr(scipy.integrate, options.pop('method'))
+    if first_step is not None:
+        first_step = min(first_step, t_eval[-1] - t_eval[0])
+    solver = method(fun, t_eval[0], y0, t_eval[-1], first_step=first_step, **options)
+    # every attempted step of an explicit Runge-Kutta method takes n_stages
+    # evaluations, so the rejected steps follow from the evaluation count
+    n_stages = getattr(solver, 'n_stages', None)
+    output = _Output(t_eval, y0, reduce)
+    step = first_step
+    ts, interpolants = [solver.t], []
+    steps = rejected = 0
+    while solver.status == 'running':
+        rejected += _advance(solver, n_stages)
+        steps += 1
+        if step_hook is not None:
+            step_hook(solver.t)
+        if solver.t < t_eval[-1]:
+            step = solver.step_size
+        if output.reaches(solver.t) or dense_output:
+            interpolant = solver.dense_output()
+            output.sample(solver.t, interpolant)
+            if dense_output:
+                ts.append(solver.t)
+                interpolants.append(interpolant)
+    _fill_stats(stats, solver, steps, rejected if n_stages is not None else None)
+    dense = scipy.integrate.OdeSolution(ts, interpolants) if dense_output else None
+    return output.result(solver.y), dense, step
+
+
+class _Output:
+    """Output time points of a segment, filled in or passed to reduce as
+    the steps of the integrator reach them, see integrate_stepped
+
+    :param t_eval: output time points, from the start to the end of the segment
+    :type t_eval: numpy.ndarray
+    :param y0: state at the first time point
+    :type y0: numpy.ndarray
+    :param reduce: function receiving the output time points and states of
+        each step instead of storing them, or None
+    :type reduce: function
+    """
+
+    def __init__(self, t_eval, y0, reduce):
+        self.t_eval = t_eval
+        self.reduce = reduce
+        self.y = None
+        if reduce is None:
+            self.y = np.empty((len(y0), len(t_eval)))
+            self.y[:, 0] = y0
+        else:
+            reduce(t_eval[:1], y0[:, np.newaxis])
+        self.filled = 1
+
+    def reaches(self, t):
+        """Whether a step ending at t reaches output time points not yet filled"""
+        return np.searchsorted(self.t_eval, t, side='right') > self.filled
+
+    def sample(self, t, interpolant):
+        """Fill in the output time points up to t from the interpolant of
+        the step ending there"""
+        reached = np.searchsorted(self.t_eval, t, side='right')
+        if reached > self.filled:
+            points = self.t_eval[self.filled:reached]
+            if self.reduce is None:
+                self.y[:, self.filled:reached] = interpolant(points)
+            else:
+                self.reduce(points, interpolant(points))
+            self.filled = reached
+
+    def result(self, y_end):
+        """States at the output time points, or only the final state when
+        they were passed to reduce"""
+        return self.y if self.reduce is None else y_end[:, np.newaxis]
+
+
+def _advance(solver, n_stages):
+    """Take one step of a scipy.integrate solver
+
+    :param solver: the solver
+    :type solver: scipy.integrate.OdeSolver
+    :param n_stages: number of stages of an explicit Runge-Kutta method, or None
+    :type n_stages: int
+    :returns: the number of steps rejected before it, 0 when unknown
+    :rtype: int
+    """
+    nfev = solver.nfev
+    message = solver.step()
+    if solver.status == 'failed':
+        raise RuntimeError(message)
+    return 0 if n_stages is None else (solver.nfev - nfev)//n_stages - 1
+
+
+def _fill_stats(stats, solver, steps, rejected):
+    """Record the counts of a segment in its statistics, if given
+
+    :param stats: statistics of the segment, or None
+    :type stats: SegmentStats
+    :param solver: scipy.integrate solver which integrated the segment
+    :type solver: scipy.integrate.OdeSolver
+    :param steps: number of accepted steps
+    :type steps: int
+    :param rejected: number of rejected steps, or None when unknown
+    :type rejected: int
+    """
+    if stats is not None:
+        stats.nfev, stats.njev, stats.nlu = solver.nfev, solver.njev, solver.nlu
+        stats.steps = steps
+        stats.rejected = rejected
+
+
+def _as_cross_immunity(matrix, n):
+    """Check a cross-immunity matrix, keeping scipy.sparse matrices sparse
+    in CSR format
+
+    :param matrix: protection of those recovered from each strain (rows)
+        against infection with each strain (columns)
+    :type matrix: array_like or scipy.sparse matrix
+    :param n: number of strains
+    :type n: int
+    """
+    if scipy.sparse.issparse(matrix):
+        matrix = scipy.sparse.csr_matrix(matrix, dtype=float)
+        values = matrix.data
+    else:
+        matrix = np.asarray(matrix, dtype=float)
+        values = matrix
+    if matrix.shape != (n, n):
+        raise ValueError("Cross-immunity matrix must have shape (strains, strains)")
+    if np.any(values < 0) or np.any(values > 1):
+        raise ValueError("Cross-immunity must lie between 0 and 1")
+    return matrix
 
 
 class Solver:
@@ -20,192 +406,520 @@ class Solver:
     :param pop: population information relating to birth rate
         and death rate
     :type pop: Population
-    :param strains: a list of strains to be infected
-    :type strains: List
+    :param strains: a list of strains to be infected, or a StrainTable
+    :type strains: List or StrainTable
     :param time: days over which the system should be solved for,
         defaults to 1
     :type time: float or integer, optional
+    :param method: integration method passed to scipy.integrate.solve_ivp,
+        use an implicit method ('BDF', 'Radau' or 'LSODA') for stiff systems,
+        defaults to 'RK45'
+    :type method: string, optional
+    :param rtol: relative tolerance of the integrator, defaults to 1e-3
+    :type rtol: float, optional
+    :param atol: absolute tolerance of the integrator, defaults to 1e-6
+    :type atol: float, optional
+    :param dtype: data type used to store the solution, defaults to
+        numpy.float64
+    :type dtype: numpy.dtype, optional
+    :param single_pass: start the integrator after each delay with the last
+        step size reached before it, rather than letting it choose a new
+        starting step, defaults to False
+    :type single_pass: bool, optional
+    :param resolution: number of output points per day, or None to store no
+        output points and only keep the dense output, defaults to 10
+    :type resolution: float, optional
+    :param t_eval: explicit output times within [0, time], which take
+        precedence over the resolution, defaults to None
+    :type t_eval: array_like, optional
+    :param dense_output: keep the continuous solution so that
+        solution(t) can be evaluated at any time, defaults to keeping it
+        only when no output points are stored
+    :type dense_output: bool, optional
+    :param hook: function called as hook(segment, y) after each segment
+        between delays is integrated, with its SegmentStats and the state at
+        its end, defaults to None
+    :type hook: function, optional
+    :param step_hook: function called as step_hook(t) after each step of
+        the integrator, for example to stop a long run by raising an
+        exception, defaults to None
+    :type step_hook: function, optional
+    :param cross_immunity: matrix whose entry [k, j] is the protection,
+        between 0 and 1, against infection with strain j of those recovered
+        from strain k. Recovered individuals are then also counted by the
+        strain they last recovered from, and can be reinfected. A
+        scipy.sparse matrix keeps the cost proportional to the number of
+        non-zero interactions. Defaults to None, where recovery protects
+        against every strain
+    :type cross_immunity: array_like or scipy.sparse matrix, optional
     """
-    def __init__(self, pop: Population, strains: List[Strain], time=1):
+
+    # methods which make use of the analytic Jacobian
+    IMPLICIT_METHODS = ('BDF', 'Radau', 'LSODA')
+
+    # output points per day at which summarize samples runs which store none
+    SUMMARY_RESOLUTION = 10
+
+    def __init__(self, pop: Population, strains: List[Strain], time=1, method='RK45', rtol=1e-3, atol=1e-6,
+                 dtype=np.float64, single_pass=False, resolution=10, t_eval=None, dense_output=None, hook=None,
+                 step_hook=None, cross_immunity=None):
         """Initialize the class and take general solver parameters"""
-        # number of strains
-        self.n = len(strains)
         self.time = round(time, 2)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.dtype = dtype
+        self.single_pass = single_pass
+        self.resolution = resolution
+        self.t_eval = None if t_eval is None else np.sort(np.asarray(t_eval, dtype=float))
+        if self.t_eval is not None and (np.any(self.t_eval < 0) or np.any(self.t_eval > self.time)):
+            raise ValueError("Output times must lie within the solved time span")
+        if dense_output is None:
+            dense_output = resolution is None and t_eval is None
+        self.dense_output = dense_output
+        self.hook = hook
+        self.step_hook = step_hook
         self.pop = pop
         self.strains = strains
         self.solution = None
         self.deaths = None
         self.daily_cumulative_deaths = None
-        self.n_sus = self.pop.init_size - sum(strain.infected for strain in self.strains) - self.pop.current_immune
-        # should have at least one strain
-        if self.n == 0:
-            raise ValueError('Number of strains must be positive')
-        # store a list of death rate(alpha), transmission rate(beta),
-        # and recover rate(nu)
-        self.alpha = []
-        self.beta_scaled = []
-        self.nu = []
-        for strain in self.strains:
-            self.alpha.append(strain.alpha)
-            self.beta_scaled.append(strain.beta_unscaled/self.n_sus)
-            self.nu.append(strain.nu)
-        # store population related parameters
-        self.b = pop.death_rate
-        self.w = pop.waning_rate
-        self.recovered = pop.current_immune
-        self.func_birth = pop.birth_rate
-
-    def _ODE_S(self, y, b):
-        """First order derivative function for susceptible
+        self.daily_deaths = None
+        self.daily_deaths_by_strain = None
+        self.summary = None
+        self.stats = None
+        self._final_state = None
+        set_rates(self, pop, strains)
+        # total rate at which individuals leave each infected compartment
+        self._removal = self.b + self.nu + self.alpha
+        n = self.n
+        self._n_comps = n + 2
+        self._n_states = 3*n + 2
+        # with cross-immunity, the number recovered from each strain follows,
+        # and R - sum(R_k) are those immune to every strain from the start
+        self.cross_immunity = None
+        self._n_recovered = 0
+        if cross_immunity is not None:
+            self.cross_immunity = _as_cross_immunity(cross_immunity, n)
+            self._cross_immunity_t = self.cross_immunity.T
+            if scipy.sparse.issparse(self.cross_immunity):
+                self._cross_immunity_t = self._cross_immunity_t.tocsr()
+            self._n_recovered = n
+            self._recovered_by_strain = slice(3*n + 2, 4*n + 2)
+            self._n_states = 4*n + 2
 
-        :param y: number of susceptible, infected and recovered individuals
-        :type y: list
-        :param b: death rate
-        :type b: float
+    def _rhs(self, y):
+        """Right hand equations for ODE solver, evaluated for all
+        compartments at once
+
+        :param y: number of susceptible, infected and recovered individuals,
+            followed by the cumulative deaths and infections of each strain,
+            and with cross-immunity the number recovered from each strain
+        :type y: numpy.ndarray
+        :returns: derivatives of S, each I_j, R, the cumulative deaths
+            and infections, and the number recovered from each strain
+        :rtype: numpy.ndarray
         """
+        n = self.n
         S = y[0]
-        R = y[-1]
-        sum_beta = sum((strain.beta_unscaled/self.n_sus)*y[i+1]
-                       for i, strain in enumerate(self.strains))
-        dS_dt = self.func_birth(int(sum(y))) - sum_beta*S - b*S + self.w*R
-        return dS_dt
-
-    def _ODE_I_j(self, y, b, j):
-        """First order derivative function for jth strain
+        infected = y[1:n+1]
+        R = y[n+1]
+        # new infections caused by each strain
+        infections = self.beta_scaled*infected*S
+        dy = np.empty_like(y)
+        dy[0] = self.func_birth(y[:n+2].sum()) - infections.sum() - self.b*S + self.w*R
+        dy[1:n+1] = infections - self._removal*infected
+        dy[n+1] = self.nu.dot(infected) - (self.b + self.w)*R
+        dy[self._deaths] = self.alpha*infected
+        dy[self._infections] = infections
+        if self.cross_immunity is not None:
+            self._cross_immunity_rhs(y, dy)
+        return dy
 
-        :param y: number of susceptible, infected and recovered individuals
-        :type y: list
-        :param b: death rate
-        :type b: float
-        :param j: index of the infected strain
-        :type j: int
+    def _cross_immunity_rhs(self, y, dy):
+        """Add the reinfection of recovered individuals to the derivatives,
+        in place. Those recovered from strain k are infected with strain j
+        at rate (1 - sigma[k, j])*beta_j*I_j, which is evaluated with two
+        products with the cross-immunity matrix sigma, so sparse matrices
+        only cost their non-zero entries
+
+        :param y: state, including the number recovered from each strain
+        :type y: numpy.ndarray
+        :param dy: derivatives of the model without reinfection
+        :type dy: numpy.ndarray
+        """
+        n = self.n
+        infected = y[1:n+1]
+        recovered = y[self._recovered_by_strain]
+        force = self.beta_scaled*infected
+        # rate at which those recovered from each strain are reinfected
+        force_on_recovered = force.sum() - self.cross_immunity @ force
+        # reinfections with each strain
+        reinfections = force*(recovered.sum() - self._cross_immunity_t @ recovered)
+        dy[1:n+1] += reinfections
+        dy[n+1] -= recovered.dot(force_on_recovered)
+        dy[self._infections] += reinfections
+        dy[self._recovered_by_strain] = self.nu*infected - (self.b + self.w + force_on_recovered)*recovered
+
+    def _birth_derivative(self, N):
+        """Derivative of the birth function with respect to the
+        population size, see population.birth_derivative
+
+        :param N: current population size
+        :type N: float
         """
-        dI_j_dt = y[j]*(self.beta_scaled[j-1]*y[0] - (b + self.nu[j-1]
-                                                      + self.alpha[j-1]))
-        return dI_j_dt
+        return birth_derivative(self.func_birth, N)
 
-    def _ODE_R(self, y, b):
-        """First order derivative function for recover
+    def _jac(self, y, sparse=False):
+        """Analytic Jacobian of the right hand equations, built from its
+        entries inside jac_sparsity only
 
         :param y: number of susceptible, infected and recovered individuals
-        :type y: list
-        :param b: death rate
-        :type b: float
+        :type y: numpy.ndarray
+        :param sparse: return a scipy.sparse matrix, whose cost grows with
+            the number of strains rather than its square, defaults to False
+        :type sparse: bool, optional
+        :returns: matrix of partial derivatives d(dy_i/dt)/dy_j
+        :rtype: numpy.ndarray or scipy.sparse.csc_matrix
         """
-        R = y[-1]
-        sum_nu = 0
-        for i in range(1, self.n+1):
-            sum_nu += self.nu[i-1]*y[i]
-        dR_dt = -b*R + sum_nu - self.w*R
-        return dR_dt
+        n = self.n
+        S = y[0]
+        infected = y[1:n+1]
+        idx = np.arange(1, n + 1)
+        comps = np.arange(n + 2)
+        force = self.beta_scaled*infected
+        # (row, column, value) blocks, entries repeated in several are summed
+        entries = [
+            # the birth term depends on every compartment through N
+            (0, comps, np.full(n + 2, self._birth_derivative(y[:n+2].sum()))),
+            (0, 0, -force.sum() - self.b),
+            (0, idx, -self.beta_scaled*S),
+            (0, n + 1, self.w),
+            (idx, 0, force),
+            (idx, idx, self.beta_scaled*S - self._removal),
+            (n + 1, idx, self.nu),
+            (n + 1, n + 1, -(self.b + self.w)),
+            # cumulative deaths and infections only feed on the compartments
+            (idx + n + 1, idx, self.alpha),
+            (idx + 2*n + 1, 0, force),
+            (idx + 2*n + 1, idx, self.beta_scaled*S),
+        ]
+        if self.cross_immunity is not None:
+            entries += self._cross_immunity_jac(y)
+        rows, cols, values = zip(*(np.broadcast_arrays(*entry) for entry in entries))
+        jac = scipy.sparse.coo_matrix((np.concatenate([v.ravel() for v in values]),
+                                       (np.concatenate([r.ravel() for r in rows]),
+                                        np.concatenate([c.ravel() for c in cols]))),
+                                      shape=(len(y), len(y)))
+        return jac.tocsc() if sparse else jac.toarray()
+
+    def _cross_immunity_jac(self, y):
+        """Entries of the Jacobian added by the reinfection terms, see
+        _cross_immunity_rhs
+
+        :param y: state, including the number recovered from each strain
+        :type y: numpy.ndarray
+        :returns: (row, column, value) blocks of entries, see _jac
+        :rtype: list
+        """
+        n = self.n
+        sigma = self.cross_immunity
+        if scipy.sparse.issparse(sigma):
+            sigma = sigma.toarray()
+        infected = y[1:n+1]
+        recovered = y[self._recovered_by_strain]
+        force = self.beta_scaled*infected
+        force_on_recovered = force.sum() - sigma @ force
+        # number of recovered individuals susceptible to each strain
+        exposed = recovered.sum() - sigma.T @ recovered
+        susceptibility = 1 - sigma
+        idx = np.arange(1, n + 1)
+        rec = np.arange(3*n + 2, 4*n + 2)
+        reinfection = force[:, np.newaxis]*susceptibility.T
+        return [
+            (idx[:, np.newaxis], rec, reinfection),
+            (idx[:, np.newaxis] + 2*n + 1, rec, reinfection),
+            (idx, idx, self.beta_scaled*exposed),
+            (idx + 2*n + 1, idx, self.beta_scaled*exposed),
+            (n + 1, idx, -self.beta_scaled*exposed),
+            (n + 1, rec, -force_on_recovered),
+            (rec[:, np.newaxis], idx, -recovered[:, np.newaxis]*self.beta_scaled*susceptibility),
+            (rec, idx, self.nu),
+            (rec, rec, -(self.b + self.w + force_on_recovered)),
+        ]
+
+    def jac_sparsity(self):
+        """Sparsity pattern of the Jacobian: the S row and column are
+        full, each I_j only depends on S and itself, and R depends on
+        the I compartments and itself. The cumulative deaths of strain j
+        depend on I_j, and its cumulative infections on S and I_j. With
+        cross-immunity, reinfection couples every I_j and R_k
+
+        :returns: matrix with ones where the Jacobian may be non-zero
+        :rtype: scipy.sparse.csr_matrix
+        """
+        n = self.n
+        pattern = scipy.sparse.lil_matrix((self._n_states, self._n_states), dtype=int)
+        pattern[0, :n+2] = 1
+        pattern[:, 0] = 1
+        pattern[n+1, 1:n+2] = 1
+        for j in range(1, n + 1):
+            pattern[j, j] = 1
+            pattern[j + n + 1, j] = 1
+            pattern[j + 2*n + 1, j] = 1
+        pattern[self._deaths, 0] = 0
+        if self.cross_immunity is not None:
+            rec = self._recovered_by_strain
+            pattern[1:n+1, rec] = 1
+            pattern[self._infections, rec] = 1
+            pattern[n+1, rec] = 1
+            pattern[rec, 1:n+1] = 1
+            pattern[rec, rec] = np.eye(n, dtype=int)
+            pattern[rec, 0] = 0
+        return pattern.tocsr()
+
+    def _solver_options(self):
+        """Keyword arguments passed to scipy.integrate.solve_ivp"""
+        options = {'method': self.method, 'rtol': self.rtol, 'atol': self.atol}
+        if self.method in self.IMPLICIT_METHODS:
+            # BDF and Radau factorize a sparse Jacobian with a sparse LU,
+            # while LSODA only takes dense ones
+            sparse = self.method != 'LSODA'
+            options['jac'] = lambda t, y: self._jac(y, sparse)
+        return options
+
+    def _integrate_stepped(self, t_eval, y0, first_step=None, reduce=None, stats=None):
+        """Integrate one segment between two delays by stepping the
+        scipy.integrate solver class directly, see integrate_stepped
+
+        :param t_eval: output time points, from the start to the end of the segment
+        :type t_eval: numpy.ndarray
+        :param y0: state at the start of the segment
+        :type y0: numpy.ndarray
+        :param first_step: initial step size, usually the step size reached
+            in the previous segment, defaults to None which lets the solver choose
+        :type first_step: float, optional
+        :param reduce: function receiving the output time points and states
+            of each step instead of storing them, defaults to None
+        :type reduce: function, optional
+        :param stats: statistics of the segment, filled in when given,
+            defaults to None
+        :type stats: SegmentStats, optional
+        """
+        return integrate_stepped(lambda t, y: self._rhs(y), t_eval, y0, self._solver_options(), first_step,
+                                 self.dense_output, reduce, stats, self.step_hook)
 
-    def _rhs(self, y):
-        """Right hand equations for ODE solver
+    def _pause_times(self, start=0):
+        """Start, end and strain delay times at which the integration
+        pauses, see pause_times
 
-        :param y: number of susceptible, infected and recovered individuals
-        :type y: list
+        :param start: start time of the run, defaults to 0
+        :type start: float, optional
         """
-        dy = [self._ODE_S(y, self.b)]
-        for i in range(1, self.n+1):
-            dy.append(self._ODE_I_j(y, self.b, i))
-        dy.append(self._ODE_R(y, self.b))
-        return dy
-
-    def solve(self):
-        """Solve the differential equations
+        return pause_times(self._table.delay, self.time, start)
+
+    def _initial_state(self):
+        """State at time 0 before any strain is seeded"""
+        y0 = np.zeros(self._n_states)
+        y0[0] = self.n_sus
+        y0[self.n + 1] = self.recovered
+        return y0
+
+    def _seed(self, y0, start, which=None):
+        """Add the people infected with each strain introduced at the
+        start of a segment to the state, in place
+
+        :param y0: state at the start of the segment
+        :type y0: numpy.ndarray
+        :param start: start time of the segment
+        :type start: float
+        :param which: boolean mask of the strains to seed instead of those
+            introduced at start, defaults to None
+        :type which: numpy.ndarray, optional
+        """
+        n = self.n
+        seeded = np.flatnonzero(self._table.delay == start if which is None else which)
+        y0[seeded + 1] = self._table.infected[seeded]
+        y0[seeded + 2*n + 2] += self._table.infected[seeded]
+
+    def _start(self, resume, day_edges, grids):
+        """State at the start of a run, with the strains seeded so far, the
+        cumulative deaths at the day edges before it and the solution to be
+        filled in, which for a resumed run begins with the history of its
+        checkpoint
+
+        :param resume: checkpoint to continue from, or None to start at time 0
+        :type resume: Checkpoint
+        :param day_edges: day edges of the run
+        :type day_edges: numpy.ndarray
+        :param grids: time points and stored points of each segment, see
+            segment_grids
+        :type grids: list
+        :returns: the state, the boolean mask of seeded strains, the
+            cumulative deaths of each strain at the day edges and the solution
+        :rtype: tuple
         """
-        delays = set(strain.delay for strain in self.strains)
-        delays.add(0)
-        delays.add(self.time)
-        time_pts = sorted(list(delays))
-        y0 = np.array([self.n_sus] + [0.0 for _ in self.strains] + [self.recovered])
-        full_sol = Solution(len(y0))
+        n = self.n
+        deaths_at_edges = np.zeros((n, len(day_edges)))
+        y0 = self._initial_state()
+        seeded = np.zeros(n, dtype=bool)
+        prefix = keep = None
+        if resume is not None:
+            y0 = resume.state.copy()
+            # strains not yet seeded whose delay has passed join now
+            seeded = resume.seeded.copy()
+            self._seed(y0, resume.time, ~seeded & (self._table.delay <= resume.time))
+            seeded |= self._table.delay <= resume.time
+            # the history before the checkpoint is taken from its run
+            known = day_edges <= resume.time
+            deaths_at_edges[:, known] = resume.deaths_at_edges[:, np.searchsorted(resume.day_edges,
+                                                                                  day_edges[known])]
+            prefix = resume.solution
+        if prefix is not None:
+            keep = (prefix.t < resume.time) | ((prefix.t == resume.time) & ~grids[0][1][0])
+        n_times = sum(stored.sum() for _, stored in grids) + (0 if keep is None else keep.sum())
+        full_sol = Solution(self._n_comps, n_times, self.dtype, n_strains=n, n_recovered=self._n_recovered)
+        if prefix is not None:
+            full_sol.append(prefix.t[keep], prefix.state[:, keep])
+            for dense_start, dense in zip(prefix._dense_starts, prefix._dense):
+                full_sol.add_dense(dense_start, dense)
+        return y0, seeded, deaths_at_edges, full_sol
+
+    def solve(self, resume=None):
+        """Solve the differential equations, recording the integration
+        statistics of each segment in stats
+
+        :param resume: checkpoint of an earlier run to continue from rather
+            than from time 0, see checkpoint. Its state must have the layout
+            of this model, but the parameters may differ, to branch what-if
+            futures from a shared history. Defaults to None
+        :type resume: Checkpoint, optional
+        """
+        began = time.perf_counter()
+        stats = SolverStats()
+        start_time = 0
+        if resume is not None:
+            if len(resume.state) != self._n_states:
+                raise ValueError("Checkpoint state does not match the strains and cross-immunity of the model")
+            if resume.time >= self.time:
+                raise ValueError("Run must end after the checkpoint")
+            start_time = resume.time
+        # the integrator also stops at the end of every day to bin deaths
+        days = day_edges(self.time)
+        grids = segment_grids(self._pause_times(start_time), self.resolution, self.t_eval, extra=days)
+        y0, seeded, deaths_at_edges, full_sol = self._start(resume, days, grids)
+        step = None
         # To add the people infected with each strain at a specified time,
         # we pause the model at each delay
-        for i in range(len(time_pts) - 1):
-            start = time_pts[i]
-            end = time_pts[i+1]
-            t_eval = np.linspace(start, end, int((end-start)*10))
-            for j, strain in enumerate(self.strains):
-                if strain.delay == start:
-                    y0[j+1] = strain.infected
-            sol = scipy.integrate.solve_ivp(
-                fun=lambda t, y: self._rhs(y),
-                t_span=[t_eval[0], t_eval[-1]],
-                y0=y0,
-                t_eval=t_eval,
-            )
-            full_sol.t = np.concatenate((full_sol.t, sol.t))
-            full_sol.y = np.concatenate((full_sol.y, sol.y), axis=1)
-            y0 = sol.y[:, -1]
+        for t_eval, stored in grids:
+            start = t_eval[0]
+            # strains seeded before the checkpoint are never seeded again,
+            # even when their delay has been moved past it
+            introduced = ~seeded & (self._table.delay == start)
+            self._seed(y0, start, introduced)
+            seeded |= introduced
+            segment = SegmentStats(start, t_eval[-1])
+            segment_began = time.perf_counter()
+            y, dense, last_step = self._integrate_stepped(t_eval, y0, step, stats=segment)
+            if self.single_pass:
+                step = last_step
+            full_sol.append(t_eval[stored], y[:, stored])
+            if dense is not None:
+                full_sol.add_dense(start, dense)
+            # deaths are continuous across seedings, so each day edge is
+            # taken from the segment it ends
+            edges = (days > start) & (days <= t_eval[-1])
+            deaths_at_edges[:, edges] = y[self._deaths, np.searchsorted(t_eval, days[edges])]
+            y0 = y[:, -1].copy()
+            segment.time = time.perf_counter() - segment_began
+            stats.segments.append(segment)
+            if self.hook is not None:
+                self.hook(segment, y0)
         self.solution = full_sol
+        # what is needed to continue the run, see checkpoint
+        self._final_state = y0
+        self._seeded = seeded
+        self._deaths_at_edges = (days, deaths_at_edges)
+        self.daily_deaths_by_strain = np.diff(deaths_at_edges, axis=1)
+        self.daily_deaths = self.daily_deaths_by_strain.sum(axis=0)
 
         # determine number of deaths
+        post_began = time.perf_counter()
         self._count_virus_death()
+        stats.post_time = time.perf_counter() - post_began
+        stats.total_time = time.perf_counter() - began
+        self.stats = stats
+
+    def checkpoint(self):
+        """State at the end of the solved run, from which a later run can
+        continue, for example over a longer time or with other strains
+
+        :returns: the checkpoint, keeping this run's population, strains
+            and solution
+        :rtype: Checkpoint
+        """
+        if self._final_state is None:
+            raise ValueError("Must run s.solve() before making a checkpoint")
+        day_edges, deaths_at_edges = self._deaths_at_edges
+        return Checkpoint(self.time, self._final_state.copy(), self._seeded.copy(), day_edges, deaths_at_edges,
+                          {name: getattr(self, name) for name in Checkpoint.SETTINGS}, solution=self.solution,
+                          pop=self.pop, strains=self.strains, cross_immunity=self.cross_immunity)
+
+    def summarize(self, extinction_threshold=1.0):
+        """Solve the differential equations keeping only per strain peak,
+        attack rate, death and extinction metrics, which are updated at
+        each output time point while stepping, so no trajectory is stored.
+        Runs storing no output points (resolution=None without t_eval) are
+        sampled at SUMMARY_RESOLUTION points per day instead
+
+        :param extinction_threshold: number of infected individuals below
+            which a strain is considered extinct, defaults to 1
+        :type extinction_threshold: float, optional
+        :returns: the metrics of each strain
+        :rtype: Summary
+        """
+        n = self.n
+        summary = Summary((n,), self.pop.init_size, extinction_threshold)
+
+        def reduce(t, y):
+            summary.update(t, y[1:n+1], y[self._deaths], y[self._infections])
+
+        # the ends of the segments alone would miss the peaks and extinctions
+        resolution = self.SUMMARY_RESOLUTION if self.resolution is None else self.resolution
+        y0 = self._initial_state()
+        step = None
+        for t_eval, _ in segment_grids(self._pause_times(), resolution, self.t_eval):
+            self._seed(y0, t_eval[0])
+            # steps as in solve, so both follow the same trajectory
+            y, _, last_step = integrate_stepped(lambda t, y: self._rhs(y), t_eval, y0, self._solver_options(), step,
+                                                reduce=reduce, step_hook=self.step_hook)
+            if self.single_pass:
+                step = last_step
+            y0 = y[:, -1].copy()
+        self.summary = summary
+        return summary
 
     def _count_virus_death(self):
-        """Counting the number of deaths caused by the viruses
+        """Counting the number of deaths caused by the viruses from the
+        cumulative deaths integrated with the compartments, see
+        count_virus_deaths
         """
         if self.solution is None:
             raise ValueError("Must run s.solve() before calculation deaths")
-
-        output_solver = self.solution
-        number_strains = output_solver.y.shape[0] - 2
-        virus_death = np.repeat(0.0, len(output_solver.t))
-        for i in range(1, number_strains+1):
-            virus_death += np.array(output_solver.y[i, :]
-                                    )*self.strains[i-1].alpha
-        # virus death would be shown on next timestamp
-        virus_death = np.append(np.array(0), virus_death[:-1])
-        self.deaths = virus_death
-        # calculate cumulative deaths per day
-        self.daily_cumulative_deaths = self.deaths.cumsum()/(len(output_solver.t)/(output_solver.t[-1]-output_solver.t[0]))
+        self.daily_cumulative_deaths, self.deaths = count_virus_deaths(self.solution)
 
     def _make_plot(self):
         """Creates the plot of the number of individuals
-        in each compartment over time
+        in each compartment over time, see plotting.make_plot
         """
-        if self.solution is None:
-            raise ValueError("Must run s.solve() before plotting solutions")
-
-        fig = plt.figure()
-        output_solver = self.solution
-
-        # Initialise colours and number of strains
-        # number of strains equals #rows - S - R compartments
-        number_strains = output_solver.y.shape[0] - 2
-        colours_SRD = ["red", "blue", "brown"]
-        colours_I = plt.cm.Greens(np.linspace(0.5, 1, number_strains))
-
-        # Plot the S compartment
-        plt.plot(output_solver.t, output_solver.y[0, :],
-                 label="S", color=colours_SRD[0])
-
-        # Plot the I compartments
-        for i in range(1, number_strains+1):
-            plt.plot(output_solver.t, output_solver.y[i, :],
-                     label=f"I{i}", color=colours_I[i-1])
-
-        # Plot the R compartment
-        plt.plot(output_solver.t, output_solver.y[-1, :],
-                 label="R", color=colours_SRD[1])
-
-        # Plot number of deaths due to virus(es)
-        plt.plot(output_solver.t, self.deaths, label="D", color=colours_SRD[2])
-
-        plt.legend()
-        plt.ylabel("Number of individuals")
-        plt.xlabel("Time (days)")
-        plt.tight_layout()
-
-        return fig
+        from epistrains import plotting
+        return plotting.make_plot(self)
 
     def plot_compartments(self):
         """Function to show the compartments plot created by _make_plot
         """
-
-        self._make_plot()
-        plt.show()
+        from epistrains import plotting
+        plotting.plot_compartments(self)
 
     def save_compartments(self, save_path='epistrains_output.png'):
         """Function to save the compartments plot created by _make_plot
@@ -213,49 +927,27 @@ class Solver:
         :param save_path: gives path to which figure should be saved
         :type save_path: string
         """
-
-        self._make_plot()
-        plt.savefig(save_path, dpi=300)
+        from epistrains import plotting
+        plotting.save_compartments(self, save_path)
 
     def _make_death_plot(self):
-        """Creates the plot of the number of individuals
-        in each compartment over time
+        """Creates the plot of the number of deaths over time,
+        see plotting.make_death_plot
         """
-        if self.solution is None:
-            raise ValueError("Must run s.solve() before plotting deaths")
-
-        # get output solver and set colour parameter
-        output_solver = self.solution
-        colours_deaths = ["midnightblue", "brown"]
-
-        fig = plt.figure()
-        # plot daily deaths
-        plt.plot(output_solver.t, self.deaths, label="Daily", color=colours_deaths[1])
-        plt.ylabel("Average number of deaths per day")
-        plt.xlabel("Time (days)")
-        # plot cumulative deaths
-        ax = plt.gca()
-        ax2 = ax.twinx()
-        ax2.plot(output_solver.t, self.daily_cumulative_deaths, label="Cumulative", color=colours_deaths[0])
-        ax2.set_ylabel("Cumulative deaths", color=colours_deaths[0], fontsize=14)
-
-        fig.legend(bbox_to_anchor=(0.8, 0.5))
-        plt.tight_layout()
-
-        return fig
+        from epistrains import plotting
+        return plotting.make_death_plot(self)
 
     def plot_death(self):
-        """Function to show the compartments plot created by _make_plot
+        """Function to show the deaths plot created by _make_death_plot
         """
-        self._make_death_plot()
-        plt.show()
+        from epistrains import plotting
+        plotting.plot_death(self)
 
     def save_death(self, save_path='epistrains_deaths_output.png'):
-        """Function to save the compartments plot created by _make_plot
+        """Function to save the deaths plot created by _make_death_plot
 
         :param save_path: gives path to which figure should be saved
         :type save_path: string
         """
-
-        self._make_death_plot()
-        plt.savefig(save_path, dpi=300)
+        from epistrains import plotting
+        plotting.save_death(self, save_path)
@@ -0,0 +1,86 @@
+class SegmentStats:
+    """Integration statistics of one segment of a run, between two
+    consecutive pause times
+
+    :param start: start time of the segment
+    :type start: float
+    :param end: end time of the segment
+    :type end: float
+    """
+
+    def __init__(self, start, end):
+        self.start = float(start)
+        self.end = float(end)
+        # evaluations of the right hand side and of the Jacobian, and LU
+        # decompositions, as counted by the scipy.integrate solver
+        self.nfev = 0
+        self.njev = 0
+        self.nlu = 0
+        self.steps = 0
+        # rejected steps are only known for the explicit Runge-Kutta
+        # methods, and are None for the others
+        self.rejected = None
+        # wall time of the segment in seconds, including the sampling of
+        # the output points
+        self.time = 0.0
+
+    def __repr__(self):
+        return (f"SegmentStats(start={self.start!r}, end={self.end!r}, nfev={self.nfev}, njev={self.njev}, "
+                f"nlu={self.nlu}, steps={self.steps}, rejected={self.rejected}, time={self.time:.6f})")
+
+
+class SolverStats:
+    """Statistics of a solved run, made by Solver.solve, to tell whether a
+    slow run comes from stiffness, many delay segments or the right hand
+    side itself
+
+    The counts are totals over the segments, which are kept in segments.
+    """
+
+    def __init__(self):
+        self.segments = []
+        # wall time in seconds of counting deaths after integrating
+        self.post_time = 0.0
+        # wall time in seconds of the whole solve
+        self.total_time = 0.0
+
+    def _total(self, name):
+        return sum(getattr(segment, name) for segment in self.segments)
+
+    @property
+    def nfev(self):
+        """Number of evaluations of the right hand side"""
+        return self._total('nfev')
+
+    @property
+    def njev(self):
+        """Number of evaluations of the Jacobian"""
+        return self._total('njev')
+
+    @property
+    def nlu(self):
+        """Number of LU decompositions"""
+        return self._total('nlu')
+
+    @property
+    def steps(self):
+        """Number of accepted steps"""
+        return self._total('steps')
+
+    @property
+    def rejected(self):
+        """Number of rejected steps, or None when the method does not
+        report them"""
+        if any(segment.rejected is None for segment in self.segments):
+            return None
+        return self._total('rejected')
+
+    @property
+    def integration_time(self):
+        """Wall time in seconds spent integrating the segments"""
+        return self._total('time')
+
+    def __repr__(self):
+        return (f"SolverStats(segments={len(self.segments)}, nfev={self.nfev}, njev={self.njev}, nlu={self.nlu}, "
+                f"steps={self.steps}, rejected={self.rejected}, integration_time={self.integration_time:.6f}, "
+                f"post_time={self.post_time:.6f}, total_time={self.total_time:.6f})")
@@ -0,0 +1,413 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import numpy as np
+from epistrains.population import Population, birth_rates
+from epistrains.solver import Solution, count_virus_deaths, day_edges, pause_times, segment_grids, set_rates
+from epistrains.strain import Strain
+
+
+def _record(grid, out, filled, rows, limit, values, inclusive=False):
+    """Store values in every output point of grid before limit not yet
+    filled for the given replicates
+
+    :param grid: output time points
+    :type grid: numpy.ndarray
+    :param out: output array of shape (replicates, variables, len(grid))
+    :type out: numpy.ndarray
+    :param filled: number of output points already filled for each replicate
+    :type filled: numpy.ndarray
+    :param rows: replicates being recorded
+    :type rows: numpy.ndarray
+    :param limit: time up to which values hold for each of the rows
+    :type limit: numpy.ndarray
+    :param values: values of each of the rows
+    :type values: numpy.ndarray
+    :param inclusive: also fill the points equal to limit, defaults to False
+    :type inclusive: bool, optional
+    """
+    upto = np.searchsorted(grid, limit, side='right' if inclusive else 'left')
+    need = upto > filled[rows]
+    if not need.any():
+        return
+    index = np.arange(len(grid))
+    which, points = np.nonzero((index >= filled[rows[need], np.newaxis]) & (index < upto[need, np.newaxis]))
+    out[rows[need][which], :, points] = values[need][which]
+    filled[rows[need]] = upto[need]
+
+
+def _split(rng, count, rates):
+    """Split counts of individuals between competing channels in proportion
+    to their rates, with a chain of binomial draws
+
+    :param rng: random number generator
+    :type rng: numpy.random.Generator
+    :param count: number of individuals to split
+    :type count: numpy.ndarray
+    :param rates: rate of each channel, along the last axis
+    :type rates: numpy.ndarray
+    :returns: number of individuals in each channel
+    :rtype: numpy.ndarray
+    """
+    split = np.empty(rates.shape)
+    remaining = count
+    remaining_rate = rates.sum(axis=-1)
+    for c in range(rates.shape[-1] - 1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            p = np.where(remaining_rate > 0, rates[..., c]/remaining_rate, 0.0)
+        split[..., c] = rng.binomial(remaining.astype(np.int64), np.clip(p, 0.0, 1.0))
+        remaining = remaining - split[..., c]
+        remaining_rate = remaining_rate - rates[..., c]
+    split[..., -1] = remaining
+    return split
+
+
+def _simulate_block(solver, seed, size):
+    """Simulate a block of replicates with one random number stream, in
+    the calling process or a worker process
+
+    :param solver: model to be simulated
+    :type solver: StochasticSolver
+    :param seed: seed of the random number stream of the block
+    :type seed: numpy.random.SeedSequence
+    :param size: number of replicates in the block
+    :type size: int
+    """
+    return solver._simulate(np.random.default_rng(seed), size)
+
+
+class StochasticSolver:
+    """Stochastic counterpart of Solver, simulating the same model as a
+    continuous time Markov chain with whole numbers of individuals, so
+    small seedings may die out by chance
+
+    Each replicate is simulated either exactly with the Gillespie direct
+    method, or approximately with tau-leaping, where the individuals
+    leaving each compartment in a step of length tau are drawn from a
+    binomial distribution. Both methods advance all replicates of a block
+    together with NumPy array operations.
+
+    Replicates are simulated in blocks of block_size, each with its own
+    random number stream spawned from the seed, so the result of every
+    replicate only depends on the seed and not on the number of workers.
+
+    :param pop: population information relating to birth rate
+        and death rate
+    :type pop: Population
+    :param strains: a list of strains to be infected, or a StrainTable
+    :type strains: List or StrainTable
+    :param time: days over which the system should be simulated,
+        defaults to 1
+    :type time: float or integer, optional
+    :param replicates: number of independent realisations, defaults to 1
+    :type replicates: int, optional
+    :param method: 'gillespie', 'tau_leap', or 'auto' to use Gillespie for
+        populations up to EXACT_MAX_SIZE and tau-leaping above, defaults to 'auto'
+    :type method: string, optional
+    :param tau: step size of tau-leaping in days, defaults to 0.05
+    :type tau: float, optional
+    :param seed: seed of the random number streams, defaults to None for
+        fresh entropy
+    :type seed: int or numpy.random.SeedSequence, optional
+    :param resolution: number of output points per day, defaults to 10
+    :type resolution: float, optional
+    :param t_eval: explicit output times within [0, time], which take
+        precedence over the resolution, defaults to None
+    :type t_eval: array_like, optional
+    :param dtype: data type used to store the solution, defaults to
+        numpy.float64
+    :type dtype: numpy.dtype, optional
+    :param block_size: number of replicates simulated together with one
+        random number stream, defaults to 256
+    :type block_size: int, optional
+    :param workers: number of worker processes the blocks are spread over,
+        defaults to 1 which simulates in the calling process. The birth
+        function must be picklable to use more than one worker
+    :type workers: int, optional
+    """
+
+    # largest initial population size simulated exactly with method='auto'
+    EXACT_MAX_SIZE = 10000
+
+    METHODS = ('auto', 'gillespie', 'tau_leap')
+
+    def __init__(self, pop: Population, strains: List[Strain], time=1, replicates=1, method='auto', tau=0.05,
+                 seed=None, resolution=10, t_eval=None, dtype=np.float64, block_size=256, workers=1):
+        """Initialize the class and take general simulation parameters"""
+        if method not in self.METHODS:
+            raise ValueError(f"Method must be one of {self.METHODS}")
+        if method == 'auto':
+            method = 'gillespie' if pop.init_size <= self.EXACT_MAX_SIZE else 'tau_leap'
+        if replicates < 1 or block_size < 1 or workers < 1:
+            raise ValueError("Number of replicates, block size and workers must be positive")
+        if tau <= 0:
+            raise ValueError("Step size must be positive")
+        self.time = round(time, 2)
+        self.replicates = replicates
+        self.method = method
+        self.tau = tau
+        self.seed = seed
+        self.resolution = resolution
+        self.t_eval = None if t_eval is None else np.sort(np.asarray(t_eval, dtype=float))
+        if self.t_eval is not None and (np.any(self.t_eval < 0) or np.any(self.t_eval > self.time)):
+            raise ValueError("Output times must lie within the solved time span")
+        self.dtype = dtype
+        self.block_size = block_size
+        self.workers = workers
+        self.pop = pop
+        self.strains = strains
+        self.solution = None
+        self.deaths = None
+        self.daily_cumulative_deaths = None
+        self.daily_deaths = None
+        self.daily_deaths_by_strain = None
+        # rates and state layout as in Solver
+        set_rates(self, pop, strains)
+        self._stoichiometry = self._make_stoichiometry()
+
+    def _make_stoichiometry(self):
+        """Change of the state caused by each event of the Gillespie
+        method: infection, recovery, virus death and natural death for each
+        strain, then natural death of S and R, waning immunity and birth
+
+        :returns: matrix of shape (4n + 4, 3n + 2)
+        :rtype: numpy.ndarray
+        """
+        n = self.n
+        change = np.zeros((4*n + 4, 3*n + 2))
+        for j in range(n):
+            change[j, [0, j + 1, 2*n + 2 + j]] = [-1, 1, 1]
+            change[n + j, [j + 1, n + 1]] = [-1, 1]
+            change[2*n + j, [j + 1, n + 2 + j]] = [-1, 1]
+            change[3*n + j, j + 1] = -1
+        change[4*n, 0] = -1
+        change[4*n + 1, n + 1] = -1
+        change[4*n + 2, [n + 1, 0]] = [-1, 1]
+        change[4*n + 3, 0] = 1
+        return change
+
+    def _births(self, X):
+        """Birth rate of each replicate, never negative
+
+        :param X: state of each replicate
+        :type X: numpy.ndarray
+        """
+        if self.func_birth is None:
+            return np.zeros(len(X))
+        return np.maximum(birth_rates(self.func_birth, X[:, :self.n + 2].sum(axis=1)), 0.0)
+
+    def _propensities(self, X):
+        """Rate of each Gillespie event in each replicate
+
+        :param X: state of each replicate, of shape (replicates, 3n + 2)
+        :type X: numpy.ndarray
+        :returns: rates of shape (replicates, 4n + 4)
+        :rtype: numpy.ndarray
+        """
+        n = self.n
+        S = X[:, 0]
+        infected = X[:, 1:n+1]
+        R = X[:, n+1]
+        return np.column_stack((self.beta_scaled*infected*S[:, np.newaxis], self.nu*infected, self.alpha*infected,
+                                self.b*infected, self.b*S, self.b*R, self.w*R, self._births(X)))
+
+    def _gillespie_step(self, rng, X, t, limit):
+        """Time of the next event of each replicate, applying the events
+        which happen before limit to X in place
+
+        :param rng: random number generator
+        :type rng: numpy.random.Generator
+        :param X: state of each replicate
+        :type X: numpy.ndarray
+        :param t: current time of each replicate
+        :type t: numpy.ndarray
+        :param limit: next pause time of each replicate
+        :type limit: numpy.ndarray
+        """
+        rates = self._propensities(X)
+        total = rates.sum(axis=1)
+        with np.errstate(divide='ignore'):
+            t_next = t + rng.exponential(np.where(total > 0, 1/total, np.inf))
+        happens = np.nonzero(t_next < limit)[0]
+        # pick each event with probability proportional to its rate
+        threshold = rng.random(len(happens))*total[happens]
+        event = (np.cumsum(rates[happens], axis=1) <= threshold[:, np.newaxis]).sum(axis=1)
+        event = np.minimum(event, rates.shape[1] - 1)
+        X[happens] += self._stoichiometry[event]
+        return t_next
+
+    def _leap(self, rng, X, dt):
+        """Apply one tau-leaping step of length dt to X in place. The
+        individuals leaving each compartment are binomial, so no
+        compartment becomes negative
+
+        :param rng: random number generator
+        :type rng: numpy.random.Generator
+        :param X: state of each replicate
+        :type X: numpy.ndarray
+        :param dt: step size of each replicate
+        :type dt: numpy.ndarray
+        """
+        n = self.n
+        S = X[:, 0]
+        infected = X[:, 1:n+1]
+        R = X[:, n+1]
+        step = dt[:, np.newaxis]
+        # per capita rates of the channels leaving S, each I_j and R
+        force = self.beta_scaled*infected
+        s_rates = np.column_stack((force, np.full(len(X), self.b)))
+        i_rates = np.stack(np.broadcast_arrays(self.nu, self.alpha, self.b*np.ones(n)), axis=-1)
+        i_rates = np.broadcast_to(i_rates, infected.shape + (3,))
+        r_rates = np.broadcast_to([self.w, self.b], (len(X), 2))
+        s_out = _split(rng, rng.binomial(S.astype(np.int64), -np.expm1(-s_rates.sum(axis=1)*dt)), s_rates)
+        i_out = _split(rng, rng.binomial(infected.astype(np.int64), -np.expm1(-i_rates.sum(axis=2)*step)), i_rates)
+        r_out = _split(rng, rng.binomial(R.astype(np.int64), -np.expm1(-r_rates.sum(axis=1)*dt)), r_rates)
+        births = rng.poisson(self._births(X)*dt)
+        new_infections = s_out[:, :n]
+        X[:, 0] += births + r_out[:, 0] - s_out.sum(axis=1)
+        X[:, 1:n+1] += new_infections - i_out.sum(axis=2)
+        X[:, n+1] += i_out[:, :, 0].sum(axis=1) - r_out.sum(axis=1)
+        X[:, self._deaths] += i_out[:, :, 1]
+        X[:, self._infections] += new_infections
+
+    def _pause_times(self):
+        """Start, end and strain delay times at which the simulation
+        pauses, see solver.pause_times"""
+        return np.array(pause_times(self._table.delay, self.time), dtype=float)
+
+    def _output_times(self):
+        """Output time points, as stored by Solver"""
+        grids = segment_grids(list(self._pause_times()), self.resolution, self.t_eval)
+        return np.concatenate([points[stored] for points, stored in grids])
+
+    def _day_edges(self):
+        """Times at which the cumulative deaths are recorded to bin them by day"""
+        return day_edges(self.time)
+
+    def _seed(self, X, rows, start):
+        """Add the people infected with each strain introduced at start to
+        the given replicates, in place
+
+        :param X: state of each replicate
+        :type X: numpy.ndarray
+        :param rows: replicates reaching start
+        :type rows: numpy.ndarray
+        :param start: pause time
+        :type start: float
+        """
+        n = self.n
+        seeded = np.flatnonzero(self._table.delay == start)
+        X[np.ix_(rows, seeded + 1)] = self._table.infected[seeded]
+        X[np.ix_(rows, seeded + 2*n + 2)] += self._table.infected[seeded]
+
+    def _simulate(self, rng, size):
+        """Simulate a block of replicates
+
+        :param rng: random number generator of the block
+        :type rng: numpy.random.Generator
+        :param size: number of replicates
+        :type size: int
+        :returns: the state at each output time and the cumulative deaths
+            of each strain at each day edge, for each replicate
+        :rtype: tuple
+        """
+        n = self.n
+        pauses = self._pause_times()
+        t_out = self._output_times()
+        edges = self._day_edges()
+        X = np.zeros((size, 3*n + 2))
+        X[:, 0] = np.rint(self.n_sus)
+        X[:, n+1] = np.rint(self.recovered)
+        out = np.empty((size, 3*n + 2, len(t_out)))
+        at_edges = np.empty((size, n, len(edges)))
+        filled = np.zeros(size, dtype=int)
+        filled_edges = np.zeros(size, dtype=int)
+        t = np.zeros(size)
+        # index of the next pause time of each replicate
+        pause = np.ones(size, dtype=int)
+        self._seed(X, np.arange(size), 0.0)
+
+        active = np.arange(size)
+        while len(active):
+            Xa = X[active]
+            limit = pauses[pause[active]]
+            if self.method == 'gillespie':
+                t_next = self._gillespie_step(rng, Xa, t[active], limit)
+            else:
+                t_next = t[active] + self.tau
+                # snap steps ending just short of a pause onto it
+                t_next = np.where(limit - t_next < 1e-9*self.tau, limit, t_next)
+            reached = np.minimum(t_next, limit)
+            # the state before this step holds until the step ends
+            _record(t_out, out, filled, active, reached, X[active])
+            _record(edges, at_edges, filled_edges, active, reached, X[active][:, self._deaths])
+            if self.method == 'gillespie':
+                X[active] = Xa
+            else:
+                self._leap(rng, Xa, reached - t[active])
+                X[active] = Xa
+            t[active] = reached
+            crossed = active[t_next >= limit]
+            if len(crossed):
+                for start in np.unique(pauses[pause[crossed]]):
+                    self._seed(X, crossed[pauses[pause[crossed]] == start], start)
+                pause[crossed] += 1
+                done = crossed[pause[crossed] == len(pauses)]
+                end = np.full(len(done), self.time)
+                _record(t_out, out, filled, done, end, X[done], inclusive=True)
+                _record(edges, at_edges, filled_edges, done, end, X[done][:, self._deaths], inclusive=True)
+                active = active[pause[active] < len(pauses)]
+        return out, at_edges
+
+    def solve(self):
+        """Simulate every replicate. The solution holds the compartments of
+        each replicate, with shape (replicates, compartments, time points)
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(math.ceil(self.replicates/self.block_size))
+        sizes = [min(self.block_size, self.replicates - b*self.block_size) for b in range(len(seeds))]
+        if self.workers == 1:
+            blocks = [_simulate_block(self, seed, size) for seed, size in zip(seeds, sizes)]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                blocks = list(pool.map(_simulate_block, [self] * len(seeds), seeds, sizes))
+
+        t_out = self._output_times()
+        sol = Solution((self.replicates, self.n + 2), len(t_out), self.dtype, n_strains=self.n)
+        sol.append(t_out, np.concatenate([out for out, _ in blocks]))
+        self.solution = sol
+        deaths_at_edges = np.concatenate([at_edges for _, at_edges in blocks])
+        self.daily_deaths_by_strain = np.diff(deaths_at_edges, axis=2)
+        self.daily_deaths = self.daily_deaths_by_strain.sum(axis=1)
+        self._count_virus_death()
+
+    def _count_virus_death(self):
+        """Counting the number of deaths caused by the viruses in each
+        replicate from the cumulative deaths, as in Solver
+        """
+        if self.solution is None:
+            raise ValueError("Must run s.solve() before calculation deaths")
+        self.daily_cumulative_deaths, self.deaths = count_virus_deaths(self.solution)
+
+    def extinction_probability(self):
+        """Fraction of replicates in which each strain has no infected
+        individuals left at the end of the run
+
+        :returns: probability of extinction of each strain
+        :rtype: numpy.ndarray
+        """
+        if self.solution is None:
+            raise ValueError("Must run s.solve() before calculating extinction")
+        return (self.solution.y[:, 1:self.n+1, -1] == 0).mean(axis=0)
+
+    def save_fan_chart(self, save_path='epistrains_fan_output.png', quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Function to save the quantile bands of every compartment over
+        the replicates, see plotting.make_figure
+
+        :param save_path: gives path to which figure should be saved
+        :type save_path: string
+        :param quantiles: quantiles of the replicates to draw, defaults to
+            (0.05, 0.25, 0.5, 0.75, 0.95)
+        :type quantiles: tuple, optional
+        """
+        from epistrains import plotting
+        plotting.save_figure(self, save_path, kind='fan', quantiles=quantiles)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Strain:
     """Represent the jth strain of the disease.
 
@@ -11,6 +14,9 @@ class Strain:
     :type infected: int
     """
 
+    # fixed attributes rather than a __dict__, as many strains may be made
+    __slots__ = ('nu', 'alpha', 'beta_unscaled', 'infected', 'delay')
+
     def __init__(self, CFR: float, recovery_time: float, R0: float, infected: int, delay=0.0):
 
         if not ((isinstance(CFR, float)) or (isinstance(CFR, int))):
@@ -30,3 +36,98 @@ class Strain:
         self.beta_unscaled = (R0*(self.alpha + self.nu))
         self.infected = infected
         self.delay = delay
+
+    def __repr__(self):
+        return (f"Strain(nu={self.nu!r}, alpha={self.alpha!r}, beta_unscaled={self.beta_unscaled!r}, "
+                f"infected={self.infected!r}, delay={self.delay!r})")
+
+
+def _as_column(value, name, kinds='iuf'):
+    """Convert a column of a StrainTable to an array, checking its type
+
+    :param value: value of every strain, or one value for all of them
+    :type value: array_like
+    :param name: name of the column in error messages
+    :type name: string
+    :param kinds: numpy dtype kinds accepted, defaults to integers and floats
+    :type kinds: string, optional
+    """
+    array = np.asarray(value)
+    if array.dtype.kind not in kinds:
+        raise TypeError(f"{name} should be numeric" if kinds == 'iuf' else f"{name} should be integers")
+    if array.ndim > 1:
+        raise ValueError(f"{name} must be a number or a one dimensional array")
+    return array
+
+
+class StrainTable:
+    """Many strains stored as one array per parameter rather than one
+    Strain object each, which makes and checks them all at once
+
+    Solver accepts a StrainTable in place of a list of strains. Indexing or
+    iterating over the table gives Strain objects, so it can also be used
+    where a list of strains is expected.
+
+    :param CFR: case fatality rate of each strain
+    :type CFR: array_like
+    :param recovery_time: average number of days to recover from each strain
+    :type recovery_time: array_like
+    :param R0: R0 value of each strain
+    :type R0: array_like
+    :param infected: initial number of people infected with each strain
+    :type infected: array_like of int
+    :param delay: day at which each strain is introduced, defaults to 0.0
+    :type delay: array_like, optional
+    """
+
+    def __init__(self, CFR, recovery_time, R0, infected, delay=0.0):
+        """Initialize the class and broadcast the columns"""
+        CFR, recovery_time, R0, infected, delay = np.broadcast_arrays(
+            _as_column(CFR, "Case fatality rate"), _as_column(recovery_time, "Recovery time"),
+            _as_column(R0, "R0"), _as_column(infected, "Number of infected", kinds='iu'),
+            _as_column(delay, "Delay"))
+        if CFR.ndim == 0:
+            raise ValueError("At least one column must give a value per strain")
+        # the rates as calculated by Strain, as contiguous columns
+        self.nu = 1/recovery_time.astype(float)
+        self.alpha = CFR*self.nu
+        self.beta_unscaled = R0*(self.alpha + self.nu)
+        self.infected = infected.astype(np.int64)
+        self.delay = delay.astype(float)
+
+    @classmethod
+    def from_strains(cls, strains):
+        """Table of the parameters of several strains
+
+        :param strains: the strains
+        :type strains: List
+        :rtype: StrainTable
+        """
+        if isinstance(strains, cls):
+            return strains
+        table = cls.__new__(cls)
+        table.nu = np.array([strain.nu for strain in strains], dtype=float)
+        table.alpha = np.array([strain.alpha for strain in strains], dtype=float)
+        table.beta_unscaled = np.array([strain.beta_unscaled for strain in strains], dtype=float)
+        table.infected = np.array([strain.infected for strain in strains], dtype=np.int64)
+        table.delay = np.array([strain.delay for strain in strains], dtype=float)
+        return table
+
+    def __len__(self):
+        return len(self.nu)
+
+    def __getitem__(self, j):
+        """The jth strain, as a Strain object"""
+        strain = Strain.__new__(Strain)
+        strain.nu = float(self.nu[j])
+        strain.alpha = float(self.alpha[j])
+        strain.beta_unscaled = float(self.beta_unscaled[j])
+        strain.infected = int(self.infected[j])
+        strain.delay = float(self.delay[j])
+        return strain
+
+    def __iter__(self):
+        return (self[j] for j in range(len(self)))
+
+    def __repr__(self):
+        return f"StrainTable(strains={len(self)})"
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class Summary:
+    """Per strain metrics of a run, or of every member of an ensemble,
+    accumulated from the states at the output time points during
+    integration so that the trajectory is never stored
+
+    :param shape: shape of each metric, (strains,) for a single run or
+        (members, strains) for an ensemble
+    :type shape: tuple
+    :param size: initial population size of the run or of each member,
+        used for the attack rate
+    :type size: float or numpy.ndarray
+    :param extinction_threshold: number of infected individuals below which
+        a strain is considered extinct, defaults to 1
+    :type extinction_threshold: float, optional
+    """
+
+    # metrics stored for each strain
+    FIELDS = ('peak_infected', 'peak_time', 'attack_rate', 'total_infections', 'total_deaths', 'extinction_time')
+
+    def __init__(self, shape, size, extinction_threshold=1.0):
+        self.size = np.asarray(size, dtype=float)
+        self.extinction_threshold = extinction_threshold
+        self.peak_infected = np.zeros(shape)
+        self.peak_time = np.full(shape, np.nan)
+        self.total_infections = np.zeros(shape)
+        self.total_deaths = np.zeros(shape)
+        self.extinction_time = np.full(shape, np.nan)
+        self.final_time = None
+        # whether each strain was above the threshold at the last time point
+        self._alive = np.zeros(shape, dtype=bool)
+
+    @property
+    def attack_rate(self):
+        """Fraction of the initial population infected by each strain,
+        including the initially infected individuals"""
+        return self.total_infections/self.size[..., np.newaxis]
+
+    def update(self, t, infected, deaths, infections):
+        """Update the metrics with the next block of time points
+
+        :param t: time points of the block, in increasing order
+        :type t: numpy.ndarray
+        :param infected: number infected with each strain, with time along the last axis
+        :type infected: numpy.ndarray
+        :param deaths: cumulative virus deaths of each strain
+        :type deaths: numpy.ndarray
+        :param infections: cumulative infections of each strain
+        :type infections: numpy.ndarray
+        """
+        # peaks, keeping the earliest time of equal maxima
+        k_peak = infected.argmax(axis=-1)
+        block_peak = np.take_along_axis(infected, k_peak[..., np.newaxis], axis=-1)[..., 0]
+        higher = block_peak > self.peak_infected
+        self.peak_infected = np.where(higher, block_peak, self.peak_infected)
+        self.peak_time = np.where(higher, t[k_peak], self.peak_time)
+        # totals are cumulative states, so only the last point matters
+        self.total_deaths = deaths[..., -1].astype(float)
+        self.total_infections = infections[..., -1].astype(float)
+        # a strain goes extinct at the first point after it was last above
+        # the threshold, and is revived if it rises above it again
+        alive = infected >= self.extinction_threshold
+        n_points = alive.shape[-1]
+        last_alive = n_points - 1 - np.argmax(alive[..., ::-1], axis=-1)
+        died_in_block = np.where(last_alive < n_points - 1, t[np.minimum(last_alive + 1, n_points - 1)], np.nan)
+        died_at_start = np.where(self._alive, t[0], self.extinction_time)
+        self.extinction_time = np.where(alive.any(axis=-1), died_in_block, died_at_start)
+        self._alive = alive[..., -1]
+        self.final_time = t[-1]
+
+    def as_array(self):
+        """The metrics as a NumPy structured array with one record per strain
+
+        :returns: array with one field per metric
+        :rtype: numpy.ndarray
+        """
+        record = np.empty(self.peak_infected.shape, dtype=[(field, float) for field in self.FIELDS])
+        for field in self.FIELDS:
+            record[field] = getattr(self, field)
+        return record
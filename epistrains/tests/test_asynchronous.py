@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import unittest
+import numpy as np
+import epistrains as es
+
+
+def _slow(t):
+    """Step hook making each step take a millisecond"""
+    time.sleep(0.001)
+
+
+class AsyncRunnerTest(unittest.TestCase):
+    """
+    Tests the :class:`AsyncRunner` class and the solve_async function.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))
+        self.strains = [es.Strain(0.001, 7, 1.5 + 0.1*j, 10, delay=j) for j in range(3)]
+
+    def make_solver(self, **kwargs):
+        return es.Solver(self.pop, self.strains, time=100, rtol=1e-10, atol=1e-10, **kwargs)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            es.AsyncRunner(executor='fibre')
+        with self.assertRaises(ValueError):
+            es.AsyncRunner(workers=0)
+        with self.assertRaises(ValueError):
+            es.AsyncRunner(max_concurrency=0)
+
+    def test_solve_async(self):
+        reference = self.make_solver()
+        reference.solve()
+        solver = asyncio.run(es.solve_async(self.make_solver()))
+        np.testing.assert_array_equal(solver.solution.y, reference.solution.y)
+        slow = self.make_solver(step_hook=_slow)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(es.solve_async(slow, timeout=0.02))
+        # the step hook of the model is restored
+        self.assertIs(slow.step_hook, _slow)
+        self.assertIsNone(slow.solution)
+
+    def test_cancel(self):
+        """
+        Tests cancelling a request stops its run after a step.
+        """
+        steps = []
+        solver = self.make_solver(step_hook=lambda t: (steps.append(t), time.sleep(0.001)))
+
+        async def cancel():
+            with es.AsyncRunner(workers=1) as runner:
+                task = asyncio.create_task(runner.solve(solver))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                began = time.monotonic()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                return time.monotonic() - began
+
+        waited = asyncio.run(cancel())
+        self.assertLess(waited, 0.2)
+        count = len(steps)
+        time.sleep(0.05)
+        self.assertEqual(len(steps), count)
+        self.assertLess(steps[-1], 100)
+        self.assertIsNone(solver.solution)
+
+    def test_concurrency(self):
+        """
+        Tests no more than max_concurrency runs are in flight at once.
+        """
+        lock = threading.Lock()
+        active = [0, 0]
+        started = set()
+
+        def step_hook(t):
+            with lock:
+                if threading.get_ident() not in started:
+                    started.add(threading.get_ident())
+                    active[0] += 1
+                    active[1] = max(active)
+            time.sleep(0.0005)
+
+        def hook(segment, y):
+            if segment.end == 100:
+                with lock:
+                    started.discard(threading.get_ident())
+                    active[0] -= 1
+
+        solvers = [self.make_solver(step_hook=step_hook, hook=hook) for _ in range(6)]
+
+        async def run():
+            with es.AsyncRunner(workers=4, max_concurrency=2) as runner:
+                return await runner.solve_all(solvers)
+
+        solved = asyncio.run(run())
+        self.assertEqual(solved, solvers)
+        self.assertTrue(all(solver.solution is not None for solver in solved))
+        self.assertEqual(active, [0, 2])
+
+    def test_processes(self):
+        reference = self.make_solver()
+        reference.solve()
+
+        async def run():
+            with es.AsyncRunner(executor='process', workers=2) as runner:
+                solved = await runner.solve_all([self.make_solver(), self.make_solver()])
+                with self.assertRaises(TimeoutError):
+                    await runner.solve(self.make_solver(step_hook=_slow), timeout=0.05)
+                task = asyncio.create_task(runner.solve(self.make_solver(step_hook=_slow)))
+                await asyncio.sleep(0.1)
+                task.cancel()
+                began = time.monotonic()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                return solved, time.monotonic() - began
+
+        solved, waited = asyncio.run(run())
+        for solver in solved:
+            np.testing.assert_array_equal(solver.solution.y, reference.solution.y)
+        self.assertLess(waited, 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
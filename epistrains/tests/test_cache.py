@@ -0,0 +1,200 @@
+import functools
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import scipy.sparse
+import epistrains as es
+from epistrains.cache import solver_key
+
+# birth rates read by the birth functions of test_globals
+A = 0.0
+B = 0.5
+
+
+class Birth:
+    """Birth rate held by an object, given as its bound method"""
+
+    def __init__(self, a):
+        self.a = a
+
+    def rate(self, N):
+        return self.a*N
+
+
+class Opaque:
+    """Object whose state cannot be described by its contents"""
+    __slots__ = ()
+
+    def __call__(self, N):
+        return 0.0
+
+
+def scaled(weights, N):
+    return weights[1000]*N
+
+
+class SolutionCacheTest(unittest.TestCase):
+    """
+    Tests the :class:`SolutionCache` class.
+    """
+
+    def make_solver(self, R0=0.3, **kwargs):
+        p = es.Population(0.5, 100, es.make_br(2.0, 3.0))
+        return es.Solver(p, [es.Strain(0.1, 0.2, R0, 10), es.Strain(0.1, 0.2, 0.6, 5, delay=1)], time=3, **kwargs)
+
+    def test_key(self):
+        """
+        Tests keys depend on the parameters, not the object identities.
+        """
+        self.assertEqual(solver_key(self.make_solver()), solver_key(self.make_solver()))
+        self.assertNotEqual(solver_key(self.make_solver()), solver_key(self.make_solver(R0=0.4)))
+        self.assertNotEqual(solver_key(self.make_solver()), solver_key(self.make_solver(method='BDF')))
+        p1 = es.Population(0.5, 100, es.make_br(2.0, 3.0))
+        p2 = es.Population(0.5, 100, es.make_br(2.0, 3.5))
+        strains = [es.Strain(0.1, 0.2, 0.3, 10)]
+        self.assertNotEqual(solver_key(es.Solver(p1, strains)), solver_key(es.Solver(p2, strains)))
+        sigma = np.array([[1.0, 0.5], [0.0, 1.0]])
+        self.assertNotEqual(solver_key(self.make_solver()), solver_key(self.make_solver(cross_immunity=sigma)))
+        self.assertEqual(solver_key(self.make_solver(cross_immunity=sigma)),
+                         solver_key(self.make_solver(cross_immunity=scipy.sparse.csr_matrix(sigma))))
+
+    def test_globals(self):
+        """
+        Tests birth functions with the same code reading different globals
+        get different keys, and are not served each other's results.
+        """
+        strains = [es.Strain(0.1, 7, 2.0, 10)]
+        s1 = es.Solver(es.Population(0.001, 10000, lambda N: A*N), strains, time=5)
+        s2 = es.Solver(es.Population(0.001, 10000, lambda N: B*N), strains, time=5)
+        self.assertNotEqual(solver_key(s1), solver_key(s2))
+        cache = es.SolutionCache()
+        self.assertFalse(cache.solve(s1))
+        self.assertFalse(cache.solve(s2))
+        s3 = es.Solver(es.Population(0.001, 10000, lambda N: B*N), strains, time=5)
+        s3.solve()
+        np.testing.assert_allclose(s2.solution.y, s3.solution.y)
+
+    def test_function_state(self):
+        """
+        Tests the state held by bound methods, closures and partials is
+        part of the key, including arrays too large to be shown in full.
+        """
+        strains = [es.Strain(0.1, 7, 2.0, 10)]
+
+        def key(birth):
+            return solver_key(es.Solver(es.Population(0.001, 10000, birth), strains, time=5))
+
+        self.assertNotEqual(key(Birth(0.0).rate), key(Birth(0.5).rate))
+        self.assertEqual(key(Birth(0.5).rate), key(Birth(0.5).rate))
+        weights = np.zeros(2000)
+        changed = weights.copy()
+        changed[1000] = 0.5
+
+        def closure(w):
+            return lambda N: w[1000]*N
+
+        self.assertNotEqual(key(closure(weights)), key(closure(changed)))
+        self.assertNotEqual(key(functools.partial(scaled, weights)), key(functools.partial(scaled, changed)))
+        self.assertEqual(key(functools.partial(scaled, changed)), key(functools.partial(scaled, changed.copy())))
+
+        cache = es.SolutionCache()
+        self.assertFalse(cache.solve(es.Solver(es.Population(0.001, 10000, Birth(0.0).rate), strains, time=5)))
+        s = es.Solver(es.Population(0.001, 10000, Birth(0.5).rate), strains, time=5)
+        self.assertFalse(cache.solve(s))
+        expected = es.Solver(es.Population(0.001, 10000, Birth(0.5).rate), strains, time=5)
+        expected.solve()
+        np.testing.assert_allclose(s.solution.y, expected.solution.y)
+
+        # functions whose state cannot be described are never cached
+        opaque = es.Solver(es.Population(0.001, 10000, Opaque()), strains, time=5)
+        self.assertIsNone(solver_key(opaque))
+        self.assertFalse(cache.solve(opaque))
+        self.assertFalse(cache.solve(es.Solver(es.Population(0.001, 10000, Opaque()), strains, time=5)))
+        self.assertEqual(len(cache), 2)
+
+    def test_hit(self):
+        cache = es.SolutionCache()
+        s = self.make_solver()
+        self.assertFalse(cache.solve(s))
+        s2 = self.make_solver()
+        with patch.object(es.Solver, 'solve') as solve:
+            self.assertTrue(cache.solve(s2))
+            solve.assert_not_called()
+        np.testing.assert_array_equal(s2.solution.y, s.solution.y)
+        np.testing.assert_array_equal(s2.solution.cumulative_deaths, s.solution.cumulative_deaths)
+        np.testing.assert_array_equal(s2.daily_deaths, s.daily_deaths)
+        np.testing.assert_array_equal(s2.deaths, s.deaths)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        # results handed out are copies
+        s2.solution.y[0, 0] = -1
+        s3 = self.make_solver()
+        cache.solve(s3)
+        self.assertEqual(s3.solution.y[0, 0], s.solution.y[0, 0])
+
+    def test_dense(self):
+        cache = es.SolutionCache()
+        cache.solve(self.make_solver(dense_output=True))
+        s = self.make_solver(dense_output=True)
+        self.assertTrue(cache.solve(s))
+        self.assertEqual(s.solution(0.5).shape, (4,))
+
+    def test_eviction(self):
+        s = self.make_solver()
+        cache = es.SolutionCache()
+        cache.solve(s)
+        size = cache.bytes
+        cache = es.SolutionCache(max_bytes=2*size)
+        for R0 in (0.3, 0.4, 0.5):
+            cache.solve(self.make_solver(R0=R0))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.bytes, 2*size)
+        # the least recently used entry was evicted
+        self.assertFalse(cache.solve(self.make_solver(R0=0.3)))
+        self.assertTrue(cache.solve(self.make_solver(R0=0.5)))
+        # continuous solutions count towards the budget
+        cache = es.SolutionCache()
+        cache.solve(self.make_solver(dense_output=True))
+        self.assertGreater(cache.bytes, size)
+        cache = es.SolutionCache(max_bytes=size)
+        cache.solve(self.make_solver(dense_output=True))
+        self.assertEqual(len(cache), 0)
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            s = self.make_solver()
+            es.SolutionCache(directory=directory).solve(s)
+            cache = es.SolutionCache(directory=directory)
+            s2 = self.make_solver()
+            self.assertTrue(cache.solve(s2))
+            self.assertEqual(cache.disk_hits, 1)
+            np.testing.assert_array_equal(s2.solution.y, s.solution.y)
+            # the entry is now also held in memory
+            self.assertTrue(cache.solve(self.make_solver()))
+            self.assertEqual(cache.hits, 1)
+            # dense output is not stored on disk
+            self.assertFalse(cache.solve(self.make_solver(dense_output=True)))
+
+    def test_checkpoint(self):
+        """
+        Tests solvers served from memory or disk can make checkpoints, and
+        record that nothing was integrated.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            s = self.make_solver()
+            es.SolutionCache(directory=directory).solve(s)
+            expected = es.Solver(s.pop, s.strains, time=5)
+            expected.solve(resume=s.checkpoint())
+            memory = es.SolutionCache()
+            memory.solve(self.make_solver())
+            for cache in (memory, es.SolutionCache(directory=directory)):
+                s2 = self.make_solver()
+                self.assertTrue(cache.solve(s2))
+                self.assertEqual(s2.stats.nfev, 0)
+                self.assertEqual(len(s2.stats.segments), 0)
+                resumed = es.Solver(s.pop, s.strains, time=5)
+                resumed.solve(resume=s2.checkpoint())
+                np.testing.assert_array_equal(resumed.solution.state, expected.solution.state)
+                np.testing.assert_array_equal(resumed.daily_deaths, expected.daily_deaths)
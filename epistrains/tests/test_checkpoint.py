@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import epistrains as es
+
+
+class CheckpointTest(unittest.TestCase):
+    """
+    Tests the :class:`Checkpoint` class and resuming Solver runs.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.0001, 150000, es.make_br(10.0, 0.001), waning=0.001)
+        self.strains = [es.Strain(0.001, 7, 3.0, 150), es.Strain(0.002, 8, 4.0, 10, delay=100)]
+        self.t_eval = np.arange(366)
+
+    def make_checkpoint(self, **kwargs):
+        s = es.Solver(self.pop, self.strains, time=70, rtol=1e-9, atol=1e-9, **kwargs)
+        with self.assertRaises(ValueError):
+            s.checkpoint()
+        s.solve()
+        return s.checkpoint()
+
+    def test_extend(self):
+        """
+        Tests extending the horizon matches solving the whole run.
+        """
+        checkpoint = self.make_checkpoint(t_eval=self.t_eval[:71])
+        self.assertEqual(checkpoint.time, 70)
+        np.testing.assert_array_equal(checkpoint.seeded, [True, False])
+        full = es.Solver(self.pop, self.strains, time=365, rtol=1e-9, atol=1e-9, t_eval=self.t_eval)
+        full.solve()
+        extended = es.Solver(self.pop, self.strains, time=365, rtol=1e-9, atol=1e-9, t_eval=self.t_eval)
+        extended.solve(resume=checkpoint)
+        np.testing.assert_array_equal(extended.solution.t, full.solution.t)
+        np.testing.assert_allclose(extended.solution.state, full.solution.state, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(extended.daily_deaths, full.daily_deaths, rtol=1e-6, atol=1e-8)
+        # only the days after the checkpoint are integrated
+        self.assertEqual(extended.stats.segments[0].start, 70)
+        np.testing.assert_array_equal(extended.checkpoint().seeded, [True, True])
+
+    def test_seeding(self):
+        """
+        Tests strains are seeded once, including those introduced at or
+        moved to before the checkpoint.
+        """
+        checkpoint = self.make_checkpoint()
+        moved = [self.strains[0], es.Strain(0.002, 8, 4.0, 10, delay=50)]
+        at_checkpoint = [self.strains[0], es.Strain(0.002, 8, 4.0, 10, delay=70)]
+        for strains in (moved, at_checkpoint):
+            s = es.Solver(self.pop, strains, time=80)
+            s.solve(resume=checkpoint)
+            start = np.searchsorted(s.solution.t, 70)
+            self.assertEqual(s.solution.cumulative_infections[1, start], 10)
+            self.assertEqual(s.solution.cumulative_infections[0, start], checkpoint.state[2*2 + 2])
+            self.assertTrue(np.all(np.diff(s.solution.t) > 0))
+
+        # a strain seeded before the checkpoint whose delay is moved past it
+        s = es.Solver(self.pop, moved, time=70)
+        s.solve()
+        later = [self.strains[0], es.Strain(0.002, 8, 4.0, 10, delay=100)]
+        resumed = es.Solver(self.pop, later, time=120, t_eval=np.arange(121))
+        resumed.solve(resume=s.checkpoint())
+        before, at = np.searchsorted(resumed.solution.t, [99, 100])
+        self.assertLess(resumed.solution.y[2, at], 1)
+        self.assertAlmostEqual(resumed.solution.cumulative_infections[1, at],
+                               resumed.solution.cumulative_infections[1, before], delta=0.1)
+        np.testing.assert_array_equal(resumed.checkpoint().seeded, [True, True])
+
+    def test_branch(self):
+        """
+        Tests branching futures, and saving and loading checkpoints.
+        """
+        checkpoint = self.make_checkpoint(dense_output=True)
+        stronger = [self.strains[0], es.Strain(0.002, 8, 6.0, 10, delay=100)]
+        same, other = checkpoint.branch([{'time': 200}, {'time': 200, 'strains': stronger}])
+        self.assertEqual(same.method, 'RK45')
+        self.assertEqual(same.rtol, 1e-9)
+        np.testing.assert_array_equal(same.solution.y[:, :700], other.solution.y[:, :700])
+        self.assertGreater(other.daily_deaths_by_strain[1].sum(), same.daily_deaths_by_strain[1].sum())
+        # the continuous solution of the history is kept
+        np.testing.assert_allclose(same.solution(35.5), checkpoint.solution(35.5))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.npz')
+            checkpoint.save(path)
+            loaded = es.Checkpoint.load(path)
+        self.assertEqual(loaded.settings, checkpoint.settings)
+        np.testing.assert_array_equal(loaded.solution.state, checkpoint.solution.state)
+        with self.assertRaises(ValueError):
+            loaded.branch([{'time': 200}])
+        resumed, = loaded.branch([{}], pop=self.pop, strains=self.strains, time=200)
+        np.testing.assert_array_equal(resumed.solution.state, same.solution.state)
+
+        with self.assertRaises(ValueError):
+            checkpoint.branch([{}])
+        with self.assertRaises(ValueError):
+            es.Solver(self.pop, self.strains, time=60).solve(resume=checkpoint)
+        with self.assertRaises(ValueError):
+            es.Solver(self.pop, self.strains[:1], time=200).solve(resume=checkpoint)
+
+
+if __name__ == '__main__':
+    unittest.main()
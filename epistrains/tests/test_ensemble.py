@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import epistrains as es
+
+
+class EnsembleSolverTest(unittest.TestCase):
+    """
+    Tests the :class:`EnsembleSolver` class.
+    """
+
+    def setUp(self):
+        self.br = es.make_br(2.0, 3.0)
+
+    def test_create(self):
+        """
+        Tests parameters are broadcast to (members, strains).
+        """
+        e = es.EnsembleSolver(R0=[[0.3, 0.6], [1.2, 0.6], [2.0, 3.0]], CFR=0.1, recovery_time=0.2,
+                              infected=[10, 5], death=0.5, size=100, birth_function=self.br)
+        self.assertEqual((e.m, e.n), (3, 2))
+        self.assertEqual(e.beta_scaled.shape, (3, 2))
+        self.assertEqual(e.solution, None)
+        s = es.Strain(0.1, 0.2, 1.2, 10)
+        self.assertAlmostEqual(e.beta_scaled[1, 0], s.beta_unscaled/85)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(TypeError):
+            es.EnsembleSolver('bad', 0.1, 0.2, 10, 0.5, 100, self.br)
+        with self.assertRaises(ValueError):
+            es.EnsembleSolver([[1.0, 2.0]], 0.1, 0.2, [1, 2, 3], 0.5, 100, self.br)
+        with self.assertRaises(ValueError):
+            es.EnsembleSolver(np.zeros((2, 0)), 0.1, 0.2, 1, 0.5, 100, self.br)
+
+    def test_matches_solver(self):
+        """
+        Tests each member matches an individual Solver run.
+        """
+        R0 = [[0.3, 0.6], [1.2, 0.6], [2.0, 3.0]]
+        deaths = [0.5, 0.2, 0.1]
+        e = es.EnsembleSolver(R0=R0, CFR=0.1, recovery_time=0.2, infected=[10, 5], delay=[0, 1],
+                              death=deaths, size=100, birth_function=self.br, waning=0.1, time=3,
+                              rtol=1e-8, atol=1e-8)
+        e.solve()
+        self.assertEqual(e.solution.y.shape, (3, 4, len(e.solution.t)))
+        self.assertEqual(e.deaths.shape, (3, len(e.solution.t)))
+        for k in range(3):
+            p = es.Population(deaths[k], 100, self.br, waning=0.1)
+            strains = [es.Strain(0.1, 0.2, R0[k][0], 10), es.Strain(0.1, 0.2, R0[k][1], 5, delay=1)]
+            s = es.Solver(p, strains, time=3, rtol=1e-8, atol=1e-8)
+            s.solve()
+            np.testing.assert_allclose(e.solution.t, s.solution.t)
+            np.testing.assert_allclose(e.solution.y[k], s.solution.y, rtol=1e-5, atol=1e-6)
+            np.testing.assert_allclose(e.deaths[k], s.deaths, rtol=1e-5, atol=1e-6)
+            np.testing.assert_allclose(e.daily_deaths[k], s.daily_deaths, rtol=1e-5, atol=1e-8)
+
+    def test_member_delays(self):
+        """
+        Tests strains are only seeded at each member's own delay.
+        """
+        e = es.EnsembleSolver(R0=2.0, CFR=0.1, recovery_time=5, infected=10, delay=[[0], [2]],
+                              death=0.01, size=1000, birth_function=lambda N: 0.0, time=4)
+        e.solve()
+        t = e.solution.t
+        infected = e.solution.y[:, 1, :]
+        self.assertTrue(np.all(infected[0] > 0))
+        self.assertTrue(np.all(infected[1, t < 2] == 0))
+        self.assertEqual(infected[1, np.nonzero(t == 2)[0][-1]], 10)
+
+    def test_implicit(self):
+        e = es.EnsembleSolver(R0=[[1.5], [2.5]], CFR=0.1, recovery_time=5, infected=10, death=0.01,
+                              size=1000, birth_function=lambda N: 0.0, time=5)
+        e.solve()
+        e_bdf = es.EnsembleSolver(R0=[[1.5], [2.5]], CFR=0.1, recovery_time=5, infected=10, death=0.01,
+                                  size=1000, birth_function=lambda N: 0.0, time=5, method='BDF')
+        e_bdf.solve()
+        np.testing.assert_allclose(e_bdf.solution.y, e.solution.y, rtol=1e-2)
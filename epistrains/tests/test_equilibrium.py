@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import epistrains as es
+
+
+class EquilibriumTest(unittest.TestCase):
+    """
+    Tests the equilibria and final_size functions.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.01, 1000, es.LogisticBirth(0.05, 2000.0), waning=0.05)
+        self.strains = [es.Strain(0.01, 7, 2.0, 10), es.Strain(0.02, 5, 3.0, 5)]
+
+    def test_equilibria(self):
+        """
+        Tests the disease free and endemic equilibria, and that the stable
+        one is where a long run ends.
+        """
+        eq = es.equilibria(self.pop, self.strains)
+        self.assertEqual(len(eq), 3)
+        self.assertEqual([e.stability for e in eq], ['unstable', 'unstable', 'stable'])
+        # without disease the population settles where births balance deaths
+        self.assertAlmostEqual(eq[0].N, 2000.0*(1 - 0.01/0.05))
+        np.testing.assert_array_equal(eq[0].infected, 0)
+        # each strain alone settles where it replaces itself
+        s = es.Solver(self.pop, self.strains)
+        for j, e in enumerate(eq[1:]):
+            np.testing.assert_array_equal(e.strains, [j])
+            self.assertAlmostEqual(e.S*s.beta_scaled[j], s._removal[j])
+        run = es.Solver(self.pop, self.strains, time=3000, method='BDF', rtol=1e-8, atol=1e-8)
+        run.solve()
+        end = run.solution.y[:, -1]
+        np.testing.assert_allclose([eq[2].S, *eq[2].infected, eq[2].R], end, rtol=1e-5, atol=1e-5)
+
+    def test_cross_immunity(self):
+        """
+        Tests strains coexisting with partial cross-immunity.
+        """
+        sigma = [[1.0, 0.5], [0.5, 1.0]]
+        eq = es.equilibria(self.pop, self.strains, cross_immunity=sigma)
+        stable = [e for e in eq if e.stability == 'stable']
+        self.assertEqual(len(stable), 1)
+        np.testing.assert_array_equal(stable[0].strains, [0, 1])
+        run = es.Solver(self.pop, self.strains, time=3000, method='BDF', rtol=1e-8, atol=1e-8, cross_immunity=sigma)
+        run.solve()
+        np.testing.assert_allclose([stable[0].S, *stable[0].infected, stable[0].R], run.solution.y[:, -1], rtol=1e-5)
+        np.testing.assert_allclose(stable[0].recovered_by_strain, run.solution.recovered_by_strain[:, -1], rtol=1e-5)
+
+    def test_final_size(self):
+        """
+        Tests the final size relation against a long run of each strain alone.
+        """
+        pop = es.Population(0.0, 10000, es.ConstantBirth(0.0))
+        table = es.StrainTable([0.01, 0.02, 0.01], [7, 5, 4], [2.0, 3.0, 0.8], [10, 5, 20])
+        size = es.final_size(pop, table)
+        for j, strain in enumerate(table):
+            alone = es.final_size(pop, [strain])
+            run = es.Solver(pop, [strain], time=1000, rtol=1e-10, atol=1e-10)
+            run.solve()
+            self.assertAlmostEqual(alone['infections'][0], run.solution.cumulative_infections[0, -1] - strain.infected,
+                                   delta=1e-4*pop.init_size)
+            self.assertAlmostEqual(alone['deaths'][0], run.solution.cumulative_deaths[0, -1], delta=1e-3)
+            self.assertAlmostEqual(alone['susceptible'][0], run.solution.y[0, -1], delta=1e-4*pop.init_size)
+        # below the epidemic threshold only a few are infected
+        self.assertLess(size['infections'][2], 100)
+        np.testing.assert_allclose(size['deaths'] + size['recoveries'], size['infections'] + table.infected)
+
+
+if __name__ == '__main__':
+    unittest.main()
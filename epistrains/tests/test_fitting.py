@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import epistrains as es
+from epistrains.fitting import solve_sensitivities
+
+
+class DeathsFitTest(unittest.TestCase):
+    """
+    Tests the :class:`DeathsFit` class and :func:`solve_sensitivities`.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.0001, 100000, es.make_br(0.1, 0.00001))
+        self.strains = [es.Strain(0.01, 7, 2.0, 50), es.Strain(0.02, 5, 1.5, 30, delay=10)]
+        s = es.Solver(self.pop, self.strains, time=40, rtol=1e-8, atol=1e-8)
+        s.solve()
+        self.solver = s
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            es.DeathsFit(self.pop, self.strains, np.zeros((3, 10)))
+        with self.assertRaises(ValueError):
+            es.DeathsFit(self.pop, self.strains, np.zeros(10), fit=('beta',))
+
+    def test_solve_sensitivities(self):
+        """
+        Tests the deaths match Solver and the sensitivities match finite differences.
+        """
+        s = es.Solver(self.pop, self.strains, time=40, rtol=1e-8, atol=1e-8)
+        deaths, sensitivity = solve_sensitivities(s)
+        np.testing.assert_allclose(np.diff(deaths, axis=1), self.solver.daily_deaths_by_strain, rtol=1e-5, atol=1e-8)
+        self.assertEqual(sensitivity.shape, (2, 41, 6))
+        # perturb the recovery rate of the second strain
+        h = 1e-6
+        for sign in (1, -1):
+            s = es.Solver(self.pop, self.strains, time=40, rtol=1e-10, atol=1e-10)
+            s.nu[1] += sign*h
+            s._removal = s.b + s.nu + s.alpha
+            s.solve()
+            if sign == 1:
+                upper = s.daily_deaths_by_strain
+            else:
+                lower = s.daily_deaths_by_strain
+        np.testing.assert_allclose(np.diff(sensitivity[:, :, 3], axis=1), (upper - lower)/(2*h), rtol=1e-3, atol=1e-4)
+
+    def test_gradient(self):
+        """
+        Tests the gradient of the log-likelihood matches finite differences.
+        """
+        f = es.DeathsFit(self.pop, self.strains, self.solver.daily_deaths, fit=('R0', 'CFR', 'recovery_time'))
+        x = f.initial_values()*1.05
+        loglik, gradient = f.log_likelihood(x)
+        self.assertEqual(gradient.shape, (6,))
+        h = 1e-6
+        for i in range(6):
+            step = h*np.eye(6)[i]
+            expected = (f.log_likelihood(x + step)[0] - f.log_likelihood(x - step)[0])/(2*h)
+            self.assertAlmostEqual(gradient[i], expected, delta=1e-4*max(1, abs(expected)))
+
+    def test_fit(self):
+        """
+        Tests R0 and CFR of each strain are recovered from their own deaths.
+        """
+        f = es.DeathsFit(self.pop, self.strains, self.solver.daily_deaths_by_strain)
+        result = f.fit_parameters(x0=[1.8, 1.7, 0.015, 0.015])
+        np.testing.assert_allclose(result.x, [2.0, 1.5, 0.01, 0.02], rtol=1e-2)
+        self.assertEqual(f.nfev, result.nfev)
+        strains = f.make_strains(result.x)
+        self.assertAlmostEqual(strains[1].delay, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import warnings
+import numpy as np
+import epistrains as es
+from epistrains.fixed_step import integrate_fixed, step_grid
+
+
+class FixedStepTest(unittest.TestCase):
+    """
+    Tests the fixed step integrators and :meth:`EnsembleSolver.solve_fixed`.
+    """
+
+    def setUp(self):
+        self.e = es.EnsembleSolver(R0=[[2.5, 1.5], [1.5, 3.0]], CFR=0.01, recovery_time=[5, 7], infected=[10, 5],
+                                   delay=[0, 2], death=0.001, size=1000, birth_function=es.ConstantBirth(1.0),
+                                   time=20, rtol=1e-8, atol=1e-8)
+
+    def test_step_grid(self):
+        np.testing.assert_allclose(step_grid(1, 0.25), [0, 0.25, 0.5, 0.75, 1])
+        np.testing.assert_allclose(step_grid(1, 0.4), [0, 0.4, 0.8, 1])
+        with self.assertRaises(ValueError):
+            step_grid(1, 0)
+
+    def test_order(self):
+        """
+        Tests the error of each method falls at its order of accuracy.
+        """
+        for method, order in (('euler', 1), ('rk4', 4)):
+            errors = []
+            for dt in (0.1, 0.05):
+                t = step_grid(1, dt)
+                y = integrate_fixed(lambda t, y: -y, t, np.array([1.0]), method)
+                errors.append(abs(y[0, -1] - np.exp(-1)))
+            self.assertAlmostEqual(np.log2(errors[0]/errors[1]), order, delta=0.2)
+        with self.assertRaises(ValueError):
+            integrate_fixed(lambda t, y: -y, t, np.array([1.0]), 'rk45')
+
+    def test_solve_fixed(self):
+        error = self.e.solve_fixed(dt=0.05, check_error=True)
+        self.assertEqual(error.shape, (2,))
+        self.assertTrue(np.all(error < 1e-3))
+        t = self.e.solution.t
+        self.assertEqual(self.e.solution.y.shape, (2, 4, len(t)))
+        # strains are seeded on the step grid
+        self.assertTrue(np.all(self.e.solution.y[:, 2, t < 2] == 0))
+        self.assertEqual(self.e.solution.y[0, 2, np.argmin(np.abs(t - 2))], 5)
+        self.assertEqual(self.e.daily_deaths.shape, (2, 20))
+        fixed_deaths = self.e.daily_deaths
+        self.e.solve()
+        np.testing.assert_allclose(fixed_deaths, self.e.daily_deaths, rtol=1e-2, atol=1e-4)
+
+    def test_error_warning(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.e.solve_fixed(dt=2.0, method='euler', check_error=True)
+        self.assertTrue(any(issubclass(w.category, RuntimeWarning) for w in caught))
+
+    def test_from_solvers(self):
+        br = es.ConstantBirth(1.0)
+        solvers = [es.Solver(es.Population(0.001, 1000, br, waning=0.01),
+                             [es.Strain(0.01, 5, R0, 10), es.Strain(0.02, 7, 1.5, 5, delay=2)], time=10)
+                   for R0 in (1.5, 2.5)]
+        e = es.EnsembleSolver.from_solvers(solvers, rtol=1e-8, atol=1e-8)
+        e.solve()
+        for k, s in enumerate(solvers):
+            s.rtol = s.atol = 1e-8
+            s.solve()
+            np.testing.assert_allclose(e.solution.y[k], s.solution.y, rtol=1e-5, atol=1e-6)
+        with self.assertRaises(ValueError):
+            es.EnsembleSolver.from_solvers([solvers[0], es.Solver(solvers[0].pop, solvers[0].strains[:1], time=10)])
@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+import scipy.sparse
+import epistrains as es
+
+
+class MetapopulationSolverTest(unittest.TestCase):
+    """
+    Tests the :class:`MetapopulationSolver` class.
+    """
+
+    def setUp(self):
+        self.pops = [es.Population(0.0001, 10000, es.make_br(0.1, 0.0001), waning=0.01),
+                     es.Population(0.0002, 12000, es.LogisticBirth(0.001, 15000.0)),
+                     es.Population(0.0001, 8000, es.make_br(0.1, 0.0001), immunity=10.0)]
+        self.strains = [es.Strain(0.01, 7, 2.0, 5), es.Strain(0.02, 5, 1.5, 3, delay=10)]
+        self.mobility = np.array([[0.9, 0.1, 0.0], [0.1, 0.8, 0.1], [0.0, 0.1, 0.9]])
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver([], self.strains, np.eye(0))
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver(self.pops, [], np.eye(3))
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver(self.pops, self.strains, np.eye(2))
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver(self.pops, self.strains, -np.eye(3))
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver(self.pops, self.strains, np.eye(3), infected=np.ones((2, 2)))
+
+    def test_independent_regions(self):
+        """
+        Tests each region matches its own Solver without mobility.
+        """
+        m = es.MetapopulationSolver(self.pops, self.strains, np.eye(3), time=40, rtol=1e-8, atol=1e-8)
+        m.solve()
+        self.assertEqual(m.solution.y.shape, (3, 4, len(m.solution.t)))
+        for k, pop in enumerate(self.pops):
+            s = es.Solver(pop, self.strains, time=40, rtol=1e-8, atol=1e-8)
+            s.solve()
+            np.testing.assert_allclose(m.solution.y[k], s.solution.y, rtol=1e-5, atol=1e-4)
+            np.testing.assert_allclose(m.daily_deaths[k], s.daily_deaths, rtol=1e-5, atol=1e-6)
+
+    def test_mobility(self):
+        """
+        Tests infection spreads from the seeded region, with dense and sparse mobility.
+        """
+        infected = [[5, 3], [0, 0], [0, 0]]
+        dense = es.MetapopulationSolver(self.pops, self.strains, self.mobility, infected=infected, time=60,
+                                        rtol=1e-8, atol=1e-8)
+        dense.solve()
+        sparse = es.MetapopulationSolver(self.pops, self.strains, scipy.sparse.csr_matrix(self.mobility),
+                                         infected=infected, time=60, rtol=1e-8, atol=1e-8)
+        sparse.solve()
+        np.testing.assert_allclose(sparse.solution.state, dense.solution.state, rtol=1e-8)
+        # the third region is only reached through the second, which lags
+        # behind the seeded region early on
+        infections = dense.solution.cumulative_infections[:, 0]
+        self.assertGreater(infections[2, -1], 1.0)
+        day = np.searchsorted(dense.solution.t, 10)
+        self.assertTrue(infections[0, day] > infections[1, day] > infections[2, day] > 0)
+        # without mobility, the unseeded regions stay free of infection
+        isolated = es.MetapopulationSolver(self.pops, self.strains, np.eye(3), infected=infected, time=60)
+        isolated.solve()
+        np.testing.assert_array_equal(isolated.solution.cumulative_infections[1:], 0)
+
+    def test_birth_groups(self):
+        """
+        Tests regions with built-in birth functions of the same form are
+        evaluated in one call, and others by shared function.
+        """
+        def birth(N):
+            return 0.01*N
+
+        funcs = [es.make_br(0.1, 0.0001), es.make_br(0.2, 0.0002), es.LogisticBirth(0.001, 15000.0),
+                 es.ConstantBirth(3.0), birth, es.ConstantBirth(4.0), birth, lambda N: 2.0, es.make_br(0.1, 0.0001)]
+        pops = [es.Population(0.0001, 10000, func) for func in funcs]
+        m = es.MetapopulationSolver(pops, self.strains, np.eye(len(pops)))
+        self.assertEqual(len(m._birth_groups), 5)
+        N = np.linspace(5000.0, 12000.0, len(pops))
+        np.testing.assert_allclose(m._birth(N), [func(size) for func, size in zip(funcs, N)])
+
+    def test_jac_sparsity(self):
+        """
+        Tests the sparsity pattern covers the numerical Jacobian.
+        """
+        m = es.MetapopulationSolver(self.pops, self.strains, self.mobility, time=10)
+        y = np.random.default_rng(0).uniform(1, 100, 3*8)
+        h = 1e-4
+        numeric = np.column_stack([(m._rhs(y + h*e) - m._rhs(y - h*e))/(2*h) for e in np.eye(len(y))])
+        pattern = m.jac_sparsity().toarray()
+        self.assertFalse(np.any((np.abs(numeric) > 1e-12) & (pattern == 0)))
+        self.assertTrue(np.all(pattern[:8, 16:] == 0))
+        bdf = es.MetapopulationSolver(self.pops, self.strains, self.mobility, time=10, method='BDF')
+        bdf.solve()
+        m.solve()
+        np.testing.assert_allclose(bdf.solution.y[..., -1], m.solution.y[..., -1], rtol=1e-2)
+
+    def test_from_solvers(self):
+        solvers = [es.Solver(pop, self.strains, time=5) for pop in self.pops]
+        m = es.MetapopulationSolver.from_solvers(solvers, self.mobility)
+        self.assertEqual((m.m, m.n, m.time), (3, 2, 5))
+        with self.assertRaises(ValueError):
+            es.MetapopulationSolver.from_solvers([solvers[0], es.Solver(self.pops[1], self.strains[:1], time=5)],
+                                                 np.eye(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import pickle
+import numpy as np
+import epistrains as es
+
+
+class SweepTest(unittest.TestCase):
+    """
+    Tests the :func:`sweep` and :func:`grid_product` functions.
+    """
+
+    def setUp(self):
+        br = es.make_br(2.0, 3.0)
+        self.pops = [es.Population(0.5, 100, br), es.Population(0.2, 100, br, waning=0.1)]
+        self.strains = [[es.Strain(0.1, 0.2, 0.3, 10)],
+                        [es.Strain(0.1, 0.2, 0.3, 10), es.Strain(0.1, 0.2, 0.6, 5, delay=1)]]
+        self.grid = es.grid_product(pop=self.pops, strains=self.strains, time=[2, 3])
+
+    def test_grid_product(self):
+        self.assertEqual(len(self.grid), 8)
+        self.assertEqual(self.grid[0], {'pop': self.pops[0], 'strains': self.strains[0], 'time': 2})
+        self.assertEqual(self.grid[-1], {'pop': self.pops[1], 'strains': self.strains[1], 'time': 3})
+
+    def test_make_br_pickle(self):
+        br = pickle.loads(pickle.dumps(es.make_br(2.0, 3.0)))
+        self.assertEqual(br(10), es.make_br(2.0, 3.0)(10))
+
+    def test_sweep(self):
+        """
+        Tests sweep results match solving each grid point directly.
+        """
+        results = list(es.sweep(self.grid, workers=2, chunksize=3))
+        self.assertEqual(sorted(i for i, _ in results), list(range(len(self.grid))))
+        for i, solver in results:
+            expected = es.Solver(**self.grid[i])
+            expected.solve()
+            np.testing.assert_allclose(solver.solution.y, expected.solution.y)
+            np.testing.assert_allclose(solver.deaths, expected.deaths)
+
+    def test_ordered(self):
+        indices = [i for i, _ in es.sweep(self.grid, workers=2, chunksize=1, ordered=True)]
+        self.assertEqual(indices, list(range(len(self.grid))))
+        indices = [i for i, _ in es.sweep(self.grid, workers=1)]
+        self.assertEqual(indices, list(range(len(self.grid))))
+
+    def test_workers(self):
+        with self.assertRaises(ValueError):
+            list(es.sweep(self.grid, workers=0))
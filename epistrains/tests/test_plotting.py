@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import matplotlib.pylab as plt
+import epistrains as es
+from epistrains import plotting
+
+
+class PlottingTest(unittest.TestCase):
+    """
+    Tests the headless and batch plotting functions.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.0001, 1000, es.make_br(0.1, 0.001))
+        self.strains = [es.Strain(0.01, 7, 2.0, 10), es.Strain(0.02, 5, 1.5, 5)]
+        self.ensemble = es.EnsembleSolver(R0=[[1.5, 2.0], [2.5, 2.0], [3.0, 1.2]], CFR=0.01, recovery_time=7,
+                                          infected=[10, 5], death=0.0001, size=1000,
+                                          birth_function=es.make_br(0.1, 0.001), time=20)
+
+    def test_figures_closed(self):
+        """
+        Tests saving through pyplot leaves no figure open.
+        """
+        s = es.Solver(self.pop, self.strains, time=10)
+        s.solve()
+        plt.close('all')
+        with patch('matplotlib.pylab.savefig'):
+            s.save_compartments('test.png')
+            s.save_death('test_death.png')
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_make_figure(self):
+        s = es.Solver(self.pop, self.strains, time=10)
+        with self.assertRaises(ValueError):
+            plotting.make_figure(s)
+        s.solve()
+        fig = plotting.make_figure(s)
+        # figures made outside of pyplot are not tracked by it
+        self.assertEqual(plt.get_fignums(), [])
+        self.assertEqual(len(fig.axes[0].lines), 5)
+        self.assertEqual(len(plotting.make_figure(s, 'deaths').axes), 2)
+        with self.assertRaises(ValueError):
+            plotting.make_figure(s, 'histogram')
+
+    def test_fan_chart(self):
+        self.ensemble.solve()
+        fig = plotting.make_figure(self.ensemble, 'fan')
+        ax = fig.axes[0]
+        # two bands and a median per compartment: S, I1, I2, R and D
+        self.assertEqual(len(ax.collections), 10)
+        self.assertEqual(len(ax.lines), 5)
+        np.testing.assert_allclose(ax.lines[0].get_ydata(), np.median(self.ensemble.solution.y[:, 0], axis=0))
+        band = ax.collections[0].get_paths()[0].vertices
+        self.assertAlmostEqual(band[:, 1].min(), np.quantile(self.ensemble.solution.y[:, 0], 0.05, axis=0).min())
+        fig = plotting.make_figure(self.ensemble, 'fan', quantiles=(0.1, 0.9))
+        self.assertEqual((len(fig.axes[0].collections), len(fig.axes[0].lines)), (5, 0))
+        with self.assertRaises(ValueError):
+            plotting.make_figure(self.ensemble, 'fan', quantiles=(0.5, 1.5))
+        stochastic = es.StochasticSolver(self.pop, self.strains, time=10, replicates=20, seed=1)
+        stochastic.solve()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fan.png')
+            stochastic.save_fan_chart(path)
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_save_figures(self):
+        solvers = [es.Solver(self.pop, self.strains[:k], time=10) for k in (1, 2)]
+        for solver in solvers:
+            solver.solve()
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, f'run_{k}.png') for k in range(len(solvers))]
+            for workers in (1, 2):
+                plotting.save_figures(solvers, paths, kind='deaths', dpi=50, workers=workers)
+                self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+                for path in paths:
+                    os.remove(path)
+            with self.assertRaises(ValueError):
+                plotting.save_figures(solvers, paths[:1])
+            with self.assertRaises(ValueError):
+                plotting.save_figures(solvers, paths, workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
+import math
 import unittest
+import numpy as np
 import epistrains as es
 
 
@@ -14,6 +16,9 @@ class PopulationTest(unittest.TestCase):
         p = es.Population(0.5, 0, br)
         birth = p.birth_rate(10)
         self.assertEqual(20, birth)
+        # populations have fixed attributes
+        with self.assertRaises(AttributeError):
+            p.other = 1
 
     def test_input_birth(self):
         """
@@ -62,9 +67,38 @@ class PopulationTest(unittest.TestCase):
 
     def test_br_pop_size(self):
         """
-        Tests type error raised when updating birth rate
+        Tests birth rate accepts float and array population sizes
         """
         br = es.make_br(2.0, 3.0)
         p = es.Population(0.5, 0, br)
+        self.assertAlmostEqual(p.birth_rate(1.5), 1.5*2.0*np.exp(-4.5))
+        np.testing.assert_allclose(p.birth_rate(np.array([1, 1.5])), [2.0*np.exp(-3.0), 3.0*np.exp(-4.5)])
         with self.assertRaises(TypeError):
-            p.birth_rate(100.0)
+            p.birth_rate('100')
+
+    def test_builtin_births(self):
+        """
+        Tests the built-in birth functions and their derivatives
+        """
+        N = np.array([10.0, 250.0, 900.0])
+        for br in (es.ConstantBirth(5.0), es.ExponentialBirth(2.0, 0.003), es.LogisticBirth(0.1, 1000.0)):
+            births = br(N)
+            self.assertEqual(births.shape, (3,))
+            self.assertAlmostEqual(br(250.0), births[1])
+            # derivative agrees with a central difference
+            numeric = (br(N + 1e-4) - br(N - 1e-4))/2e-4
+            np.testing.assert_allclose(br.derivative(N), numeric, rtol=1e-6, atol=1e-9)
+            self.assertEqual(es.population.birth_derivative(br, 250.0), br.derivative(250.0))
+        np.testing.assert_allclose(es.LogisticBirth(0.1, 1000.0)(N), 0.1*N*(1 - N/1000))
+        self.assertEqual(repr(es.make_br(2.0, 3.0)), 'ExponentialBirth(a=2.0, k=3.0)')
+
+    def test_birth_rates(self):
+        """
+        Tests birth functions are evaluated on arrays of population sizes
+        """
+        N = np.array([10.0, 20.0])
+        np.testing.assert_allclose(es.population.birth_rates(lambda N: 0.5*N, N), [5.0, 10.0])
+        np.testing.assert_allclose(es.population.birth_rates(lambda N: 5, N), [5.0, 5.0])
+        # functions written for a single population size are called per size
+        np.testing.assert_allclose(es.population.birth_rates(lambda N: math.log(N), N), np.log(N))
+        self.assertAlmostEqual(es.population.birth_derivative(lambda N: N**2, 3.0), 6.0)
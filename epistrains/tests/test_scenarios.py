@@ -0,0 +1,138 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import epistrains as es
+from epistrains import cli, scenarios
+
+DESCRIPTION = {
+    'defaults': {'time': 20},
+    'populations': {'town': {'death': 0.0001, 'size': 1000, 'birth': {'form': 'exponential', 'a': 0.1, 'k': 0.001}},
+                    'city': {'death': 0.0001, 'size': 5000, 'birth': {'form': 'constant', 'c': 1}, 'immunity': 10}},
+    'strains': {'A': {'CFR': 0.01, 'recovery_time': 7, 'R0': 2.0, 'infected': 10},
+                'B': {'CFR': 0.02, 'recovery_time': 5, 'R0': 1.5, 'infected': 5, 'delay': 3}},
+    'scenarios': [{'name': 'both', 'population': 'town', 'strains': ['A', 'B'],
+                   'ranges': {'A.R0': [1.5, 2.5], 'population.birth.a': {'start': 0.1, 'stop': 0.3, 'num': 3}}},
+                  {'name': 'single', 'population': 'city', 'strains': ['B'], 'time': 10,
+                   'ranges': {'method': ['RK45', 'BDF']}}],
+}
+
+TOML = """
+[defaults]
+time = 20
+
+[populations.town]
+death = 0.0001
+size = 1000
+birth = {form = "exponential", a = 0.1, k = 0.001}
+
+[strains.A]
+CFR = 0.01
+recovery_time = 7
+R0 = 2.0
+infected = 10
+
+[[scenarios]]
+population = "town"
+strains = ["A"]
+ranges = {"A.R0" = [1.5, 2.5]}
+"""
+
+
+class ScenariosTest(unittest.TestCase):
+    """
+    Tests the scenario files and the epistrains command.
+    """
+
+    def test_expand_runs(self):
+        runs = scenarios.expand_runs(DESCRIPTION)
+        self.assertEqual(len(runs), 8)
+        name, values, strains, kwargs = runs[5]
+        self.assertEqual((name, values, strains), ('both', {'A.R0': 2.5, 'population.birth.a': 0.3}, ['A', 'B']))
+        self.assertAlmostEqual(kwargs['pop'].birth_rate.a, 0.3)
+        self.assertAlmostEqual(kwargs['strains'][0].beta_unscaled, 2.5*(0.01 + 1)/7)
+        self.assertEqual(kwargs['time'], 20)
+        self.assertEqual((runs[7][3]['method'], runs[7][3]['time']), ('BDF', 10))
+        # the description is left unchanged
+        self.assertEqual(DESCRIPTION['strains']['A']['R0'], 2.0)
+
+        for bad in ({'scenarios': []},
+                    {**DESCRIPTION, 'scenarios': [{'population': 'village', 'strains': ['A']}]},
+                    {**DESCRIPTION, 'scenarios': [{'population': 'town', 'strains': ['A'], 'ranges': {'C.R0': [1]}}]},
+                    {**DESCRIPTION, 'scenarios': [{'population': 'town', 'strains': ['A'], 'ranges': {'A.R0': []}}]},
+                    {**DESCRIPTION, 'defaults': {'colour': 'red'}}):
+            with self.assertRaises(ValueError):
+                scenarios.expand_runs(bad)
+
+        # missing fields are named with their scenario and strain
+        strains = {**DESCRIPTION['strains'], 'A': {k: v for k, v in DESCRIPTION['strains']['A'].items() if k != 'CFR'}}
+        with self.assertRaisesRegex(ValueError, "Strain 'A' of scenario 'both' is missing CFR"):
+            scenarios.expand_runs({**DESCRIPTION, 'strains': strains})
+        populations = {name: {k: v for k, v in pop.items() if k != 'death'}
+                       for name, pop in DESCRIPTION['populations'].items()}
+        with self.assertRaisesRegex(ValueError, "Population of scenario .* is missing death"):
+            scenarios.expand_runs({**DESCRIPTION, 'populations': populations})
+
+    def test_run_scenarios(self):
+        columns = scenarios.run_scenarios(DESCRIPTION, workers=1)
+        self.assertEqual(list(columns['runs.scenario']), ['both']*6 + ['single']*2)
+        np.testing.assert_array_equal(columns['runs.A.R0'][:6], [1.5, 1.5, 1.5, 2.5, 2.5, 2.5])
+        self.assertTrue(np.all(np.isnan(columns['runs.A.R0'][6:])))
+        self.assertEqual(list(columns['runs.method']), ['']*6 + ['RK45', 'BDF'])
+        # compare one run against solving it directly
+        _, _, _, kwargs = scenarios.expand_runs(DESCRIPTION)[6]
+        solver = es.Solver(**kwargs)
+        solver.solve()
+        rows = columns['run'] == 6
+        np.testing.assert_array_equal(columns['t'][rows], solver.solution.t)
+        np.testing.assert_array_equal(columns['S'][rows], solver.solution.y[0])
+        np.testing.assert_array_equal(columns['I_B'][rows], solver.solution.y[1])
+        np.testing.assert_array_equal(columns['deaths_B'][rows], solver.solution.cumulative_deaths[0])
+        self.assertTrue(np.all(np.isnan(columns['I_A'][rows])))
+        self.assertTrue(all(len(columns[name]) == len(columns['t']) for name in columns
+                            if not name.startswith('runs.')))
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'scenarios.json')
+            with open(json_path, 'w') as f:
+                json.dump(DESCRIPTION, f)
+            toml_path = os.path.join(directory, 'scenarios.toml')
+            with open(toml_path, 'w') as f:
+                f.write(TOML)
+            output = os.path.join(directory, 'results.npz')
+
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                self.assertEqual(cli.main([json_path, '--dry-run']), 0)
+            self.assertEqual(len(stdout.getvalue().splitlines()), 8)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(cli.main([toml_path, '-o', output, '-w', '2']), 0)
+            with np.load(output, allow_pickle=False) as results:
+                self.assertEqual(list(results['runs.scenario']), ['scenario_0']*2)
+                self.assertEqual(set(results['run']), {0, 1})
+                self.assertIn('infections_A', results.files)
+
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(cli.main([os.path.join(directory, 'missing.json')]), 1)
+            self.assertIn('error', stderr.getvalue())
+
+            incomplete = copy.deepcopy(DESCRIPTION)
+            del incomplete['strains']['B']['R0']
+            with open(json_path, 'w') as f:
+                json.dump(incomplete, f)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(cli.main([json_path, '--dry-run']), 1)
+            self.assertIn("Strain 'B' of scenario", stderr.getvalue())
+            self.assertIn('missing R0', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
+import subprocess
+import sys
 import unittest
 from unittest.mock import patch
 import epistrains as es
 import pytest
 import numpy as np
+import scipy.sparse
 import matplotlib
 
 
@@ -120,3 +123,245 @@ class SolverTest(unittest.TestCase):
         s.solve()
         s.save_death('test_death.png')
         save.assert_called_with('test_death.png', dpi=300)
+
+    def test_rhs(self):
+        s = es.Solver(strains=self.strains, pop=self.p)
+        y = np.array([60.0, 10.0, 5.0, 1.0, 24.0, 0.5, 0.2, 0.1, 12.0, 6.0, 2.0])
+        dy = s._rhs(y)
+        self.assertIsInstance(dy, np.ndarray)
+        self.assertEqual(len(dy), 11)
+        # compare against the compartment equations written out in full
+        S, R = y[0], y[4]
+        force = sum(st.beta_unscaled/s.n_sus*y[i+1] for i, st in enumerate(self.strains))
+        self.assertAlmostEqual(dy[0], s.func_birth(100) - force*S - s.b*S + s.w*R)
+        for j, st in enumerate(self.strains):
+            expected = y[j+1]*(st.beta_unscaled/s.n_sus*S - (s.b + st.nu + st.alpha))
+            self.assertAlmostEqual(dy[j+1], expected)
+            # cumulative deaths and infections
+            self.assertAlmostEqual(dy[j+5], st.alpha*y[j+1])
+            self.assertAlmostEqual(dy[j+8], st.beta_unscaled/s.n_sus*S*y[j+1])
+        recovered = sum(st.nu*y[i+1] for i, st in enumerate(self.strains))
+        self.assertAlmostEqual(dy[4], recovered - (s.b + s.w)*R)
+
+    def test_jac(self):
+        p = es.Population(0.5, 100, lambda N: 0.3*N, waning=0.2)
+        s = es.Solver(strains=self.strains, pop=p)
+        y = np.array([60.0, 10.0, 5.0, 1.0, 24.0, 0.5, 0.2, 0.1, 12.0, 6.0, 2.0])
+        jac = s._jac(y)
+        # central differences with a unit step are exact here as the
+        # right hand side is at most quadratic in y
+        for k in range(len(y)):
+            step = np.zeros(len(y))
+            step[k] = 1.0
+            column = (s._rhs(y + step) - s._rhs(y - step))/2
+            np.testing.assert_allclose(jac[:, k], column, atol=1e-12)
+        # non-zero entries must lie inside the sparsity pattern
+        pattern = s.jac_sparsity().toarray()
+        self.assertTrue(np.all(pattern[jac != 0] == 1))
+        self.assertEqual(pattern[1, 2], 0)
+        self.assertEqual(pattern[5, 0], 0)
+        # BDF and Radau are given the same Jacobian as a sparse matrix
+        for method, sparse in (('BDF', True), ('Radau', True), ('LSODA', False)):
+            options = es.Solver(strains=self.strains, pop=p, method=method)._solver_options()
+            jac_method = options['jac'](0.0, y)
+            self.assertEqual(scipy.sparse.issparse(jac_method), sparse)
+            np.testing.assert_allclose(jac_method.toarray() if sparse else jac_method, jac)
+
+    def test_implicit_methods(self):
+        s = es.Solver(strains=self.strains, pop=self.p, time=5)
+        s.solve()
+        for method in es.Solver.IMPLICIT_METHODS:
+            s_imp = es.Solver(strains=self.strains, pop=self.p, time=5, method=method, rtol=1e-6, atol=1e-8)
+            s_imp.solve()
+            self.assertEqual(s_imp.solution.y.shape, s.solution.y.shape)
+            np.testing.assert_allclose(s_imp.solution.y, s.solution.y, rtol=1e-2, atol=1e-2)
+
+    def test_no_matplotlib_import(self):
+        """
+        Tests solving does not import matplotlib, which is only loaded for plotting.
+        """
+        code = ("import sys, epistrains as es\n"
+                "p = es.Population(0.5, 100, es.make_br(2.0, 3.0))\n"
+                "es.Solver(p, [es.Strain(0.1, 0.2, 0.3, 10)]).solve()\n"
+                "assert 'matplotlib' not in sys.modules\n")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_solution_storage(self):
+        """
+        Tests segment boundaries are stored once and the dtype option.
+        """
+        strains = [self.strains[0], es.Strain(0.1, 0.2, 0.6, 5, delay=0.5)]
+        s = es.Solver(strains=strains, pop=self.p, time=2)
+        s.solve()
+        t = s.solution.t
+        self.assertEqual(len(np.unique(t)), len(t))
+        self.assertTrue(np.all(np.diff(t) > 0))
+        self.assertEqual((t[0], t[-1]), (0, 2))
+        # the boundary holds the state after the second strain is seeded
+        self.assertEqual(s.solution.y[2, np.nonzero(t == 0.5)[0][0]], 5)
+        s32 = es.Solver(strains=strains, pop=self.p, time=2, dtype=np.float32)
+        s32.solve()
+        self.assertEqual(s32.solution.y.dtype, np.float32)
+        np.testing.assert_allclose(s32.solution.y, s.solution.y, rtol=1e-5)
+
+    def test_solution_append(self):
+        sol = es.solver.Solution(3, 4)
+        sol.append(np.array([0.0, 1.0]), np.ones((3, 2)))
+        sol.append(np.array([2.0, 3.0]), np.zeros((3, 2)))
+        self.assertEqual(list(sol.t), [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(sol.y.shape, (3, 4))
+        with self.assertRaises(ValueError):
+            sol.append(np.array([4.0]), np.zeros((3, 1)))
+
+    def test_single_pass(self):
+        """
+        Tests integrating in a single stepping loop matches restarting
+        solve_ivp at each delay.
+        """
+        strains = [es.Strain(0.1, 0.2, 0.3, 10), es.Strain(0.1, 0.2, 0.6, 5, delay=0.5),
+                   es.Strain(0.1, 0.2, 0.6, 1, delay=1.25)]
+        for method in ('RK45', 'BDF'):
+            s = es.Solver(strains=strains, pop=self.p, time=3, method=method, rtol=1e-8, atol=1e-8)
+            s.solve()
+            s_single = es.Solver(strains=strains, pop=self.p, time=3, method=method, rtol=1e-8, atol=1e-8,
+                                 single_pass=True)
+            s_single.solve()
+            np.testing.assert_array_equal(s_single.solution.t, s.solution.t)
+            np.testing.assert_allclose(s_single.solution.y, s.solution.y, rtol=1e-5, atol=1e-6)
+
+    def test_resolution(self):
+        s = es.Solver(strains=self.strains, pop=self.p, time=4, resolution=2)
+        s.solve()
+        self.assertEqual(len(s.solution.t), 8)
+        self.assertEqual((s.solution.t[0], s.solution.t[-1]), (0, 4))
+        self.assertEqual(len(s.deaths), 8)
+        self.assertFalse(s.solution.has_dense)
+        with self.assertRaises(ValueError):
+            s.solution(1.0)
+
+    def test_explicit_times(self):
+        strains = [self.strains[0], es.Strain(0.1, 0.2, 0.6, 5, delay=1)]
+        s = es.Solver(strains=strains, pop=self.p, time=3, t_eval=[3, 0.5, 1, 2.25])
+        s.solve()
+        np.testing.assert_array_equal(s.solution.t, [0.5, 1, 2.25, 3])
+        # the state at a delay is the state after seeding
+        self.assertEqual(s.solution.y[2, 1], 5)
+        with self.assertRaises(ValueError):
+            es.Solver(strains=strains, pop=self.p, time=3, t_eval=[1, 4])
+
+    def test_dense_output(self):
+        """
+        Tests the solution can be interpolated at any time.
+        """
+        strains = [self.strains[0], es.Strain(0.1, 0.2, 0.6, 5, delay=1)]
+        for single_pass in (False, True):
+            s = es.Solver(strains=strains, pop=self.p, time=3, dense_output=True, single_pass=single_pass)
+            s.solve()
+            np.testing.assert_allclose(s.solution(s.solution.t), s.solution.y, rtol=1e-10)
+            self.assertEqual(s.solution(1.0)[2], 5)
+            self.assertEqual(s.solution([0.25, 2.5]).shape, (4, 2))
+            with self.assertRaises(ValueError):
+                s.solution(3.5)
+        # without output points only the dense output is kept
+        s_none = es.Solver(strains=strains, pop=self.p, time=3, resolution=None)
+        s_none.solve()
+        self.assertEqual(len(s_none.solution.t), 0)
+        np.testing.assert_allclose(s_none.solution([0.5, 2.9]), s.solution([0.5, 2.9]), rtol=1e-2, atol=1e-3)
+
+    def test_integrated_deaths(self):
+        """
+        Tests deaths and infections integrated with the compartments.
+        """
+        p = es.Population(0.0, 1000, lambda N: 0.0)
+        strains = [es.Strain(0.1, 5, 2.5, 10), es.Strain(0.2, 4, 3.0, 5, delay=2.5)]
+        s = es.Solver(strains=strains, pop=p, time=10.5, rtol=1e-8, atol=1e-8)
+        s.solve()
+        sol = s.solution
+        self.assertEqual(sol.cumulative_deaths.shape, (2, len(sol.t)))
+        # with no births or deaths, infections are the fall in S plus seeds
+        seeds = np.where(sol.t >= 2.5, 15, 10)
+        np.testing.assert_allclose(sol.cumulative_infections.sum(axis=0), sol.y[0, 0] - sol.y[0] + seeds, rtol=1e-6)
+        # 10 whole days and one half day
+        self.assertEqual(s.daily_deaths_by_strain.shape, (2, 11))
+        self.assertAlmostEqual(s.daily_deaths.sum(), sol.cumulative_deaths[:, -1].sum())
+        np.testing.assert_allclose(s.daily_cumulative_deaths, sol.cumulative_deaths.sum(axis=0))
+        # daily deaths do not depend on the output resolution
+        s_coarse = es.Solver(strains=strains, pop=p, time=10.5, rtol=1e-8, atol=1e-8, resolution=None,
+                             dense_output=False)
+        s_coarse.solve()
+        self.assertEqual(len(s_coarse.solution.t), 0)
+        self.assertFalse(s_coarse.solution.has_dense)
+        np.testing.assert_allclose(s_coarse.daily_deaths_by_strain, s.daily_deaths_by_strain, rtol=1e-6)
+
+    def test_stats(self):
+        """
+        Tests the integration statistics and the segment hook.
+        """
+        strains = [es.Strain(0.1, 5, 2.5, 10), es.Strain(0.2, 4, 3.0, 5, delay=2.5)]
+        calls = []
+        s = es.Solver(strains=strains, pop=self.p, time=10, hook=lambda segment, y: calls.append((segment, y)))
+        self.assertEqual(s.stats, None)
+        s.solve()
+        stats = s.stats
+        self.assertEqual([(seg.start, seg.end) for seg in stats.segments], [(0, 2.5), (2.5, 10)])
+        self.assertEqual([segment for segment, _ in calls], stats.segments)
+        np.testing.assert_allclose(calls[-1][1][:4], s.solution.y[:, -1])
+        self.assertEqual(stats.nfev, sum(seg.nfev for seg in stats.segments))
+        self.assertGreater(stats.steps, 0)
+        self.assertGreaterEqual(stats.rejected, 0)
+        # RK45 takes six evaluations per attempted step, plus two to start
+        for seg in stats.segments:
+            self.assertEqual(seg.nfev, 2 + 6*(seg.steps + seg.rejected))
+        self.assertEqual(stats.njev, 0)
+        self.assertGreaterEqual(stats.total_time, stats.integration_time + stats.post_time)
+        # implicit methods evaluate the Jacobian, but do not report rejected steps
+        s = es.Solver(strains=strains, pop=self.p, time=10, method='BDF')
+        s.solve()
+        self.assertGreater(s.stats.njev, 0)
+        self.assertEqual(s.stats.rejected, None)
+
+    def test_cross_immunity(self):
+        """
+        Tests reinfection of recovered individuals through the cross-immunity matrix.
+        """
+        p = es.Population(0.001, 10000, es.make_br(0.1, 0.0001), waning=0.01, immunity=5.0)
+        strains = [es.Strain(0.01, 7, 2.0, 50), es.Strain(0.02, 5, 1.5, 30, delay=10)]
+        s = es.Solver(p, strains, time=60, rtol=1e-9, atol=1e-9)
+        s.solve()
+        # full protection against every strain is the model without cross-immunity
+        full = es.Solver(p, strains, time=60, rtol=1e-9, atol=1e-9, cross_immunity=np.ones((2, 2)))
+        full.solve()
+        np.testing.assert_allclose(full.solution.y, s.solution.y, rtol=1e-6, atol=1e-4)
+        self.assertEqual(full.solution.recovered_by_strain.shape, (2, len(s.solution.t)))
+        np.testing.assert_allclose(full.solution.cumulative_infections, s.solution.cumulative_infections,
+                                   rtol=1e-6, atol=1e-4)
+
+        sigma = np.array([[1.0, 0.2], [0.5, 1.0]])
+        dense = es.Solver(p, strains, time=60, rtol=1e-9, atol=1e-9, cross_immunity=sigma)
+        dense.solve()
+        sparse = es.Solver(p, strains, time=60, rtol=1e-9, atol=1e-9, cross_immunity=scipy.sparse.csr_matrix(sigma))
+        sparse.solve()
+        np.testing.assert_allclose(sparse.solution.state, dense.solution.state, rtol=1e-10)
+        # those recovered from the first strain are reinfected by the second
+        self.assertGreater(dense.solution.cumulative_infections[1, -1], s.solution.cumulative_infections[1, -1])
+        rec = dense.solution.recovered_by_strain
+        self.assertTrue(np.all(rec.sum(axis=0) <= dense.solution.y[3] + 1e-6))
+        self.assertTrue(np.all(rec >= -1e-6))
+
+        # analytic Jacobian and its sparsity pattern
+        y = dense.solution.state[:, 200]
+        h = 1e-4
+        numeric = np.column_stack([(dense._rhs(y + h*e) - dense._rhs(y - h*e))/(2*h) for e in np.eye(len(y))])
+        np.testing.assert_allclose(dense._jac(y), numeric, atol=1e-6)
+        np.testing.assert_allclose(dense._jac(y, sparse=True).toarray(), numeric, atol=1e-6)
+        pattern = dense.jac_sparsity().toarray()
+        self.assertFalse(np.any((np.abs(numeric) > 1e-12) & (pattern == 0)))
+        bdf = es.Solver(p, strains, time=60, method='BDF', rtol=1e-6, atol=1e-6, cross_immunity=sigma)
+        bdf.solve()
+        np.testing.assert_allclose(bdf.solution.y[:, -1], dense.solution.y[:, -1], rtol=1e-3)
+
+        with self.assertRaises(ValueError):
+            es.Solver(p, strains, cross_immunity=np.ones((3, 3)))
+        with self.assertRaises(ValueError):
+            es.Solver(p, strains, cross_immunity=[[1.0, 2.0], [0.0, 1.0]])
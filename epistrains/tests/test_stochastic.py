@@ -0,0 +1,105 @@
+import unittest
+import numpy as np
+import epistrains as es
+
+
+class StochasticSolverTest(unittest.TestCase):
+    """
+    Tests the :class:`StochasticSolver` class.
+    """
+
+    def setUp(self):
+        self.pop = es.Population(0.0001, 1000, es.make_br(0.1, 0.001))
+        self.strains = [es.Strain(0.01, 7, 2.0, 5), es.Strain(0.02, 5, 1.5, 3, delay=10)]
+
+    def test_create(self):
+        s = es.StochasticSolver(self.pop, self.strains, time=20, replicates=3)
+        self.assertEqual(s.method, 'gillespie')
+        self.assertEqual(s.solution, None)
+        big = es.Population(0.0001, 100000, es.make_br(0.1, 0.001))
+        self.assertEqual(es.StochasticSolver(big, self.strains).method, 'tau_leap')
+        # rates and pause times are those of Solver
+        d = es.Solver(self.pop, self.strains, time=20)
+        for name in ('n', 'n_sus', 'alpha', 'beta_scaled', 'nu', 'b', 'w', 'recovered', '_deaths', '_infections'):
+            np.testing.assert_array_equal(getattr(s, name), getattr(d, name))
+        np.testing.assert_array_equal(s._pause_times(), d._pause_times())
+
+    def test_bad_inputs(self):
+        with self.assertRaises(ValueError):
+            es.StochasticSolver(self.pop, [])
+        with self.assertRaises(ValueError):
+            es.StochasticSolver(self.pop, self.strains, method='euler')
+        with self.assertRaises(ValueError):
+            es.StochasticSolver(self.pop, self.strains, replicates=0)
+        with self.assertRaises(ValueError):
+            es.StochasticSolver(self.pop, self.strains, tau=0)
+        with self.assertRaises(ValueError):
+            s = es.StochasticSolver(self.pop, self.strains)
+            s.extinction_probability()
+
+    def test_solve(self):
+        """
+        Tests the solution shape and that individuals are whole, never
+        negative, and only leave the population by dying.
+        """
+        p = es.Population(0.0, 200, None)
+        for method in ('gillespie', 'tau_leap'):
+            s = es.StochasticSolver(p, self.strains, time=20, replicates=5, method=method, seed=3)
+            s.solve()
+            d = es.Solver(es.Population(0.0, 200, es.ConstantBirth(0.0)), self.strains, time=20)
+            d.solve()
+            np.testing.assert_array_equal(s.solution.t, d.solution.t)
+            self.assertEqual(s.solution.y.shape, (5, 4, len(d.solution.t)))
+            self.assertEqual(s.daily_deaths_by_strain.shape, (5, 2, 20))
+            self.assertEqual(s.deaths.shape, (5, len(s.solution.t)))
+            np.testing.assert_array_equal(s.solution.state, np.rint(s.solution.state))
+            self.assertTrue(np.all(s.solution.state >= 0))
+            # the second strain is seeded at its delay
+            k = np.searchsorted(s.solution.t, 10)
+            total = s.solution.y.sum(axis=1) + s.solution.cumulative_deaths.sum(axis=1)
+            np.testing.assert_array_equal(total[:, :k], 197)
+            np.testing.assert_array_equal(total[:, k:], 200)
+            np.testing.assert_array_equal(s.solution.y[:, 2, :k], 0)
+            np.testing.assert_array_equal(s.solution.cumulative_infections[:, 1, k], 3)
+
+    def test_seed(self):
+        """
+        Tests replicates are reproducible and do not depend on the workers.
+        """
+        a = es.StochasticSolver(self.pop, self.strains, time=10, replicates=6, seed=7, block_size=2)
+        b = es.StochasticSolver(self.pop, self.strains, time=10, replicates=6, seed=7, block_size=2, workers=2)
+        c = es.StochasticSolver(self.pop, self.strains, time=10, replicates=6, seed=8, block_size=2)
+        for s in (a, b, c):
+            s.solve()
+        np.testing.assert_array_equal(a.solution.state, b.solution.state)
+        self.assertFalse(np.array_equal(a.solution.state, c.solution.state))
+
+    def test_mean(self):
+        """
+        Tests the mean of many replicates is close to the deterministic model.
+        """
+        p = es.Population(0.0001, 20000, es.make_br(0.1, 0.001))
+        strains = [es.Strain(0.01, 7, 2.0, 200)]
+        d = es.Solver(p, strains, time=30, resolution=1)
+        d.solve()
+        for method in ('gillespie', 'tau_leap'):
+            s = es.StochasticSolver(p, strains, time=30, replicates=20, method=method, seed=1, resolution=1)
+            s.solve()
+            np.testing.assert_allclose(s.solution.y.mean(axis=0), d.solution.y, rtol=0.05, atol=20)
+
+    def test_extinction(self):
+        """
+        Tests a single infected individual often dies out.
+        """
+        p = es.Population(0.0, 1000, None)
+        strains = [es.Strain(0.0, 2, 2.0, 1)]
+        s = es.StochasticSolver(p, strains, time=100, replicates=200, seed=2, resolution=1)
+        s.solve()
+        # early extinction of a branching process happens with probability
+        # 1/R0, and the outbreaks which take off also die out in the end
+        self.assertEqual(s.extinction_probability()[0], 1.0)
+        self.assertAlmostEqual((s.solution.cumulative_infections[:, 0, -1] < 50).mean(), 0.5, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import pytest
+import numpy as np
 import epistrains as es
+from epistrains.cache import solver_key
 
 
 class StrainTest(unittest.TestCase):
@@ -32,3 +34,54 @@ class StrainTest(unittest.TestCase):
 
         with pytest.raises(TypeError):
             s = es.Strain(0.1, 0.2, 0.3, 10, 'bad')
+
+        # strains have fixed attributes
+        with pytest.raises(AttributeError):
+            s = es.Strain(0.1, 0.2, 0.3, 10)
+            s.other = 1
+
+
+class StrainTableTest(unittest.TestCase):
+    """
+    Tests the :class:`StrainTable` class.
+    """
+    def test_create(self):
+        """
+        Tests the columns match the rates of Strain.
+        """
+        table = es.StrainTable([0.1, 0.2], [0.2, 0.5], 0.3, [10, 5], delay=[0, 15])
+        self.assertEqual(len(table), 2)
+        strains = [es.Strain(0.1, 0.2, 0.3, 10), es.Strain(0.2, 0.5, 0.3, 5, 15)]
+        for name in ('nu', 'alpha', 'beta_unscaled', 'infected', 'delay'):
+            np.testing.assert_allclose(getattr(table, name), [getattr(s, name) for s in strains])
+            np.testing.assert_allclose([getattr(s, name) for s in table], [getattr(s, name) for s in strains])
+        self.assertEqual(table[1].infected, 5)
+        from_strains = es.StrainTable.from_strains(strains)
+        np.testing.assert_array_equal(from_strains.beta_unscaled, table.beta_unscaled)
+        self.assertIs(es.StrainTable.from_strains(table), table)
+
+        with pytest.raises(TypeError):
+            es.StrainTable(['bad'], 0.2, 0.3, 10)
+        with pytest.raises(TypeError):
+            es.StrainTable(0.1, 0.2, 0.3, [10.5])
+        with pytest.raises(ValueError):
+            es.StrainTable(0.1, 0.2, 0.3, 10)
+        with pytest.raises(ValueError):
+            es.StrainTable([0.1, 0.2], 0.2, 0.3, [10, 5, 1])
+        with pytest.raises(ValueError):
+            es.StrainTable([[0.1]], 0.2, 0.3, 10)
+
+    def test_solver(self):
+        """
+        Tests Solver gives the same solution for a table as for the list.
+        """
+        p = es.Population(0.0001, 1000, es.make_br(0.1, 0.001))
+        strains = [es.Strain(0.01, 7, 2.0, 10), es.Strain(0.02, 5, 1.5, 5, delay=3)]
+        table = es.StrainTable.from_strains(strains)
+        s_list = es.Solver(p, strains, time=20)
+        s_list.solve()
+        s_table = es.Solver(p, table, time=20)
+        s_table.solve()
+        np.testing.assert_array_equal(s_table.solution.y, s_list.solution.y)
+        np.testing.assert_array_equal(s_table.daily_deaths, s_list.daily_deaths)
+        self.assertEqual(solver_key(s_table), solver_key(s_list))
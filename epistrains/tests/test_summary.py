@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import epistrains as es
+
+
+class SummaryTest(unittest.TestCase):
+    """
+    Tests the :class:`Summary` class and the summarize methods.
+    """
+
+    def setUp(self):
+        self.p = es.Population(0.01, 1000, lambda N: 0.0)
+        self.strains = [es.Strain(0.1, 2, 3.0, 10), es.Strain(0.2, 2, 0.5, 5, delay=1)]
+
+    def test_update(self):
+        """
+        Tests metrics accumulated over several blocks.
+        """
+        s = es.Summary((2,), 100.0)
+        infected = np.array([[0.0, 5.0, 8.0], [3.0, 2.0, 0.5]])
+        s.update(np.array([0.0, 1.0, 2.0]), infected, np.zeros((2, 3)), np.array([[0, 5, 9], [3, 3, 3.0]]))
+        np.testing.assert_array_equal(s.peak_infected, [8.0, 3.0])
+        np.testing.assert_array_equal(s.peak_time, [2.0, 0.0])
+        np.testing.assert_array_equal(s.extinction_time, [np.nan, 2.0])
+        infected = np.array([[0.9, 0.2], [1.5, 0.1]])
+        s.update(np.array([3.0, 4.0]), infected, np.ones((2, 2)), np.array([[10, 10], [4, 4.0]]))
+        np.testing.assert_array_equal(s.peak_infected, [8.0, 3.0])
+        # the second strain was revived at time 3 and died again at time 4
+        np.testing.assert_array_equal(s.extinction_time, [3.0, 4.0])
+        np.testing.assert_array_equal(s.total_deaths, [1.0, 1.0])
+        np.testing.assert_array_equal(s.attack_rate, [0.1, 0.04])
+        self.assertEqual(s.final_time, 4.0)
+        record = s.as_array()
+        self.assertEqual(record.shape, (2,))
+        self.assertEqual(record['peak_time'][0], 2.0)
+
+    def test_solver_summarize(self):
+        """
+        Tests the summary matches metrics computed from the full trajectory,
+        with and without the step size carried across delays.
+        """
+        for single_pass in (True, False):
+            s = es.Solver(self.p, self.strains, time=30, single_pass=single_pass)
+            s.solve()
+            summary = es.Solver(self.p, self.strains, time=30, single_pass=single_pass).summarize()
+            sol = s.solution
+            infected = sol.y[1:3]
+            np.testing.assert_allclose(summary.peak_infected, infected.max(axis=1), rtol=1e-8)
+            np.testing.assert_allclose(summary.peak_time, sol.t[infected.argmax(axis=1)])
+            np.testing.assert_allclose(summary.total_deaths, sol.cumulative_deaths[:, -1], rtol=1e-8)
+            np.testing.assert_allclose(summary.attack_rate, sol.cumulative_infections[:, -1]/1000, rtol=1e-8)
+            for j in range(2):
+                below = np.nonzero(infected[j] >= 1)[0][-1] + 1
+                self.assertEqual(summary.extinction_time[j], sol.t[below])
+
+    def test_step_hook(self):
+        """
+        Tests the step hook of the Solver also runs while summarizing.
+        """
+        times = []
+        es.Solver(self.p, self.strains, time=30, step_hook=times.append).summarize()
+        self.assertGreater(len(times), 2)
+        self.assertEqual(times[-1], 30)
+
+    def test_no_output_points(self):
+        """
+        Tests runs storing no output points are still sampled between the
+        delays, rather than only at them.
+        """
+        p = es.Population(0.0001, 150000, es.make_br(10.0, 0.001))
+        strains = [es.Strain(0.001, 7, 3.0, 150), es.Strain(0.002, 5, 1.5, 50, delay=10)]
+        sampled = es.Solver(p, strains, time=150).summarize()
+        summary = es.Solver(p, strains, time=150, resolution=None).summarize()
+        np.testing.assert_array_equal(summary.peak_infected, sampled.peak_infected)
+        np.testing.assert_array_equal(summary.peak_time, sampled.peak_time)
+        np.testing.assert_array_equal(summary.extinction_time, sampled.extinction_time)
+        self.assertNotIn(summary.peak_time[0], (10.0, 150.0))
+
+    def test_ensemble_summarize(self):
+        e = es.EnsembleSolver(R0=[[3.0, 0.5], [2.0, 0.5]], CFR=[0.1, 0.2], recovery_time=2, infected=[10, 5],
+                              delay=[0, 1], death=0.01, size=1000, birth_function=lambda N: 0.0, time=30)
+        summary = e.summarize()
+        self.assertEqual(summary.peak_infected.shape, (2, 2))
+        self.assertEqual(e.solution, None)
+        for k, R0 in enumerate([3.0, 2.0]):
+            strains = [es.Strain(0.1, 2, R0, 10), es.Strain(0.2, 2, 0.5, 5, delay=1)]
+            expected = es.Solver(self.p, strains, time=30).summarize()
+            for field in es.Summary.FIELDS:
+                np.testing.assert_allclose(getattr(summary, field)[k], getattr(expected, field), rtol=1e-2)
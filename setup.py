@@ -64,7 +64,15 @@ setup(
         'numpy',
         'matplotlib',
         'scipy',
+        # TOML scenario files, read by tomllib from Python 3.11
+        'tomli; python_version < "3.11"',
     ],
+    # Command line entry point
+    entry_points={
+        'console_scripts': [
+            'epistrains=epistrains.cli:main',
+        ],
+    },
     extras_require={
         'docs': [
             # Sphinx for doc generation. Version 1.7.3 has a bug: